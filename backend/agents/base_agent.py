@@ -1,4 +1,4 @@
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 from services import llm_service
 
 _MODEL = {"provider": "openai", "model": "gpt-4o-mini"}
@@ -9,23 +9,44 @@ class DynamicAgentInstance:
 
     def __init__(self, agent_config: dict):
         self._id = agent_config["id"]
+        self._name = agent_config.get("name", self._id)
         self._system_prompt = agent_config.get("system_prompt", "")
 
     @property
     def agent_id(self) -> str:
         return self._id
 
+    @property
+    def name(self) -> str:
+        return self._name
+
     async def stream(
         self,
         user_message: str,
         history: list[dict],
         thread_context: str = "",
+        panel: Optional[list[str]] = None,
     ) -> AsyncIterator[str]:
-        messages = [{"role": "system", "content": self._system_prompt}]
-        if thread_context:
+        """
+        panel: 같은 질문에 동시에 답하는 다른 agent 이름들 (panel mode).
+        panel mode에서는 공유 context (thread context + RAG)를 맨 앞에 두어 panel agent들의 요청이
+        같은 prefix로 시작 → provider prompt cache 재사용. agent별 persona는 그 뒤.
+        """
+        context = {"role": "system", "content": f"[Thread context]\n{thread_context}"} if thread_context else None
+        if panel is None:
+            messages = [{"role": "system", "content": self._system_prompt}]
+            if context:
+                messages.append(context)
+        else:
+            others = ", ".join(panel) or "other experts"
+            messages = [context] if context else []
             messages.append({
                 "role": "system",
-                "content": f"[Thread context]\n{thread_context}",
+                "content": (
+                    f"{self._system_prompt}\n\n"
+                    f"You are answering as one member of a panel alongside {others}. "
+                    "Give your own perspective concisely; do not try to cover every angle."
+                ),
             })
         messages.extend(history)
         messages.append({"role": "user", "content": user_message})
@@ -7,19 +7,35 @@ from services import llm_service
 _ROUTING_MODEL = {"provider": "openai", "model": "gpt-4o-mini"}
 
 
-def _build_routing_prompt(agents: list[dict]) -> str:
-    agent_list = "\n".join(
+def _agent_list(agents: list[dict]) -> str:
+    return "\n".join(
         f"- {a['id']}: {a['name']} — {a.get('reading_lens', a.get('field', ''))}"
         for a in agents
     )
+
+
+def _build_routing_prompt(agents: list[dict]) -> str:
     return (
         "You are routing a student's question to the most relevant expert agent.\n"
-        f"Available agents:\n{agent_list}\n\n"
+        f"Available agents:\n{_agent_list(agents)}\n\n"
         "Based on the student's message and conversation context, pick the most relevant agent.\n"
         "Reply with ONLY the agent id (the part before the colon above). One word, no punctuation."
     )
 
 
+def _routing_user_content(user_message: str, history: list, thread_context: str) -> str:
+    context_block = f"Thread context: {thread_context}\n" if thread_context else ""
+    history_block = ""
+    if history:
+        for msg in history[-6:]:
+            history_block += f"{msg.get('role', 'user')}: {msg.get('content', '')}\n"
+    return (
+        f"{context_block}"
+        f"Conversation history:\n{history_block}"
+        f"Student's message: {user_message}"
+    )
+
+
 async def route(
     user_message: str,
     history: list,
@@ -32,18 +48,7 @@ async def route(
 
     valid_ids = {a["id"] for a in agents}
     routing_prompt = _build_routing_prompt(agents)
-
-    context_block = f"Thread context: {thread_context}\n" if thread_context else ""
-    history_block = ""
-    if history:
-        for msg in history[-6:]:
-            history_block += f"{msg.get('role', 'user')}: {msg.get('content', '')}\n"
-
-    user_content = (
-        f"{context_block}"
-        f"Conversation history:\n{history_block}"
-        f"Student's message: {user_message}"
-    )
+    user_content = _routing_user_content(user_message, history, thread_context)
 
     try:
         decision = await llm_service.complete(
@@ -66,6 +71,48 @@ async def route(
     return agents[0]["id"]
 
 
+async def route_panel(
+    user_message: str,
+    history: list,
+    thread_context: str,
+    agents: list[dict],
+    size: int,
+) -> list[str]:
+    """panel mode — 관련도 순 상위 size개 agent ID (routing LLM 호출 1번). 부족하면 나머지 agent 순서대로 채움."""
+    if not agents:
+        return []
+    size = min(size, len(agents))
+    ids = [a["id"] for a in agents]
+    chosen: list[str] = []
+    try:
+        decision = await llm_service.complete(
+            _ROUTING_MODEL,
+            [
+                {"role": "system", "content": _build_panel_prompt(agents, size)},
+                {"role": "user", "content": _routing_user_content(user_message, history, thread_context)},
+            ],
+            max_tokens=10 * size,
+        )
+        for part in decision.lower().replace(",", " ").split():
+            aid = part.strip(" .;:")
+            if aid in ids and aid not in chosen:
+                chosen.append(aid)
+    except Exception:
+        pass
+    chosen += [aid for aid in ids if aid not in chosen]
+    return chosen[:size]
+
+
+def _build_panel_prompt(agents: list[dict], size: int) -> str:
+    return (
+        "You are assembling a panel of expert agents to answer a student's question.\n"
+        f"Available agents:\n{_agent_list(agents)}\n\n"
+        f"Pick the {size} agents whose perspectives would make the most useful panel discussion "
+        "of the student's message, most relevant first.\n"
+        f"Reply with ONLY {size} agent ids separated by commas (the part before the colon above). No other text."
+    )
+
+
 def get_agent(agent_id: str, agents: list[dict]) -> DynamicAgentInstance:
     """agent_id에 맞는 DynamicAgentInstance 반환. 없으면 첫 번째 에이전트."""
     for a in agents:
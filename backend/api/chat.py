@@ -1,17 +1,26 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
+import asyncio
 import json
+import logging
+import os
 
-from agents.router import route, get_agent
+from agents.router import route, route_panel, get_agent
 from db.vector_store import query as rag_query
-from db.firestore import get_chunk, get_agents_by_paper
+from db.firestore import get_chunks_by_ids_async, get_agents_by_paper_async
+from services import metrics, sse_stream, state_store, stream_pool, warmup
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# paper_id → agents cache
-_agents_cache: dict[str, list] = {}
+_PANEL_MIN, _PANEL_MAX = 2, 3
+_PANEL_SIZE = int(os.getenv("PANEL_SIZE", "3"))
+
+# paper_id → agents cache (api.papers와 같은 공유 namespace — 먼저 import된 쪽의 한도가 적용됨)
+_agents_cache = state_store.namespace("agents", ttl=6 * 3600, max_entries=2048, max_bytes=16 * 1024 * 1024)
 
 
 class HistoryMessage(BaseModel):
@@ -26,9 +35,12 @@ class MessageBody(BaseModel):
     agentId: Optional[str] = None   # 지정 시 라우팅 스킵, None이면 LLM-as-a-judge
     history: List[HistoryMessage] = []
     threadContext: str = ""
+    mode: Literal["single", "panel"] = "single"   # panel: agent 2~3명이 동시에 답변
+    agentIds: Optional[List[str]] = None          # panel 구성 직접 지정 (없으면 router가 선택)
+    panelSize: Optional[int] = None               # 기본 PANEL_SIZE
 
 
-def _get_paper_agents(paper_id: Optional[str]) -> list:
+async def _get_paper_agents(paper_id: Optional[str]) -> list:
     """paper의 dynamic agents 반환. 캐시 → Firestore 순으로 조회."""
     if not paper_id:
         return []
@@ -36,7 +48,7 @@ def _get_paper_agents(paper_id: Optional[str]) -> list:
     if cached:  # only use cache if non-empty
         return cached
     try:
-        agents = get_agents_by_paper(paper_id)
+        agents = await get_agents_by_paper_async(paper_id)
         if agents:  # don't cache empty — pipeline may still be running
             _agents_cache[paper_id] = agents
         return agents
@@ -44,14 +56,17 @@ def _get_paper_agents(paper_id: Optional[str]) -> list:
         return []
 
 
-def _fetch_rag(paper_id: Optional[str], query: str):
-    """RAG 검색 → (context_str, sources)."""
+async def _fetch_rag(paper_id: Optional[str], query: str):
+    """RAG 검색 → (context_str, sources). Chroma / Firestore 호출은 event loop 밖에서."""
     if not paper_id:
         return "", []
-    results = rag_query(paper_id, query, n_results=4)
+    results = await asyncio.to_thread(rag_query, paper_id, query, 4)
     if not results:
         return "", []
 
+    # rect는 Firestore chunk 문서에만 있음 — 결과 chunk들을 한 번에 조회
+    chunk_docs = await get_chunks_by_ids_async(paper_id, [r["id"] for r in results if r.get("id")])
+
     parts = []
     sources = []
     for r in results:
@@ -61,11 +76,8 @@ def _fetch_rag(paper_id: Optional[str], query: str):
         chunk_id = r.get("id", "")
         parts.append(f"[{section}, p.{page}]\n{content}")
 
-        rects = []
-        if chunk_id and paper_id:
-            chunk = get_chunk(paper_id, chunk_id)
-            if chunk:
-                rects = chunk.get("rects", [])
+        chunk = chunk_docs.get(chunk_id)
+        rects = chunk.get("rects", []) if chunk else []
 
         sources.append({
             "chunkId": chunk_id,
@@ -79,15 +91,22 @@ def _fetch_rag(paper_id: Optional[str], query: str):
 
 
 @router.post("/{thread_id}/message")
-async def send_message(thread_id: str, body: MessageBody):
+async def send_message(thread_id: str, body: MessageBody, request: Request):
     """학생 메시지 수신 → RAG 검색 → 에이전트 응답 SSE 스트리밍 (sources 포함)"""
-    rag_context, sources = _fetch_rag(body.paperId, body.content)
+    metrics.set_tags(paper_id=body.paperId or "", user_id=body.userId, stage="routing")
+    warmup.record_access(body.paperId)
+    rag_context, sources = await _fetch_rag(body.paperId, body.content)
 
     combined_context = body.threadContext
     if rag_context:
         combined_context += f"\n\n[Relevant paper excerpts]\n{rag_context}"
 
-    agents = _get_paper_agents(body.paperId)
+    agents = await _get_paper_agents(body.paperId)
+    history = [m.model_dump() for m in body.history]
+
+    if body.mode == "panel":
+        panel = await _select_panel(body, history, combined_context, agents)
+        return _sse(_generate_panel(body, request, panel, history, combined_context, sources))
 
     valid_ids = {a["id"] for a in agents}
     if body.agentId and body.agentId in valid_ids:
@@ -95,7 +114,7 @@ async def send_message(thread_id: str, body: MessageBody):
     else:
         agent_id = await route(
             body.content,
-            [m.model_dump() for m in body.history],
+            history,
             combined_context,
             agents,
         )
@@ -103,19 +122,83 @@ async def send_message(thread_id: str, body: MessageBody):
     agent = get_agent(agent_id, agents)
 
     async def generate():
+        metrics.set_tags(paper_id=body.paperId or "", user_id=body.userId, stage="chat")
         yield f"data: {json.dumps({'agent': agent.agent_id})}\n\n"
 
-        async for token in agent.stream(
+        tokens = agent.stream(
             user_message=body.content,
-            history=[m.model_dump() for m in body.history],
+            history=history,
             thread_context=combined_context,
-        ):
-            yield f"data: {json.dumps({'token': token})}\n\n"
+        )
+        # provider delta를 시간 / 크기 / 문장 경계로 묶어서 전송 (services.sse_stream).
+        # client가 떠나면 coalesce가 멈추고 provider stream을 닫음 → 남은 답변은 생성 / 과금 안 됨
+        async with stream_pool.slot():
+            async for text in sse_stream.coalesce(tokens, disconnected=request.is_disconnected):
+                if text is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps({'token': text})}\n\n"
+        if await request.is_disconnected():
+            return
 
         yield f"data: {json.dumps({'done': True, 'sources': sources})}\n\n"
 
+    return _sse(generate())
+
+
+async def _select_panel(body: MessageBody, history: list, context: str, agents: list) -> list:
+    """panel agent 목록 — agentIds 지정 시 그 중 유효한 것, 아니면 router가 관련도 순으로 선택."""
+    size = max(_PANEL_MIN, min(_PANEL_MAX, body.panelSize or _PANEL_SIZE))
+    valid_ids = {a["id"] for a in agents}
+    ids = [aid for aid in dict.fromkeys(body.agentIds or []) if aid in valid_ids][:size]
+    if not ids:
+        ids = await route_panel(body.content, history, context, agents, size)
+    if not ids:   # agents가 아직 없음 (pipeline 진행 중) — single mode와 같은 fallback
+        return [get_agent(body.agentId or "", agents)]
+    return [get_agent(aid, agents) for aid in ids]
+
+
+async def _generate_panel(body: MessageBody, request: Request, panel: list, history: list, context: str, sources: list):
+    """
+    panel agent들을 동시에 streaming. 이벤트:
+      {"panel": [{"id", "name"}]} → {"agent", "token"}* (agent별로 섞여서 도착) →
+      agent마다 {"agent", "agentDone": true} (실패 시 {"agent", "error"}) → {"done": true, "sources"}
+    RAG 검색 / routing은 panel 전체에서 1번, 각 agent 요청은 같은 context prefix로 시작.
+    """
+    metrics.set_tags(paper_id=body.paperId or "", user_id=body.userId, stage="chat")
+    yield f"data: {json.dumps({'panel': [{'id': a.agent_id, 'name': a.name} for a in panel]})}\n\n"
+
+    streams = {
+        agent.agent_id: sse_stream.coalesce(
+            agent.stream(
+                user_message=body.content,
+                history=history,
+                thread_context=context,
+                panel=[other.name for other in panel if other is not agent],
+            ),
+            disconnected=request.is_disconnected,
+        )
+        for agent in panel
+    }
+    async for agent_id, item in stream_pool.merge(streams):
+        if item is None:
+            yield ": keep-alive\n\n"
+        elif item is stream_pool.END:
+            yield f"data: {json.dumps({'agent': agent_id, 'agentDone': True})}\n\n"
+        elif isinstance(item, Exception):
+            logger.warning(f"[chat] panel agent {agent_id} failed: {item}")
+            yield f"data: {json.dumps({'agent': agent_id, 'error': 'agent response failed'})}\n\n"
+        else:
+            yield f"data: {json.dumps({'agent': agent_id, 'token': item})}\n\n"
+    if await request.is_disconnected():
+        return
+
+    yield f"data: {json.dumps({'done': True, 'sources': sources})}\n\n"
+
+
+def _sse(body) -> StreamingResponse:
     return StreamingResponse(
-        generate(),
+        body,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
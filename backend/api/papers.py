@@ -1,49 +1,85 @@
 import asyncio
-import hashlib
+import functools
 import json
 import logging
 import os
-import tempfile
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import Callable
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Header, Query, Request
 from fastapi.responses import FileResponse, Response, StreamingResponse
 
 from pipeline.ingestion import run_ingestion
 from pipeline.agent_gen import generate_agents
-from pipeline.agent_reading import run_agent_reading
-from pipeline.cross_reading import find_contested_excerpts
-from pipeline.discussion_formation import form_discussions
+from pipeline.progressive import run_progressive_discussions
 from db.vector_store import add_chunks
 from db.firestore import (
-    save_chunks, save_paper_meta, get_paper_meta,
-    save_agents, get_agents_by_paper, save_annotations, get_chunks,
-    save_user_paper_meta, get_papers_by_user_v2,
-    save_user_threads, get_user_threads,
-    find_paper_by_hash,
+    get_paper_meta, get_chunks, get_agents_by_paper,
+    get_paper_meta_async, get_agents_by_paper_async, get_chunks_async,
+    get_papers_by_user_v2_async, get_user_threads_async, find_paper_by_hash_async,
 )
-from db import storage
+from db import dedup_index, pdf_cache, storage, write_behind
+from models.chunk_table import ChunkTable
+from services import bulk_import, llm_batch, metrics, state_store, warmup
+from services.progress_bus import bus
+from services.upload_stream import receive_upload
 
 logger = logging.getLogger(__name__)
 
 # Fallback local storage (used when Firebase Storage is unavailable)
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+# 업로드 spool (같은 filesystem이면 local fallback으로 rename만 함)
+_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or os.path.join(DATA_DIR, "spool")
+_MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "200")) * 1024 * 1024
+_MAX_IMPORT_BYTES = int(os.getenv("BULK_IMPORT_MAX_MB", "4096")) * 1024 * 1024
+# 디렉터리 import (?path=)는 이 경로 아래만 허용. 비어 있으면 zip 업로드만 가능
+_IMPORT_ROOT = os.getenv("BULK_IMPORT_ROOT", "")
+_SYNC_TIMEOUT = float(os.getenv("PIPELINE_SYNC_TIMEOUT_S", "300"))
+_TOPIC_WAIT_S = 30.0    # SSE 연결이 pipeline 시작보다 빠를 때 topic 생성을 기다리는 최대 시간
+
+# body를 직접 파싱하므로 OpenAPI 문서용 스키마를 명시
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {
+                "file": {"type": "string", "format": "binary"},
+                "userId": {"type": "string", "default": "anonymous"},
+            },
+        }}},
+    },
+}
 
 router = APIRouter()
 
+# 공유 state store (services.state_store) — STATE_BACKEND=sqlite|redis면 worker 간 공유.
+# 꺼낸 list를 제자리 수정해도 저장되지 않으므로 항상 다시 대입할 것.
+# 모든 namespace는 엔트리 수 / byte / TTL로 제한됨 → evict된 값은 Firestore에서 다시 읽음.
+_DAY = 24 * 3600
 # paper_id → status ("processing" | "ready" | "error")
-_status: dict[str, str] = {}
+_status = state_store.namespace("status", ttl=_DAY, max_entries=20_000)
 # "{user_id}:{paper_id}" → status (for thread-only pipeline)
-_user_status: dict[str, str] = {}
-# paper_id → chunks (for /chunks endpoint)
-_chunks: dict[str, list] = {}
-# "{user_id}:{paper_id}" → threads (in-memory cache)
-_threads: dict[str, list] = {}
-# paper_id → agents (in-memory cache)
-_agents: dict[str, list] = {}
-# paper_id → list of SSE events (appended by pipeline thread, read by SSE endpoint)
-_progress: dict[str, list[str]] = {}
+_user_status = state_store.namespace("user_status", ttl=_DAY, max_entries=20_000)
+# paper_id → ChunkTable (for /chunks endpoint, 공유 backend에서는 dict 목록으로 직렬화) — 가장 큼
+_chunks = state_store.namespace("chunks", ttl=3600, max_entries=256, max_bytes=256 * 1024 * 1024)
+# "{user_id}:{paper_id}" → threads (cache)
+_threads = state_store.namespace("threads", ttl=6 * 3600, max_entries=2048, max_bytes=64 * 1024 * 1024)
+# paper_id → agents (cache, chat과 공유)
+_agents = state_store.namespace("agents", ttl=6 * 3600, max_entries=2048, max_bytes=16 * 1024 * 1024)
+# 파이프라인 진행 이벤트는 services.progress_bus (topic = paper_id)
+
+_ANNOTATION_BATCH = 8  # SSE annotation 이벤트당 annotation 수
+
+# batch mode 재처리 (services.llm_batch) — paper마다 thread 1개가 batch 결과를 기다리며 block.
+# 여러 paper를 동시에 띄워야 요청이 같은 provider batch에 모임 (BackgroundTasks는 순차 실행)
+_batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_BATCH_PIPELINE_WORKERS", "64")), thread_name_prefix="pipeline-batch",
+)
 
 
 # ──────────────────────────────────────────────
@@ -54,14 +90,37 @@ def _local_pdf_path(paper_id: str) -> str:
     return os.path.join(DATA_DIR, f"{paper_id}.pdf")
 
 
-def _write_temp_pdf(paper_id: str, contents: bytes) -> str:
-    """PDF bytes를 임시 파일로 저장하고 경로를 반환."""
-    tmp = tempfile.NamedTemporaryFile(
-        suffix=f"_{paper_id}.pdf", delete=False, dir=tempfile.gettempdir()
-    )
-    tmp.write(contents)
-    tmp.close()
-    return tmp.name
+def _pdf_etag(paper_id: str, size: int) -> str:
+    return f'"{paper_id}-{size:x}"'
+
+
+def _pdf_headers(etag: str) -> dict:
+    return {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=86400"}
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _parse_range(header: str | None, size: int):
+    """단일 "bytes=a-b" / "a-" / "-n" → (start, end) inclusive. 없음/다중 range/형식 오류 → None (전체 응답)."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
 
 
 # ──────────────────────────────────────────────
@@ -69,9 +128,42 @@ def _write_temp_pdf(paper_id: str, contents: bytes) -> str:
 # ──────────────────────────────────────────────
 
 def _emit(paper_id: str, stage: str, **kwargs) -> None:
-    """파이프라인 스레드에서 SSE 이벤트를 진행 큐에 추가."""
-    event = json.dumps({"stage": stage, **kwargs})
-    _progress.setdefault(paper_id, []).append(event)
+    """파이프라인 스레드에서 진행 이벤트 publish. "done"은 final 이벤트."""
+    bus.publish(paper_id, {"stage": stage, **kwargs}, final=(stage == "done"))
+
+
+def _append_thread(user_key: str, thread: dict) -> int:
+    threads = _threads.get(user_key) or []
+    threads.append(thread)
+    _threads[user_key] = threads
+    return len(threads)
+
+
+def _on_thread(paper_id: str, user_key: str, thread: dict) -> None:
+    """progressive pipeline에서 thread가 만들어질 때마다 호출 — thread 전체를 SSE로 전달."""
+    count = _append_thread(user_key, thread)
+    _emit(paper_id, "thread", thread=thread, count=count)
+
+
+class _AnnotationBatcher:
+    """매칭된 annotation을 모아 _ANNOTATION_BATCH개 단위로 SSE 이벤트 발행."""
+
+    def __init__(self, paper_id: str):
+        self._paper_id = paper_id
+        self._buf: list = []
+        self.total = 0
+
+    def add(self, ann: dict) -> None:
+        self._buf.append(ann)
+        if len(self._buf) >= _ANNOTATION_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        self.total += len(self._buf)
+        _emit(self._paper_id, "annotations", annotations=self._buf, count=self.total)
+        self._buf = []
 
 
 def _run_pipeline(
@@ -80,44 +172,59 @@ def _run_pipeline(
     pdf_path: str,
     cleanup: bool = False,
     content_hash: str | None = None,
+    store_chunks: Callable[[str, list], Future] | None = None,
 ) -> None:
-    """전체 pipeline: ingestion → agent gen → reading → discussions."""
+    """
+    전체 pipeline: ingestion → agent gen → (reading ∥ cross reading ∥ discussions, progressive).
+    store_chunks: bulk import용 — chunk 저장 (Chroma + Firestore)을 여러 paper와 묶어서 씀. ready 직전에 완료 대기.
+    """
     user_key = f"{user_id}:{paper_id}"
     try:
         _status[paper_id] = "processing"
         _user_status[user_key] = "processing"
-        _progress[paper_id] = []
+        bus.reset(paper_id)
+        metrics.set_tags(paper_id=paper_id, user_id=user_id)
+        metrics.open_usage(paper_id, user_id)
         logger.info(f"[pipeline] starting for {paper_id} (user={user_id})")
 
-        chunks, metadata = run_ingestion(paper_id, pdf_path)
+        chunk_dicts, metadata = run_ingestion(paper_id, pdf_path)
+        stored = None
+        if chunk_dicts and store_chunks is not None:
+            stored = store_chunks(paper_id, chunk_dicts)
+        elif chunk_dicts:
+            add_chunks(paper_id, chunk_dicts)
+            write_behind.save_chunks(paper_id, chunk_dicts)
+        # 이후 단계는 columnar ChunkTable만 사용 — dict 목록은 여기서 해제
+        chunks = ChunkTable.from_dicts(chunk_dicts, paper_id)
+        del chunk_dicts
         _chunks[paper_id] = chunks
-        if chunks:
-            add_chunks(paper_id, chunks)
-            save_chunks(paper_id, chunks)
         _emit(paper_id, "ingestion", count=len(chunks))
 
         logger.info(f"[pipeline] generating agents for {paper_id}")
-        agents = generate_agents(paper_id, chunks)
+        with metrics.tagged(stage="agent_gen"):
+            agents = generate_agents(paper_id, chunks)
         _agents[paper_id] = agents
         if agents:
-            save_agents(paper_id, agents)
-        _emit(paper_id, "agents", count=len(agents))
-
-        logger.info(f"[pipeline] agent reading for {paper_id}")
-        annotations = run_agent_reading(agents, chunks)
+            write_behind.save_agents(paper_id, agents)
+        _emit(paper_id, "agents", count=len(agents), agents=agents)
+
+        logger.info(f"[pipeline] reading + discussions (progressive) for {paper_id}")
+        _threads[user_key] = []
+        batcher = _AnnotationBatcher(paper_id)
+        annotations, contested_excerpts, threads = run_progressive_discussions(
+            paper_id, agents, chunks,
+            on_annotation=batcher.add,
+            on_thread=lambda t: _on_thread(paper_id, user_key, t),
+        )
+        batcher.flush()
         if annotations:
-            save_annotations(paper_id, annotations)
+            write_behind.save_annotations(paper_id, annotations)
         _emit(paper_id, "reading", count=len(annotations))
-
-        logger.info(f"[pipeline] cross-reading contested excerpts for {paper_id}")
-        contested_excerpts = find_contested_excerpts(annotations, chunks)
         _emit(paper_id, "cross_reading", count=len(contested_excerpts))
 
-        logger.info(f"[pipeline] forming discussions for {paper_id}")
-        threads = form_discussions(paper_id, contested_excerpts, agents)
         _threads[user_key] = threads
         if threads:
-            save_user_threads(user_id, paper_id, threads)
+            write_behind.save_user_threads(user_id, paper_id, threads)
         _emit(paper_id, "discussions", count=len(threads))
 
         paper_meta = {
@@ -127,12 +234,13 @@ def _run_pipeline(
             "abstract": metadata.get("abstract", ""),
             "chunkCount": len(chunks),
             "agentCount": len(agents),
+            "usage": metrics.usage_summary(paper_id, user_id, pop=True),
         }
         if content_hash:
             paper_meta["contentHash"] = content_hash
-        save_paper_meta(paper_id, paper_meta)
+        write_behind.save_paper_meta(paper_id, paper_meta)
 
-        save_user_paper_meta(user_id, paper_id, {
+        write_behind.save_user_paper_meta(user_id, paper_id, {
             "status": "ready",
             "threadCount": len(threads),
             "title": metadata.get("title", ""),
@@ -140,6 +248,10 @@ def _run_pipeline(
             "chunkCount": len(chunks),
         })
 
+        # ready 전에 이 paper의 write가 Firestore에 반영됐는지 확인 (다른 worker / 재시작 후 조회 대비)
+        if stored is not None:
+            stored.result()
+        _await_writes(paper_id, f"papers/{paper_id}", f"users/{user_id}/papers/{paper_id}")
         _status[paper_id] = "ready"
         _user_status[user_key] = "ready"
         _emit(paper_id, "done", status="ready")
@@ -151,7 +263,10 @@ def _run_pipeline(
         logger.error(f"[pipeline] error for {paper_id}: {e}", exc_info=True)
         _status[paper_id] = "error"
         _user_status[user_key] = "error"
-        save_user_paper_meta(user_id, paper_id, {"status": "error"})
+        write_behind.save_user_paper_meta(user_id, paper_id, {
+            "status": "error",
+            "usage": metrics.usage_summary(paper_id, user_id, pop=True),
+        })
         _emit(paper_id, "done", status="error", message=str(e))
     finally:
         if cleanup and os.path.exists(pdf_path):
@@ -159,43 +274,61 @@ def _run_pipeline(
             logger.info(f"[pipeline] cleaned up temp file {pdf_path}")
 
 
+def _await_writes(label: str, *prefixes: str) -> None:
+    """
+    ready 전 barrier — prefixes의 write-behind op가 Firestore에 반영될 때까지 대기 (재시도 중이면 계속 기다림).
+    op가 버려졌거나 PIPELINE_SYNC_TIMEOUT_S 안에 반영되지 않으면 raise → 호출부는 ready 대신 error 처리.
+    """
+    deadline = time.monotonic() + _SYNC_TIMEOUT
+    while not write_behind.flush(*prefixes, timeout=min(30.0, _SYNC_TIMEOUT)):
+        if write_behind.dropped(*prefixes):
+            raise RuntimeError(f"write for {label} was dropped — results not persisted")
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"writes for {label} not persisted after {_SYNC_TIMEOUT:.0f}s")
+        logger.warning(f"[pipeline] waiting for writes of {label} to persist before marking ready")
+
+
 def _run_pipeline_threads_only(paper_id: str, user_id: str) -> None:
     """중복 논문용 thread-only pipeline: 기존 chunks/agents 재사용, thread gen만 실행."""
     user_key = f"{user_id}:{paper_id}"
     try:
         _user_status[user_key] = "processing"
+        metrics.set_tags(paper_id=paper_id, user_id=user_id)
+        metrics.open_usage(paper_id, user_id)
         logger.info(f"[pipeline:threads-only] starting for {paper_id} (user={user_id})")
 
         chunks = _chunks.get(paper_id) or get_chunks(paper_id)
         if not chunks:
             raise ValueError(f"No chunks found for paper {paper_id}")
+        chunks = ChunkTable.coerce(chunks)
 
         agents = _agents.get(paper_id) or get_agents_by_paper(paper_id)
         if not agents:
             raise ValueError(f"No agents found for paper {paper_id}")
 
-        logger.info(f"[pipeline:threads-only] agent reading for {paper_id}")
-        annotations = run_agent_reading(agents, chunks)
-
-        contested_excerpts = find_contested_excerpts(annotations, chunks)
-
-        logger.info(f"[pipeline:threads-only] forming discussions for {paper_id}")
-        threads = form_discussions(paper_id, contested_excerpts, agents)
+        logger.info(f"[pipeline:threads-only] reading + discussions (progressive) for {paper_id}")
+        _threads[user_key] = []
+        _, _, threads = run_progressive_discussions(
+            paper_id, agents, chunks,
+            on_thread=lambda t: _append_thread(user_key, t),
+        )
         _threads[user_key] = threads
         if threads:
-            save_user_threads(user_id, paper_id, threads)
+            write_behind.save_user_threads(user_id, paper_id, threads)
 
         # 공유 논문 메타에서 title/authors/chunkCount 읽어서 denormalize
         shared_meta = get_paper_meta(paper_id) or {}
-        save_user_paper_meta(user_id, paper_id, {
+        write_behind.save_user_paper_meta(user_id, paper_id, {
             "status": "ready",
             "threadCount": len(threads),
             "title": shared_meta.get("title", ""),
             "authors": shared_meta.get("authors", []),
             "filename": shared_meta.get("filename", ""),
             "chunkCount": shared_meta.get("chunkCount", len(chunks)),
+            "usage": metrics.usage_summary(paper_id, user_id, pop=True),
         })
 
+        _await_writes(user_key, f"users/{user_id}/papers/{paper_id}")
         _user_status[user_key] = "ready"
         logger.info(
             f"[pipeline:threads-only] done — {len(threads)} threads for {paper_id} (user={user_id})"
@@ -203,7 +336,143 @@ def _run_pipeline_threads_only(paper_id: str, user_id: str) -> None:
     except Exception as e:
         logger.error(f"[pipeline:threads-only] error for {paper_id} (user={user_id}): {e}", exc_info=True)
         _user_status[user_key] = "error"
-        save_user_paper_meta(user_id, paper_id, {"status": "error"})
+        write_behind.save_user_paper_meta(user_id, paper_id, {
+            "status": "error",
+            "usage": metrics.usage_summary(paper_id, user_id, pop=True),
+        })
+
+
+def _find_near_duplicate(pdf_path: str, content_hash: str) -> tuple[str | None, list]:
+    """exact hash로 못 찾은 PDF — 페이지 텍스트 hash로 near-duplicate 확인. (기존 paper_id 또는 None, page_hashes)."""
+    page_hashes = dedup_index.page_fingerprints(pdf_path)
+    near = dedup_index.get_index().find_near_duplicate(page_hashes)
+    if not near:
+        return None, page_hashes
+    existing_paper_id, score = near
+    logger.info(
+        f"[upload] near-duplicate detected: hash={content_hash[:12]}… matches "
+        f"{existing_paper_id} (page overlap {score:.0%})"
+    )
+    # 같은 파일이 다시 올라오면 exact 단계에서 바로 찾도록 alias 등록
+    dedup_index.get_index().record(existing_paper_id, content_hash)
+    return existing_paper_id, page_hashes
+
+
+def _register_new_paper(
+    paper_id: str,
+    user_id: str,
+    path: str,
+    filename: str,
+    content_hash: str,
+    page_hashes: list,
+) -> tuple[str, bool]:
+    """
+    신규 논문 등록 — spool의 PDF를 Storage (또는 local fallback)에 보관하고 paper / user 메타 저장.
+    (pipeline 입력 경로, pipeline 후 삭제 여부) 반환.
+    """
+    if storage.is_available():
+        uploaded = storage.upload_pdf_file(paper_id, path)
+        pdf_path = path
+        cleanup = uploaded is not None
+        if uploaded:
+            pdf_cache.get_cache().adopt(paper_id, path)   # 첫 열람도 캐시 hit
+        else:
+            logger.warning(f"[upload] Storage upload failed for {paper_id} — keeping local temp file")
+    else:
+        logger.warning("[upload] Storage unavailable — falling back to local storage")
+        os.makedirs(DATA_DIR, exist_ok=True)
+        pdf_path = _local_pdf_path(paper_id)
+        os.replace(path, pdf_path)
+        cleanup = False
+
+    now = datetime.now(timezone.utc).isoformat()
+    # 메타는 바로 저장 (upload 응답 직후 /meta / 라이브러리 / 다른 노드의 hash 조회용) — Firestore 장애 중이면
+    # write-behind spool로 넘어가 재시도. dedup index는 save_paper_meta가 Firestore 호출 전에 기록
+    write_behind.save_paper_meta_now(paper_id, {
+        "status": "processing",
+        "filename": filename,
+        "uploadedAt": now,
+        "contentHash": content_hash,
+        "pageHashes": page_hashes,
+    })
+    write_behind.save_user_paper_meta_now(user_id, paper_id, {
+        "status": "processing",
+        "filename": filename,
+        "uploadedAt": now,
+    })
+    return pdf_path, cleanup
+
+
+def _run_batched(fn, *args) -> None:
+    """pipeline을 batch mode로 실행 — 이 thread의 LLM 호출은 provider batch API로 모아서 제출됨."""
+    with llm_batch.use(llm_batch.get_collector()):
+        fn(*args)
+
+
+def _import_new(
+    paper_id: str,
+    user_id: str,
+    path: str,
+    filename: str,
+    content_hash: str,
+    page_hashes: list,
+    store_chunks: Callable[[str, list], Future],
+    batch: bool = False,
+) -> str:
+    """bulk import worker — 신규 논문 등록 + 전체 pipeline (호출 thread에서 끝까지). 최종 status 반환."""
+    pdf_path, cleanup = _register_new_paper(paper_id, user_id, path, filename, content_hash, page_hashes)
+    run = functools.partial(_run_pipeline, paper_id, user_id, pdf_path, cleanup, content_hash, store_chunks=store_chunks)
+    if batch:
+        _run_batched(run)
+    else:
+        run()
+    return _status.get(paper_id) or "error"
+
+
+def _import_duplicate(paper_id: str, user_id: str, filename: str, batch: bool = False) -> str:
+    """bulk import worker — 이미 있는 논문을 user 라이브러리에 추가하고 thread-only pipeline. 최종 status 반환."""
+    write_behind.save_user_paper_meta_now(user_id, paper_id, {
+        "uploadedAt": datetime.now(timezone.utc).isoformat(),
+        "status": "processing",
+        "filename": filename,
+    })
+    if batch:
+        _run_batched(_run_pipeline_threads_only, paper_id, user_id)
+    else:
+        _run_pipeline_threads_only(paper_id, user_id)
+    return _user_status.get(f"{user_id}:{paper_id}") or "error"
+
+
+_IMPORT_HANDLERS = bulk_import.Handlers(_find_near_duplicate, _import_new, _import_duplicate)
+
+
+def start_import(
+    source: str,
+    user_id: str,
+    batch: bool = False,
+    workers: int | None = None,
+    remove_source: bool = False,
+) -> bulk_import.ImportJob:
+    """bulk import job 시작 (zip 경로 또는 디렉터리). POST /papers/import와 CLI (python -m services.bulk_import)가 사용."""
+    kwargs = {"workers": workers} if workers else {}
+    return bulk_import.start(
+        source, user_id, _IMPORT_HANDLERS, _SPOOL_DIR, batch=batch, remove_source=remove_source, **kwargs,
+    )
+
+
+def _start_reprocess(paper_id: str, user_id: str, batch: bool, background_tasks: BackgroundTasks | None = None) -> bool:
+    user_key = f"{user_id}:{paper_id}"
+    if _user_status.get(user_key) == "processing":
+        return False
+    _threads.pop(user_key, None)
+    _user_status[user_key] = "processing"
+    if batch:
+        _batch_executor.submit(_run_batched, _run_pipeline_threads_only, paper_id, user_id)
+    elif background_tasks is not None:
+        background_tasks.add_task(_run_pipeline_threads_only, paper_id, user_id)
+    else:
+        _batch_executor.submit(_run_pipeline_threads_only, paper_id, user_id)
+    return True
 
 
 # ──────────────────────────────────────────────
@@ -213,113 +482,183 @@ def _run_pipeline_threads_only(paper_id: str, user_id: str) -> None:
 @router.get("")
 async def list_papers(userId: str = Query(...)):
     """유저의 논문 라이브러리 목록 반환"""
-    papers = get_papers_by_user_v2(userId)
+    papers = await get_papers_by_user_v2_async(userId)
     return {"papers": papers}
 
 
 @router.get("/{paper_id}/meta")
 async def get_paper(paper_id: str):
     """단일 논문 메타데이터 반환 (ReaderPage URL param용)"""
-    meta = get_paper_meta(paper_id)
+    meta = await get_paper_meta_async(paper_id)
     if meta is None:
         raise HTTPException(status_code=404, detail="Paper not found")
+    meta.pop("pageHashes", None)   # dedup 내부용
     meta["paperId"] = paper_id
+    warmup.record_access(paper_id)
     return meta
 
 
-@router.post("/upload")
-async def upload_paper(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    userId: str = Form(default="anonymous"),
-):
-    """PDF 업로드 → SHA256 중복 확인 → 신규면 전체 pipeline, 기존이면 thread-only pipeline"""
-    if not file.filename or not file.filename.endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="PDF 파일만 업로드 가능합니다")
-
-    contents = await file.read()
-    content_hash = hashlib.sha256(contents).hexdigest()
+@router.post("/upload", openapi_extra=_UPLOAD_OPENAPI)
+async def upload_paper(request: Request, background_tasks: BackgroundTasks):
+    """
+    PDF 업로드 → SHA256 중복 확인 → 신규면 전체 pipeline, 기존이면 thread-only pipeline.
+    multipart body (file, userId)를 chunk 단위로 spool 파일에 쓰면서 hash — 파일 전체를 메모리에 올리지 않음.
+    """
+    upload = await receive_upload(request, _SPOOL_DIR, _MAX_UPLOAD_BYTES, suffix=".pdf")
+    userId = upload.fields.get("userId") or "anonymous"
+    content_hash = upload.sha256
 
-    # 중복 확인
-    existing_paper_id = find_paper_by_hash(content_hash)
+    try:
+        existing_paper_id = await find_paper_by_hash_async(content_hash)
+        page_hashes: list = []
+        if not existing_paper_id:
+            existing_paper_id, page_hashes = await asyncio.to_thread(_find_near_duplicate, upload.path, content_hash)
+    except BaseException:
+        upload.discard()
+        raise
     now = datetime.now(timezone.utc).isoformat()
 
     if existing_paper_id:
         # 기존 논문 재사용 — thread-only pipeline
+        upload.discard()
         logger.info(f"[upload] duplicate detected: hash={content_hash[:12]}… → reusing {existing_paper_id}")
-        save_user_paper_meta(userId, existing_paper_id, {
+        await asyncio.to_thread(write_behind.save_user_paper_meta_now, userId, existing_paper_id, {
             "uploadedAt": now,
             "status": "processing",
-            "filename": file.filename,
+            "filename": upload.filename,
         })
         background_tasks.add_task(_run_pipeline_threads_only, existing_paper_id, userId)
         return {"paperId": existing_paper_id, "status": "processing"}
 
-    # 신규 논문 — 전체 pipeline
+    # 신규 논문 — 전체 pipeline. spool 파일을 그대로 pipeline 입력으로 사용 (복사 없음)
     paper_id = str(uuid.uuid4())
+    logger.info(f"[upload] received {upload.filename} ({upload.size / 1e6:.1f}MB) → {paper_id}")
 
-    if storage.is_available():
-        uploaded = storage.upload_pdf(paper_id, contents)
-        pdf_path = _write_temp_pdf(paper_id, contents)
-        cleanup = uploaded is not None
-        if not uploaded:
-            logger.warning(f"[upload] Storage upload failed for {paper_id} — keeping local temp file")
+    pdf_path, cleanup = await asyncio.to_thread(
+        _register_new_paper, paper_id, userId, upload.path, upload.filename, content_hash, page_hashes,
+    )
+    background_tasks.add_task(_run_pipeline, paper_id, userId, pdf_path, cleanup, content_hash)
+    return {"paperId": paper_id, "status": "processing"}
+
+
+@router.post("/import")
+async def import_library(
+    request: Request,
+    userId: str | None = Query(default=None),
+    path: str | None = Query(default=None),
+    batch: bool = Query(False),
+):
+    """
+    PDF 여러 편을 한 번에 라이브러리에 추가 — multipart zip (file, userId) 또는 서버 디렉터리 (?path=, BULK_IMPORT_ROOT 아래만).
+    중복은 먼저 걸러내고 (기존 논문은 thread-only), 신규 논문은 worker pool에서 pipeline 실행.
+    job을 만들고 바로 반환 — 진행 상황 (papersPerMin 등)은 GET /papers/import/{jobId}.
+    """
+    if path is not None:
+        if not _IMPORT_ROOT:
+            raise HTTPException(status_code=403, detail="디렉터리 import가 비활성화되어 있습니다 (BULK_IMPORT_ROOT)")
+        root = os.path.realpath(_IMPORT_ROOT)
+        source = os.path.realpath(path)
+        if os.path.commonpath([root, source]) != root:
+            raise HTTPException(status_code=403, detail="BULK_IMPORT_ROOT 밖의 경로입니다")
+        if not os.path.isdir(source):
+            raise HTTPException(status_code=404, detail="디렉터리를 찾을 수 없습니다")
+        job = start_import(source, userId or "anonymous", batch=batch)
     else:
-        logger.warning("[upload] Storage unavailable — falling back to local storage")
-        os.makedirs(DATA_DIR, exist_ok=True)
-        pdf_path = _local_pdf_path(paper_id)
-        with open(pdf_path, "wb") as f:
-            f.write(contents)
-        cleanup = False
+        upload = await receive_upload(request, _SPOOL_DIR, _MAX_IMPORT_BYTES, suffix=".zip")
+        job = start_import(upload.path, userId or upload.fields.get("userId") or "anonymous", batch=batch, remove_source=True)
+    logger.info(f"[upload] bulk import {job.id} started for {job.user_id} (batch={batch})")
+    return job.snapshot()
 
-    save_paper_meta(paper_id, {
-        "status": "processing",
-        "filename": file.filename,
-        "uploadedAt": now,
-        "contentHash": content_hash,
-    })
-    save_user_paper_meta(userId, paper_id, {
-        "status": "processing",
-        "filename": file.filename,
-        "uploadedAt": now,
-    })
 
-    background_tasks.add_task(_run_pipeline, paper_id, userId, pdf_path, cleanup, content_hash)
-    return {"paperId": paper_id, "status": "processing"}
+@router.get("/import/{job_id}")
+async def get_import(job_id: str, details: bool = Query(True)):
+    """bulk import 진행 상황 — papersPerMin, ready / failed / queued 수, ETA, 파일별 결과 (details)."""
+    job = bulk_import.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.snapshot(details=details)
 
 
 @router.get("/{paper_id}/pdf")
-async def get_paper_pdf(paper_id: str):
-    """PDF 서빙 — Firebase Storage 우선, 없으면 로컬 fallback"""
-    if storage.is_available():
-        data = storage.download_pdf(paper_id)
-        if data:
-            return Response(content=data, media_type="application/pdf")
-
-    file_path = _local_pdf_path(paper_id)
-    if not os.path.exists(file_path):
+async def get_paper_pdf(paper_id: str, request: Request):
+    """
+    PDF 서빙 — 로컬 디스크 캐시 / local fallback 파일은 FileResponse (Range, sendfile),
+    캐시 miss는 Firebase Storage에서 chunk 스트리밍 (받으면서 캐시에 기록).
+    paper PDF는 생성 후 불변 → ETag = paperId + 크기, If-None-Match면 304.
+    """
+    cache = pdf_cache.get_cache()
+    path = cache.lookup(paper_id)
+    if path is None and os.path.exists(_local_pdf_path(paper_id)):
+        path = _local_pdf_path(paper_id)
+    if path is not None:
+        etag = _pdf_etag(paper_id, os.path.getsize(path))
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=_pdf_headers(etag))
+        return FileResponse(path, media_type="application/pdf", headers=_pdf_headers(etag))
+
+    size = await asyncio.to_thread(storage.pdf_size, paper_id) if storage.is_available() else None
+    if size is None:
         raise HTTPException(status_code=404, detail="PDF not found")
-    return FileResponse(file_path, media_type="application/pdf")
+    etag = _pdf_etag(paper_id, size)
+    headers = _pdf_headers(etag)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = _parse_range(request.headers.get("range"), size)
+    if byte_range == "unsatisfiable":
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    if byte_range is not None and _etag_matches(request.headers.get("if-range") or etag, etag):
+        # PDF.js range 요청: 요청 구간만 Storage에서 바로 보내고, 전체 파일은 background로 캐시
+        start, end = byte_range
+        cache.fill_background(paper_id, lambda: storage.iter_pdf(paper_id, 0, size - 1))
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+        return StreamingResponse(
+            storage.iter_pdf(paper_id, start, end), status_code=206,
+            media_type="application/pdf", headers=headers,
+        )
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(
+        cache.tee(paper_id, storage.iter_pdf(paper_id, 0, size - 1), expected_size=size),
+        media_type="application/pdf", headers=headers,
+    )
 
 
 @router.get("/{paper_id}/pipeline-stream")
-async def stream_pipeline(paper_id: str):
-    """파이프라인 진행상황 SSE 스트림."""
+async def stream_pipeline(paper_id: str, last_event_id: str | None = Header(default=None)):
+    """
+    파이프라인 진행상황 SSE 스트림.
+    stage 이벤트 외에 agents / annotations batch / thread 단위 payload를 생성 즉시 전달.
+    재연결 시 Last-Event-ID 이후 이벤트만 전송.
+    """
     async def generate():
+        status = _status.get(paper_id)
+        if status in ("ready", "error") and not bus.has_topic(paper_id):
+            # 끝난 지 retention TTL이 지나 진행 로그가 정리됨 — 빈 topic을 구독하지 않고 done만 재생
+            yield f"data: {json.dumps({'stage': 'done', 'status': status})}\n\n"
+            return
+        # 업로드 직후엔 pipeline thread가 topic을 reset하기 전일 수 있음 — 구독은 topic을 만들지 않으므로 잠깐 대기
+        deadline = time.monotonic() + _TOPIC_WAIT_S
+        while _status.get(paper_id) == "processing" and not bus.has_topic(paper_id):
+            if time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(0.2)
+        if not bus.has_topic(paper_id):
+            status = _status.get(paper_id)
+            if status in ("ready", "error"):
+                yield f"data: {json.dumps({'stage': 'done', 'status': status})}\n\n"
+            return
         sent = 0
-        while True:
-            events = _progress.get(paper_id, [])
-            while sent < len(events):
-                yield f"data: {events[sent]}\n\n"
-                sent += 1
-            if sent > 0:
-                last = json.loads(events[sent - 1])
-                if last.get("stage") == "done":
+        async for item in bus.subscribe(paper_id, after=last_event_id or ""):
+            if item is None:
+                if _status.get(paper_id) == "error" and sent == 0 and not last_event_id:
+                    yield f"data: {json.dumps({'stage': 'done', 'status': 'error'})}\n\n"
                     break
-            if _status.get(paper_id) == "error" and sent == 0:
-                yield f"data: {json.dumps({'stage': 'done', 'status': 'error'})}\n\n"
-                break
-            await asyncio.sleep(0.5)
+                yield ": keep-alive\n\n"
+                continue
+            event_id, data = item
+            yield f"id: {event_id}\ndata: {data}\n\n"
+            sent += 1
 
     return StreamingResponse(
         generate(),
@@ -347,26 +686,44 @@ async def reprocess_paper(
     paper_id: str,
     background_tasks: BackgroundTasks,
     userId: str = Query(...),
+    batch: bool = Query(False),
 ):
-    """이미 업로드된 논문에 대해 thread pipeline을 다시 실행"""
-    user_key = f"{userId}:{paper_id}"
-    if _user_status.get(user_key) == "processing":
+    """
+    이미 업로드된 논문에 대해 thread pipeline을 다시 실행.
+    batch=true면 provider batch API 사용 (결과까지 수 분~수 시간, LLM 단가 ~50%).
+    """
+    if not _start_reprocess(paper_id, userId, batch, background_tasks):
         return {"paperId": paper_id, "status": "processing", "message": "Already running"}
+    return {"paperId": paper_id, "status": "processing", "batch": batch}
 
-    _threads.pop(user_key, None)
-    _user_status[user_key] = "processing"
 
-    background_tasks.add_task(_run_pipeline_threads_only, paper_id, userId)
-    return {"paperId": paper_id, "status": "processing"}
+@router.post("/reprocess")
+async def reprocess_library(
+    userId: str = Query(...),
+    paperIds: list[str] | None = Query(default=None),
+    batch: bool = Query(True),
+):
+    """
+    라이브러리 전체 (또는 paperIds) thread pipeline 재실행 — 코스 라이브러리 야간 재처리용.
+    기본은 batch mode: 모든 paper의 stage 요청이 provider batch로 모이고, 결과가 오는 대로 paper별로 진행.
+    진행 상황은 paper별 /{paper_id}/status.
+    """
+    if paperIds is None:
+        library = await get_papers_by_user_v2_async(userId)
+        paperIds = [p["paperId"] for p in library if p.get("status") != "processing"]
+    started = [pid for pid in paperIds if _start_reprocess(pid, userId, batch)]
+    logger.info(f"[pipeline] library reprocess for {userId}: {len(started)}/{len(paperIds)} paper(s), batch={batch}")
+    return {"status": "processing", "batch": batch, "paperIds": started, "skipped": len(paperIds) - len(started)}
 
 
 @router.get("/{paper_id}/agents")
 async def get_paper_agents(paper_id: str):
     """이 논문의 dynamic agents 반환"""
-    if paper_id in _agents:
-        return {"paperId": paper_id, "agents": _agents[paper_id]}
+    cached = _agents.get(paper_id)
+    if cached is not None:
+        return {"paperId": paper_id, "agents": cached}
     try:
-        agents = get_agents_by_paper(paper_id)
+        agents = await get_agents_by_paper_async(paper_id)
     except Exception as e:
         logger.warning(f"[agents] Firestore fallback failed for {paper_id}: {e}")
         agents = []
@@ -381,13 +738,15 @@ async def get_paper_threads(paper_id: str, userId: str = Query(...)):
     status = _user_status.get(user_key) or _status.get(paper_id)
 
     if status == "processing":
-        return {"paperId": paper_id, "status": "processing", "threads": []}
+        # progressive pipeline이 지금까지 만든 thread 반환
+        return {"paperId": paper_id, "status": "processing", "threads": _threads.get(user_key) or []}
 
-    if user_key in _threads:
-        return {"paperId": paper_id, "status": status or "ready", "threads": _threads[user_key]}
+    cached = _threads.get(user_key)
+    if cached is not None:
+        return {"paperId": paper_id, "status": status or "ready", "threads": cached}
 
     try:
-        threads = get_user_threads(userId, paper_id)
+        threads = await get_user_threads_async(userId, paper_id)
     except Exception as e:
         logger.warning(f"[threads] Firestore fallback failed for {paper_id} (user={userId}): {e}")
         threads = []
@@ -398,11 +757,18 @@ async def get_paper_threads(paper_id: str, userId: str = Query(...)):
 @router.get("/{paper_id}/chunks")
 async def get_paper_chunks(paper_id: str):
     """파싱된 청크 목록 반환"""
-    if paper_id not in _chunks:
+    chunks = _chunks.get(paper_id)
+    if chunks is None:
         status = _status.get(paper_id)
-        if status is None:
-            raise HTTPException(status_code=404, detail="Paper not found")
         if status == "processing":
             return {"paperId": paper_id, "status": "processing", "chunks": []}
-        raise HTTPException(status_code=404, detail="Chunks not available")
-    return {"paperId": paper_id, "status": _status.get(paper_id, "ready"), "chunks": _chunks[paper_id]}
+        # 캐시에서 evict/만료됨 → Firestore fallback
+        chunks = await get_chunks_async(paper_id)
+        if not chunks:
+            if status is None and await get_paper_meta_async(paper_id) is None:
+                raise HTTPException(status_code=404, detail="Paper not found")
+            raise HTTPException(status_code=404, detail="Chunks not available")
+        _chunks[paper_id] = chunks
+    if isinstance(chunks, ChunkTable):
+        chunks = chunks.to_dicts()
+    return {"paperId": paper_id, "status": _status.get(paper_id, "ready"), "chunks": chunks}
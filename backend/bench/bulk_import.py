@@ -0,0 +1,158 @@
+"""
+Bulk import 처리량 — 같은 PDF 묶음을 (1) 한 편씩 순서대로, (2) 동시에 돌리되 chunk 저장은 paper마다 따로
+(= /papers/upload를 N번), (3) services.bulk_import job (worker pool + 여러 paper chunk 저장 묶기)으로 import.
+
+헤드라인은 papers/min. 외부 의존성은 로컬 가짜로 대체:
+  - ingestion: Grobid 없음 → pypdf fallback (실제 PDF 파싱)
+  - LLM: services.llm_batch 가짜 batch 서버 (--llm-latency)
+  - Firestore: db.fake_firestore.FakeFirestore (commit당 --fs-latency)
+  - 임베딩: --embed fake면 호출당 고정 비용 + 문서당 비용 (ONNX 모델 호출 overhead 모사), real이면 Chroma 기본 모델
+세 mode 모두 파일 / dedup index / Firestore는 새로 시작. 결과는 JSON.
+
+    cd backend
+    python -m bench.bulk_import                          # 40 papers, 8 workers
+    python -m bench.bulk_import --papers 200 --workers 16 --embed real
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_TEXT = (
+    "We study how attention layers trade recall for latency on long documents. "
+    "The proposed method caches intermediate states and reuses them across queries. "
+)
+
+
+def _make_pdfs(directory: str, n: int, pages: int) -> None:
+    import fitz
+
+    for i in range(n):
+        doc = fitz.open()
+        for p in range(pages):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Paper {i}, page {p}. " + _TEXT * 8 + f" [{i}-{p}]")
+        doc.save(os.path.join(directory, f"paper-{i:04d}.pdf"))
+
+
+class _PerPaperWriter:
+    """upload 경로처럼 paper마다 자기 thread에서 바로 저장 (묶지 않음)."""
+
+    def __init__(self):
+        self.writes = 0
+
+    def submit(self, paper_id: str, chunks: list) -> Future:
+        from services import bulk_import
+
+        bulk_import._write_chunks({paper_id: chunks})
+        self.writes += 1
+        future: Future = Future()
+        future.set_result(None)
+        return future
+
+    def close(self) -> None:
+        pass
+
+
+def _fake_embed(args):
+    def embed(documents: list) -> list:
+        time.sleep(args.embed_call_ms / 1000 + args.embed_doc_ms / 1000 * len(documents))
+        return [[0.0] * 8 for _ in documents]
+    return embed
+
+
+def _run_mode(name: str, source: str, workdir: str, args, workers: int, writer) -> dict:
+    from api import papers
+    from db import dedup_index, firestore
+    from db.fake_firestore import FakeFirestore
+    from services import bulk_import
+
+    os.environ["DEDUP_DB_PATH"] = os.path.join(workdir, f"dedup-{name}.sqlite3")
+    dedup_index._index = None
+    db = FakeFirestore(latency=args.fs_latency)
+    firestore.set_client(db)
+
+    job = bulk_import.start(
+        source, f"bench-{name}", papers._IMPORT_HANDLERS, papers._SPOOL_DIR, workers=workers, writer=writer,
+    )
+    job.wait()
+    snap = job.snapshot()
+    return {
+        "papersPerMin": snap["papersPerMin"],
+        "elapsedS": snap["elapsedS"],
+        "ready": snap["ready"],
+        "failed": snap["failed"],
+        "chunkWrites": writer.writes,
+        "firestoreCommits": db.commits,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--embed", choices=("fake", "real"), default="fake")
+    parser.add_argument("--embed-call-ms", type=float, default=40, help="fake embed: fixed cost per call")
+    parser.add_argument("--embed-doc-ms", type=float, default=1.5, help="fake embed: cost per document")
+    parser.add_argument("--fs-latency", type=float, default=0.03, help="FakeFirestore latency per call (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="fake batch completion time (s)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-bulk-import-")
+    os.environ.update({
+        "UPLOAD_SPOOL_DIR": os.path.join(workdir, "spool"),
+        "PDF_CACHE_DIR": os.path.join(workdir, "pdf_cache"),
+        "WARMUP_DB_PATH": os.path.join(workdir, "warmup.sqlite3"),
+        "WRITE_BEHIND": "0",
+        "GROBID_URL": "http://127.0.0.1:9",
+        "LLM_BATCH_PROVIDER": "fake",
+        "LLM_BATCH_FAKE_LATENCY_S": str(args.llm_latency),
+        "LLM_BATCH_MAX_WAIT_S": "0.05",
+        "LLM_BATCH_POLL_S": "0.02",
+    })
+    import logging
+    logging.disable(logging.WARNING)
+
+    from api import papers
+    from db import vector_store
+    from services import bulk_import
+
+    papers.DATA_DIR = os.path.join(workdir, "data")
+    vector_store._DB_PATH = os.path.join(workdir, "chroma")
+    if args.embed == "fake":
+        vector_store._embed = _fake_embed(args)
+
+    source = os.path.join(workdir, "readings")
+    os.makedirs(source)
+    _make_pdfs(source, args.papers, args.pages)
+
+    # 모든 paper를 batch LLM 경로로 — pipeline을 같은 조건으로 (provider 호출 없이) 끝까지 돌림
+    run_new = papers._import_new
+
+    def run_new_batched(*a):
+        return run_new(*a[:-1], True)
+
+    papers._IMPORT_HANDLERS = papers._IMPORT_HANDLERS._replace(run_new=run_new_batched)
+
+    results = {
+        "sequential": _run_mode("sequential", source, workdir, args, 1, _PerPaperWriter()),
+        "perPaperWrites": _run_mode("per-paper", source, workdir, args, args.workers, _PerPaperWriter()),
+        "bulk": _run_mode("bulk", source, workdir, args, args.workers, bulk_import.ChunkWriter()),
+    }
+    results["speedupVsSequential"] = round(
+        results["bulk"]["papersPerMin"] / max(0.1, results["sequential"]["papersPerMin"]), 2,
+    )
+    results["speedupVsPerPaperWrites"] = round(
+        results["bulk"]["papersPerMin"] / max(0.1, results["perPaperWrites"]["papersPerMin"]), 2,
+    )
+    print(json.dumps({"papers": args.papers, "workers": args.workers, "embed": args.embed, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
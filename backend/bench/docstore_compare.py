@@ -0,0 +1,138 @@
+"""
+Document store 비교 — 같은 db.firestore 함수를 Firestore 경로와 SQLite backend로 실행.
+
+Firestore 경로: FIRESTORE_EMULATOR_HOST가 있으면 emulator, 없으면 round-trip 지연을 흉내 낸 FakeFirestore.
+read-through cache는 매 호출 전에 비워서 backend 자체 비용을 잼.
+
+    cd backend
+    python -m bench.docstore_compare                       # fake Firestore (RTT 30ms) vs SQLite
+    python -m bench.docstore_compare --papers 2000 --rtt 0.05
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m bench.docstore_compare
+
+마지막에 SQLite EXPLAIN QUERY PLAN으로 contentHash / uploadedAt 조회가 index를 쓰는지 출력.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("WRITE_BEHIND", "0")
+
+
+def _clear_caches(firestore) -> None:
+    from services.cache import BoundedCache
+    for value in vars(firestore).values():
+        if isinstance(value, BoundedCache):
+            value.clear()
+
+
+def _timed(fn, n: int) -> dict:
+    samples = []
+    for i in range(n):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50Ms": round(statistics.median(samples) * 1000, 3),
+        "p99Ms": round(samples[min(len(samples) - 1, int(0.99 * len(samples)))] * 1000, 3),
+        "totalS": round(sum(samples), 3),
+    }
+
+
+def run(firestore, args) -> dict:
+    rng = random.Random(7)
+    user = "bench-user"
+    hashes = [f"{i:064x}" for i in range(args.papers)]
+    chunks = [
+        {"id": f"c{j:05d}", "content": "lorem ipsum " * 40, "section": "Intro", "pageStart": 1, "pageEnd": 1,
+         "rects": [{"page": 1, "x1": 0.1, "y1": 0.2, "x2": 0.3, "y2": 0.4, "width": 612, "height": 792}]}
+        for j in range(args.chunks)
+    ]
+
+    def save_meta(i):
+        pid = f"p{i}"
+        now = f"2024-01-01T00:00:{i:06d}"
+        firestore.save_paper_meta(pid, {"status": "ready", "uploadedAt": now, "contentHash": hashes[i]})
+        firestore.save_user_paper_meta(user, pid, {"status": "ready", "uploadedAt": now, "filename": f"{i}.pdf"})
+
+    def save_chunks(i):
+        firestore.save_chunks(f"p{i}", chunks)
+
+    def find_hash(i):
+        _clear_caches(firestore)
+        target = rng.randrange(args.papers)
+        assert firestore.find_paper_by_hash(hashes[target]) == f"p{target}"
+
+    def library(i):
+        _clear_caches(firestore)
+        assert len(firestore.get_papers_by_user_v2(user)) == args.papers
+
+    def get_chunks(i):
+        _clear_caches(firestore)
+        assert len(firestore.get_chunks(f"p{i % args.chunk_papers}")) == args.chunks
+
+    def get_meta(i):
+        _clear_caches(firestore)
+        assert firestore.get_paper_meta(f"p{rng.randrange(args.papers)}") is not None
+
+    return {
+        "save_paper_meta+user_meta": _timed(save_meta, args.papers),
+        f"save_chunks x{args.chunks}": _timed(save_chunks, args.chunk_papers),
+        "get_paper_meta": _timed(get_meta, args.reads),
+        "find_paper_by_hash": _timed(find_hash, args.reads),
+        f"get_papers_by_user_v2 ({args.papers} papers)": _timed(library, max(1, args.reads // 10)),
+        "get_chunks": _timed(get_chunks, args.chunk_papers),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=300, help="chunks per paper")
+    parser.add_argument("--chunk-papers", type=int, default=10, help="papers that get chunks")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--rtt", type=float, default=0.03, help="fake Firestore latency per call (s)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    from db import firestore
+    from db.fake_firestore import FakeFirestore
+    from db.sqlite_store import SQLiteDocumentStore
+
+    results = {}
+    if os.getenv("FIRESTORE_EMULATOR_HOST"):
+        firestore._firebase_available = None
+        firestore._db = None
+        label = "firestore-emulator"
+    else:
+        firestore.set_client(FakeFirestore(latency=args.rtt))
+        label = f"firestore-fake(rtt={args.rtt * 1000:.0f}ms)"
+    results[label] = run(firestore, args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteDocumentStore(os.path.join(tmp, "bench.sqlite3"))
+        firestore.set_client(store)
+        _clear_caches(firestore)
+        results["sqlite"] = run(firestore, args)
+        plans = {
+            "find_paper_by_hash": store.collection("papers").where("contentHash", "==", "x").limit(1).explain(),
+            "get_papers_by_user_v2": (
+                store.collection("users").document("u").collection("papers")
+                .order_by("uploadedAt", direction="DESCENDING").explain()
+            ),
+        }
+        results["sqliteQueryPlans"] = plans
+        results["sqliteFileMB"] = round(os.path.getsize(store.path) / 1e6, 2)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load test — 느린 Firestore 호출이 동시 chat SSE stream을 멈추게 하는지 측정.
+
+in-process uvicorn 서버 + 인위적 지연을 가진 FakeFirestore + 일정 간격으로 token을 내는 fake LLM.
+chat stream N개를 여는 동안 library / meta endpoint를 cache miss로 계속 호출하고,
+stream의 token 간 간격 (p50 / p99 / max)을 비교.
+
+    cd backend
+    python -m bench.firestore_async_load                # async API (bounded executor)
+    python -m bench.firestore_async_load --mode sync    # 비교용: Firestore를 event loop에서 직접 호출
+
+--mode sync에서는 Firestore 지연만큼 token 간격이 늘어나고, async에서는 LLM token 간격 근처에 머무름.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("WRITE_BEHIND", "0")
+
+
+def _install_fake_llm(token_interval: float, tokens: int) -> None:
+    from services import llm_service
+
+    class _Chunk:
+        def __init__(self, text=None, usage=None):
+            delta = types.SimpleNamespace(content=text)
+            self.choices = [types.SimpleNamespace(delta=delta)] if text else []
+            self.usage = usage
+
+    async def _stream():
+        for i in range(tokens):
+            await asyncio.sleep(token_interval)
+            yield _Chunk(f"tok{i} ")
+        yield _Chunk(None, types.SimpleNamespace(prompt_tokens=50, completion_tokens=tokens, prompt_tokens_details=None))
+
+    class _Completions:
+        async def create(self, **kw):
+            return _stream()
+
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=_Completions()))
+    llm_service._get_openai = lambda: client
+
+
+async def _chat_stream(client, gaps: list, user: int) -> None:
+    # stream마다 다른 user — llm_scheduler의 user별 interactive 한도에 걸리지 않도록
+    body = {"content": "why?", "userId": f"bench{user}", "agentId": "a1"}
+    async with client.stream("POST", "/chat/t1/message", json=body) as resp:
+        last = None
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            now = time.perf_counter()
+            if last is not None and "token" in line:
+                gaps.append(now - last)
+            last = now
+
+
+async def _reader(client, stop: asyncio.Event, counter: list, worker: int) -> None:
+    i = 0
+    while not stop.is_set():
+        i += 1
+        # 매번 다른 user / paper → 캐시 miss로 Firestore까지 감
+        await client.get("/papers", params={"userId": f"u{worker}-{i}"})
+        await client.get(f"/papers/p{worker}-{i}/meta")
+        counter[0] += 2
+
+
+def _pct(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def main(args) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    import httpx
+    import uvicorn
+    from db import firestore
+    from db.fake_firestore import FakeFirestore
+
+    _install_fake_llm(args.token_interval, args.tokens)
+    firestore.set_client(FakeFirestore(latency=args.latency))
+    if args.mode == "sync":
+        async def _inline(fn, *a):
+            return fn(*a)
+        firestore._in_executor = _inline
+
+    import main as app_module
+    config = uvicorn.Config(app_module.app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    gaps: list = []
+    stop = asyncio.Event()
+    counter = [0]
+    limits = httpx.Limits(max_connections=args.streams + args.readers + 10)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60, limits=limits) as client:
+        readers = [asyncio.create_task(_reader(client, stop, counter, w)) for w in range(args.readers)]
+        started = time.perf_counter()
+        await asyncio.gather(*[_chat_stream(client, gaps, i) for i in range(args.streams)])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*readers)
+
+    server.should_exit = True
+    await serve
+
+    result = {
+        "mode": args.mode,
+        "streams": args.streams,
+        "readers": args.readers,
+        "firestoreLatencyMs": args.latency * 1000,
+        "tokenIntervalMs": args.token_interval * 1000,
+        "gapP50Ms": round(statistics.median(gaps) * 1000, 1) if gaps else None,
+        "gapP99Ms": round(_pct(gaps, 0.99) * 1000, 1),
+        "gapMaxMs": round(max(gaps) * 1000, 1) if gaps else None,
+        "readerRps": round(counter[0] / elapsed, 1),
+        "seconds": round(elapsed, 2),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1, help="fake Firestore latency per call (s)")
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""
+Cold start import budget — `python -X importtime -c "import main"`을 새 프로세스로 N번 실행해
+main.py import 시간 (최솟값)을 budget과 비교. 초과하거나 lazy여야 할 모듈이 import되면 exit 1 (CI용).
+
+    cd backend
+    python -m bench.import_budget                      # budget 1500ms, 3회
+    python -m bench.import_budget --budget-ms 800 --runs 5 --top 20
+    IMPORT_BUDGET_MS=1000 python -m bench.import_budget
+
+lazy여야 하는 모듈 (첫 사용 시 import): provider SDK (openai / anthropic / google.genai), chromadb, fitz.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("openai", "anthropic", "google.genai", "chromadb", "fitz")
+
+
+def _importtime(target: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] — importtime 출력 순서 그대로."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=_BACKEND, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue   # header
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def _loaded(target: str) -> list:
+    code = f"import sys, {target}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=_BACKEND, capture_output=True, text=True)
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="show N slowest top-level imports")
+    args = parser.parse_args()
+
+    runs = [_importtime(args.target) for _ in range(args.runs)]
+    totals = [next(cum for name, _, cum, _ in rows if name == args.target) / 1000 for rows in runs]
+    best = runs[totals.index(min(totals))]
+    # target이 직접 import한 모듈 (depth 1) 중 cumulative 상위
+    direct = sorted(
+        ((name, cum / 1000) for name, _, cum, depth in best if depth == 1),
+        key=lambda r: r[1], reverse=True,
+    )[:args.top]
+    eager = _loaded(args.target)
+
+    ok = min(totals) <= args.budget_ms and not eager
+    print(json.dumps({
+        "target": args.target,
+        "importMs": {"min": round(min(totals), 1), "max": round(max(totals), 1), "runs": args.runs},
+        "budgetMs": args.budget_ms,
+        "eagerLazyModules": eager,
+        "slowestDirectImportsMs": {name: round(ms, 1) for name, ms in direct},
+        "ok": ok,
+    }, indent=2))
+    if not ok:
+        reasons = []
+        if min(totals) > args.budget_ms:
+            reasons.append(f"import {args.target} took {min(totals):.0f}ms > budget {args.budget_ms:.0f}ms")
+        if eager:
+            reasons.append(f"modules that should be lazy were imported: {', '.join(eager)}")
+        sys.exit("FAIL: " + "; ".join(reasons))
+
+
+if __name__ == "__main__":
+    main()
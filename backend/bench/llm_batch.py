@@ -0,0 +1,98 @@
+"""
+Batch mode 재처리 — 여러 paper의 thread pipeline을 services.llm_batch의 가짜 batch 서버로 실행.
+
+paper마다 thread 1개에서 run_progressive_discussions를 `llm_batch.use(collector)` 안에서 돌리고
+(POST /papers/reprocess와 같은 방식), provider batch 제출 수 / 요청 수 / batch당 요청 수,
+전체 시간, paper별 thread 수를 잼. 가짜 provider는 schema 이름별로 유효한 응답을 만들어 줌
+(reading → 모든 agent가 같은 chunk에 annotation, cross reading → high, discussion → thread 1개).
+
+    cd backend
+    python -m bench.llm_batch                        # 50 papers × 3 agents, batch latency 1s
+    python -m bench.llm_batch --papers 200 --latency 2 --max-wait 0.5
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _responder(kind: str, body: dict) -> str:
+    name = body["response_format"]["json_schema"]["name"]
+    prompt = body["messages"][-1]["content"]
+    if name == "annotations":
+        return json.dumps({"annotations": [{
+            "chunk_id": "c0", "annotation_type": "tension", "content": "unclear", "quote": "attention layers",
+        }]})
+    if name == "conflict_analyses":
+        n = len(re.findall(r"=== E\d+ ===", prompt))
+        return json.dumps({"analyses": [{
+            "index": f"E{i}", "conflict_type": "interpretive", "conflict_intensity": "high",
+            "key_tension": "scope", "tension_pair": ["a0", "a1"],
+        } for i in range(n)]})
+    if name == "discussion_threads":
+        return json.dumps({"threads": [{
+            "excerpt_index": "E0", "open_question": "Does this generalize?", "suggested_agent": "a0",
+            "seed_messages": [{"author": "a0", "content": "I doubt it."}, {"author": "a1", "content": "It does."}],
+        }]})
+    raise ValueError(f"unexpected schema {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=50)
+    parser.add_argument("--agents", type=int, default=3)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake batch completion time (s)")
+    parser.add_argument("--max-wait", type=float, default=0.3, help="collector flush wait (s)")
+    parser.add_argument("--poll", type=float, default=0.1, help="collector poll interval (s)")
+    args = parser.parse_args()
+
+    from models.chunk_table import ChunkTable
+    from pipeline.progressive import run_progressive_discussions
+    from services import llm_batch
+
+    collector = llm_batch.BatchCollector(
+        lambda provider: llm_batch.FakeBatchProvider(provider, args.latency, _responder),
+        max_wait_s=args.max_wait,
+        poll_s=args.poll,
+    )
+    agents = [{"id": f"a{i}", "name": f"Agent {i}", "field": "ml", "reading_lens": "methods"} for i in range(args.agents)]
+    chunk_dicts = [
+        {"id": f"c{i}", "section": "Method", "content": f"Section {i}: the attention layers are stacked twice."}
+        for i in range(args.chunks)
+    ]
+    threads_per_paper: dict[str, int] = {}
+
+    def run(paper_id: str) -> None:
+        chunks = ChunkTable.from_dicts(chunk_dicts, paper_id)
+        with llm_batch.use(collector):
+            _, _, threads = run_progressive_discussions(paper_id, agents, chunks)
+        threads_per_paper[paper_id] = len(threads)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=run, args=(f"paper-{i}",)) for i in range(args.papers)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    stats = collector.stats()
+    print(json.dumps({
+        "papers": args.papers,
+        "requests": stats["submitted"],
+        "batches": stats["batchesSubmitted"],
+        "requestsPerBatch": round(stats["submitted"] / max(1, stats["batchesSubmitted"]), 1),
+        "elapsedS": round(elapsed, 2),
+        "papersPerMin": round(args.papers / elapsed * 60, 1),
+        "papersWithThreads": sum(1 for n in threads_per_paper.values() if n),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
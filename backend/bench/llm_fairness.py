@@ -0,0 +1,143 @@
+"""
+LLM fair-share scheduler 효과 — 한 사용자의 대량 업로드 중 학생 chat 지연.
+
+가짜 provider: 동시 호출이 capacity를 넘으면 모든 호출이 비례해서 느려짐 (rate limit / 과부하 근사).
+  - 교수 1명이 논문 N편 업로드: paper마다 thread + asyncio.run (실제 pipeline과 같음), paper당 병렬 호출 다수
+  - 학생 S명이 chat: interactive 호출을 간격을 두고 순차 실행
+scheduler 켬 (llm_scheduler 기본 정책) / 끔 (무제한)으로 학생 호출 latency, class별 대기 시간 비교.
+
+    cd backend
+    python -m bench.llm_fairness
+    python -m bench.llm_fairness --papers 30 --calls-per-paper 12 --capacity 16 --students 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Provider:
+    """동시 호출 수가 capacity를 넘으면 latency가 (active / capacity)배."""
+
+    def __init__(self, capacity: int, service_s: float):
+        self.capacity = capacity
+        self.service_s = service_s
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    async def create(self, **kw):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            remaining = self.service_s
+            while remaining > 0:   # processor sharing — 매 tick 현재 부하로 진행
+                step = 0.01
+                await asyncio.sleep(step)
+                remaining -= step * min(1.0, self.capacity / max(1, self.active))
+        finally:
+            with self._lock:
+                self.active -= 1
+        message = types.SimpleNamespace(content="ok")
+        return types.SimpleNamespace(usage=None, choices=[types.SimpleNamespace(message=message)])
+
+
+def _pct(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run(args, scheduled: bool) -> dict:
+    from services import llm_scheduler, llm_service, metrics
+
+    provider = _Provider(args.capacity, args.service_ms / 1000)
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=provider))
+    llm_service._get_openai = lambda: client
+    if scheduled:
+        llm_scheduler._scheduler = llm_scheduler.Scheduler(
+            max_inflight=args.capacity,
+            class_max={llm_scheduler.INTERACTIVE: args.capacity, llm_scheduler.PIPELINE: max(1, args.capacity * 3 // 4)},
+        )
+    else:
+        unlimited = 1 << 30
+        llm_scheduler._scheduler = llm_scheduler.Scheduler(
+            max_inflight=unlimited,
+            class_max={llm_scheduler.INTERACTIVE: unlimited, llm_scheduler.PIPELINE: unlimited},
+            user_max={llm_scheduler.INTERACTIVE: unlimited, llm_scheduler.PIPELINE: unlimited},
+            paper_max=unlimited,
+        )
+    model = {"provider": "openai", "model": "gpt-4o-mini"}
+    messages = [{"role": "user", "content": "x"}]
+
+    def pipeline(paper: int) -> None:
+        async def go():
+            await asyncio.gather(*[llm_service.complete(model, messages) for _ in range(args.calls_per_paper)])
+        with metrics.tagged(paper_id=f"paper{paper}", user_id="instructor", stage="agent_reading"):
+            asyncio.run(go())
+
+    chat_latency: list = []
+    stop = threading.Event()
+
+    def student(i: int) -> None:
+        async def go():
+            while not stop.is_set():
+                started = time.perf_counter()
+                await llm_service.complete(model, messages)
+                chat_latency.append(time.perf_counter() - started)
+                await asyncio.sleep(args.think_ms / 1000)
+        with metrics.tagged(user_id=f"student{i}", stage="chat"):
+            asyncio.run(go())
+
+    students = [threading.Thread(target=student, args=(i,)) for i in range(args.students)]
+    for t in students:
+        t.start()
+    time.sleep(0.3)
+    baseline = list(chat_latency)
+    started = time.perf_counter()
+    uploads = [threading.Thread(target=pipeline, args=(p,)) for p in range(args.papers)]
+    for t in uploads:
+        t.start()
+    for t in uploads:
+        t.join()
+    upload_s = time.perf_counter() - started
+    stop.set()
+    for t in students:
+        t.join()
+    during = chat_latency[len(baseline):]
+    return {
+        "scheduler": scheduled,
+        "uploadSeconds": round(upload_s, 2),
+        "chatIdleP50Ms": round(statistics.median(baseline) * 1000, 1) if baseline else None,
+        "chatDuringUploadP50Ms": round(statistics.median(during) * 1000, 1),
+        "chatDuringUploadP99Ms": round(_pct(during, 0.99) * 1000, 1),
+        "providerPeakConcurrency": provider.peak,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=30)
+    parser.add_argument("--calls-per-paper", type=int, default=8)
+    parser.add_argument("--students", type=int, default=5)
+    parser.add_argument("--capacity", type=int, default=16, help="provider concurrency before slowdown")
+    parser.add_argument("--service-ms", type=float, default=200)
+    parser.add_argument("--think-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    from services import metrics
+    results = [run(args, scheduled=False), run(args, scheduled=True)]
+    waits = [l for l in metrics.render().splitlines() if l.startswith("coread_llm_queue_wait_seconds_sum")
+             or l.startswith("coread_llm_queue_wait_seconds_count")]
+    print(json.dumps({"runs": results, "queueWait (scheduled run)": waits}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
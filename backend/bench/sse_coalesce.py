@@ -0,0 +1,122 @@
+"""
+SSE token coalescing 비교 — 같은 token stream을 delta당 이벤트 (기존)와 services.sse_stream.coalesce로 전송.
+
+가짜 provider가 일정 간격 (± jitter)으로 2~6자 delta를 내보냄. chat.send_message와 같은 포맷으로
+`data: {"token": ...}` 이벤트를 만들어 이벤트 수 / 초당 이벤트 / wire bytes, 첫 이벤트 시각 (TTFT),
+token 도착 → 전송까지 추가 지연 (p50 / p99)을 잼.
+
+    cd backend
+    python -m bench.sse_coalesce                         # 2ms / 15ms / 60ms 간격 provider
+    python -m bench.sse_coalesce --gaps 1,5 --tokens 2000 --max-ms 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_WORDS = (
+    "the model attends to local structure and the proposed method improves recall on long documents "
+    "while keeping latency within budget"
+).split()
+
+
+def _tokens(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        word = rng.choice(_WORDS)
+        pieces = [word[i:i + rng.randint(2, 6)] for i in range(0, len(word), 4)] or [word]
+        pieces[0] = " " + pieces[0]
+        out.extend(pieces)
+        if rng.random() < 0.08:
+            out.append(".")
+    return out[:n]
+
+
+async def _provider(tokens: list[str], gap_s: float, arrivals: list, seed: int):
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    for token in tokens:
+        await asyncio.sleep(max(0.0, rng.gauss(gap_s, gap_s * 0.3)))
+        arrivals.append(loop.time())
+        yield token
+
+
+async def _run(tokens: list[str], gap_s: float, policy) -> dict:
+    from services import sse_stream
+
+    loop = asyncio.get_running_loop()
+    arrivals: list[float] = []
+    delays: list[float] = []
+    events = 0
+    wire = 0
+    text = []
+    started = loop.time()
+    first_event = None
+    sent_tokens = 0
+    async for chunk in sse_stream.coalesce(_provider(tokens, gap_s, arrivals, seed=1), policy):
+        if chunk is None:
+            frame = ": keep-alive\n\n"
+        else:
+            frame = f"data: {json.dumps({'token': chunk})}\n\n"
+            now = loop.time()
+            if first_event is None:
+                first_event = now - started
+            # 이번 이벤트에 포함된 token들의 도착 → 전송 지연
+            n = len(arrivals) - sent_tokens
+            delays.extend(now - t for t in arrivals[sent_tokens:sent_tokens + n])
+            sent_tokens += n
+            events += 1
+            text.append(chunk)
+        wire += len(frame.encode())
+    elapsed = loop.time() - started
+    assert "".join(text) == "".join(tokens)
+    delays.sort()
+    return {
+        "events": events,
+        "eventsPerSec": round(events / elapsed, 1),
+        "wireBytes": wire,
+        "ttftMs": round((first_event or 0) * 1000, 2),
+        "addedDelayP50Ms": round(statistics.median(delays) * 1000, 2),
+        "addedDelayP99Ms": round(delays[min(len(delays) - 1, int(0.99 * len(delays)))] * 1000, 2),
+        "elapsedS": round(elapsed, 2),
+    }
+
+
+async def main_async(args) -> dict:
+    from services import sse_stream
+
+    tokens = _tokens(args.tokens, seed=7)
+    policy = sse_stream.CoalescePolicy(max_ms=args.max_ms, max_bytes=args.max_bytes, heartbeat_s=60)
+    results = {}
+    for gap_ms in args.gaps:
+        gap_s = gap_ms / 1000
+        per_delta = await _run(tokens, gap_s, sse_stream.DISABLED)
+        coalesced = await _run(tokens, gap_s, policy)
+        results[f"gap={gap_ms:g}ms"] = {
+            "perDelta": per_delta,
+            "coalesced": coalesced,
+            "eventReduction": round(per_delta["events"] / max(1, coalesced["events"]), 1),
+            "wireReduction": round(per_delta["wireBytes"] / max(1, coalesced["wireBytes"]), 2),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gaps", type=lambda s: [float(x) for x in s.split(",")], default=[2, 15, 60],
+                        help="provider inter-token gaps (ms), comma separated")
+    parser.add_argument("--tokens", type=int, default=600)
+    parser.add_argument("--max-ms", type=float, default=60)
+    parser.add_argument("--max-bytes", type=int, default=512)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Firestore Bulk Writer — 여러 문서를 ≤500-op batch로 나눠 병렬 commit.
+
+- Firestore는 batch당 500 write 제한 → 넘으면 commit 자체가 실패함
+- batch는 bounded ThreadPoolExecutor에서 동시에 commit (FIRESTORE_WRITE_WORKERS, 기본 4)
+- transient 에러 (UNAVAILABLE / DEADLINE_EXCEEDED / ABORTED / RESOURCE_EXHAUSTED 등)는 batch 단위로
+  exponential backoff 재시도. 재시도 후에도 실패한 batch가 있으면 BulkWriteError
+- 처리량 (docs/s)을 로그와 /metrics로 보고
+
+db 인자는 google-cloud-firestore client 호환이면 됨 (emulator, db.fake_firestore.FakeFirestore 포함).
+"""
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from services import metrics
+from services.circuit_breaker import classify
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_OPS = 500
+_MAX_WORKERS = int(os.getenv("FIRESTORE_WRITE_WORKERS", "4"))
+_MAX_ATTEMPTS = 4
+_BACKOFF_BASE = 0.25          # 초 — 0.25, 0.5, 1.0 (+ jitter)
+
+_executor = ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="fs-bulk")
+
+_docs_written = metrics.Counter(
+    "coread_firestore_docs_written_total", "Documents written by the bulk writer", ("collection",),
+)
+_batch_retries = metrics.Counter(
+    "coread_firestore_batch_retries_total", "Bulk writer batch retries", ("collection",),
+)
+_batch_failures = metrics.Counter(
+    "coread_firestore_batch_failures_total", "Bulk writer batches that failed permanently", ("collection",),
+)
+_batch_seconds = metrics.Histogram(
+    "coread_firestore_batch_seconds", "Bulk writer batch commit time", ("collection",),
+)
+
+
+class BulkWriteError(Exception):
+    """재시도 후에도 실패한 batch가 있음. written = 성공한 문서 수."""
+
+    def __init__(self, message: str, written: int, errors: list):
+        super().__init__(message)
+        self.written = written
+        self.errors = errors
+
+
+def is_transient(e: BaseException) -> bool:
+    return classify(e) == "transient"
+
+
+def _commit_batch(db, ops: list, label: str) -> int:
+    """batch 1개 commit (transient 에러 재시도). ops = [(doc ref, data, merge)]. 성공한 문서 수 반환."""
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        started = time.perf_counter()
+        try:
+            batch = db.batch()
+            for ref, data, merge in ops:
+                batch.set(ref, data, merge=merge)
+            batch.commit()
+            _batch_seconds.observe(time.perf_counter() - started, label)
+            return len(ops)
+        except Exception as e:
+            if not is_transient(e) or attempt == _MAX_ATTEMPTS:
+                _batch_failures.inc(1, label)
+                raise
+            delay = _BACKOFF_BASE * (2 ** (attempt - 1)) * (1 + random.random() * 0.2)
+            _batch_retries.inc(1, label)
+            logger.warning(
+                f"[bulk_writer] {label}: batch of {len(ops)} failed ({type(e).__name__}), "
+                f"retry {attempt}/{_MAX_ATTEMPTS - 1} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+    return 0
+
+
+def write_documents(
+    db,
+    col,
+    docs: Iterable[dict],
+    key: str = "id",
+    label: str = "",
+    merge: bool = False,
+    doc_id: Optional[Callable[[dict], str]] = None,
+) -> int:
+    """
+    col 아래에 docs를 문서 id = doc[key] (또는 doc_id(doc))로 set.
+    ≤500-op batch로 나눠 병렬 commit. 쓴 문서 수 반환, 영구 실패 batch가 있으면 BulkWriteError.
+    """
+    ops = [(col.document(doc_id(d) if doc_id else d[key]), d, merge) for d in docs]
+    if not ops:
+        return 0
+    return write_refs(db, ops, label or getattr(col, "id", "") or "unknown")
+
+
+def write_refs(db, ops: list, label: str) -> int:
+    """
+    ops = [(doc ref, data, merge)] — 컬렉션이 섞여 있어도 됨 (여러 paper의 chunks를 한 batch로).
+    ≤500-op batch로 나눠 병렬 commit. 쓴 문서 수 반환, 영구 실패 batch가 있으면 BulkWriteError.
+    """
+    if not ops:
+        return 0
+    batches = [ops[i:i + MAX_BATCH_OPS] for i in range(0, len(ops), MAX_BATCH_OPS)]
+
+    started = time.perf_counter()
+    written, errors = 0, []
+    if len(batches) == 1:
+        try:
+            written = _commit_batch(db, batches[0], label)
+        except Exception as e:
+            errors.append(e)
+    else:
+        futures = [_executor.submit(_commit_batch, db, b, label) for b in batches]
+        for fut in futures:
+            try:
+                written += fut.result()
+            except Exception as e:
+                errors.append(e)
+    elapsed = time.perf_counter() - started
+
+    _docs_written.inc(written, label)
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    logger.info(
+        f"[bulk_writer] {label}: {written}/{len(ops)} docs in {len(batches)} batch(es), "
+        f"{elapsed:.2f}s ({rate:.0f} docs/s)"
+    )
+    if errors:
+        raise BulkWriteError(
+            f"{len(errors)}/{len(batches)} batch(es) failed for {label}: {errors[0]}",
+            written, errors,
+        )
+    return written
@@ -0,0 +1,290 @@
+"""
+Dedup Index — 업로드 중복 판정용 로컬 index (content hash / 페이지 텍스트 hash → paper_id).
+
+- exact: PDF SHA256 → paper_id. 앞단의 in-memory Bloom filter가 "확실히 없음"을 판정하면
+  SQLite 조회도, 원격 find_paper_by_hash (Firestore query)도 생략
+- near-duplicate: 페이지별 정규화 텍스트 hash 집합. 표지만 다르거나 워터마크/메타데이터만 바뀐 PDF는
+  바이트 hash는 달라도 본문 페이지 hash 대부분이 겹침 → 양방향 포함률 ≥ DEDUP_NEAR_THRESHOLD면 같은 논문
+- 저장: SQLite (DEDUP_DB_PATH, WAL). db.firestore.save_paper_meta가 contentHash / pageHashes를 쓸 때 갱신
+- 원격에 이미 있는 논문은 최초 1회 backfill (db.firestore가 papers 컬렉션을 읽어 넘김).
+  backfill이 끝나기 전에는 Bloom 음성이어도 원격 조회를 생략하지 않음
+
+Bloom filter는 프로세스별 — 같은 파일을 쓰는 다른 worker의 insert는 최대 _SYNC_INTERVAL 늦게 반영.
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Callable, Iterable, Optional, Union
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "dedup.sqlite3")
+_BLOOM_CAPACITY = int(os.getenv("DEDUP_BLOOM_CAPACITY", "1000000"))
+_BLOOM_ERROR_RATE = 0.001
+NEAR_THRESHOLD = float(os.getenv("DEDUP_NEAR_THRESHOLD", "0.8"))
+_MIN_PAGE_CHARS = 200        # 정규화 후 이보다 짧은 페이지 (표지, 빈 페이지, 그림만 있는 페이지)는 제외
+_MAX_PAGES = 500
+_SYNC_INTERVAL = 1.0         # 초 — 다른 worker가 추가한 hash를 Bloom filter로 가져오는 최소 간격
+
+_lookups = metrics.Counter(
+    "coread_dedup_lookups_total", "Dedup index lookups by outcome", ("result",),
+)
+
+
+# ──────────────────────────────────────────────
+# Bloom filter
+# ──────────────────────────────────────────────
+
+class BloomFilter:
+    """bytearray bit 배열 + double hashing (blake2b 128bit → h1 + i*h2)."""
+
+    def __init__(self, capacity: int, error_rate: float = _BLOOM_ERROR_RATE):
+        bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_bits = bits
+        self.num_hashes = max(1, round(bits / capacity * math.log(2)))
+        self._bits = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+# ──────────────────────────────────────────────
+# Text fingerprints
+# ──────────────────────────────────────────────
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """NFKC + 소문자 + 공백/구두점 제거 — 재조판, ligature, 줄바꿈 차이에 둔감하게."""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def text_fingerprints(pages: Iterable[str]) -> list:
+    """페이지 텍스트 목록 → 정규화 텍스트 hash 목록 (짧은 페이지 제외, 중복 제거, 순서 유지)."""
+    out = {}
+    for text in pages:
+        norm = normalize_text(text)
+        if len(norm) >= _MIN_PAGE_CHARS:
+            out[hashlib.blake2b(norm.encode(), digest_size=8).hexdigest()] = None
+    return list(out)
+
+
+def page_fingerprints(pdf: Union[bytes, str]) -> list:
+    """PDF 바이트 또는 파일 경로 → 페이지 fingerprint 목록. PyMuPDF가 없거나 파싱 실패면 빈 목록."""
+    try:
+        import fitz
+    except ImportError:
+        return []
+    try:
+        opened = fitz.open(pdf, filetype="pdf") if isinstance(pdf, str) else fitz.open(stream=pdf, filetype="pdf")
+        with opened as doc:
+            return text_fingerprints(doc[i].get_text() for i in range(min(len(doc), _MAX_PAGES)))
+    except Exception as e:
+        logger.warning(f"[dedup] text extraction failed: {e}")
+        return []
+
+
+# ──────────────────────────────────────────────
+# Index
+# ──────────────────────────────────────────────
+
+class DedupIndex:
+    def __init__(self, path: str = _DEFAULT_PATH, capacity: int = _BLOOM_CAPACITY):
+        self._path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity)
+        self._synced_rowid = 0
+        self._synced_at = 0.0
+        self._backfill_thread: Optional[threading.Thread] = None
+        self._complete = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS content_hashes ("
+            "  hash TEXT PRIMARY KEY, paper_id TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS page_hashes ("
+            "  hash TEXT NOT NULL, paper_id TEXT NOT NULL, PRIMARY KEY (hash, paper_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "  paper_id TEXT PRIMARY KEY, pages INTEGER NOT NULL) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._sync(force=True)
+        logger.info(f"[dedup] index at {path} ({self._bloom.count} hashes, bloom {self._bloom.nbytes // 1024}KB)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def _sync(self, force: bool = False) -> None:
+        """SQLite에 새로 추가된 content hash를 Bloom filter에 반영 (rowid 증가분만)."""
+        now = time.monotonic()
+        if not force and now - self._synced_at < _SYNC_INTERVAL:
+            return
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT rowid, hash FROM content_hashes WHERE rowid > ? ORDER BY rowid", (self._synced_rowid,)
+            ).fetchall()
+            for rowid, h in rows:
+                self._bloom.add(h)
+                self._synced_rowid = rowid
+            self._synced_at = now
+
+    # ── exact ──
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """content hash → paper_id. Bloom 음성이면 SQLite도 조회하지 않음."""
+        self._sync()
+        if content_hash not in self._bloom:
+            _lookups.inc(1, "bloom_negative")
+            return None
+        row = self._conn().execute(
+            "SELECT paper_id FROM content_hashes WHERE hash=?", (content_hash,)
+        ).fetchone()
+        _lookups.inc(1, "local_hit" if row else "bloom_false_positive")
+        return row[0] if row else None
+
+    @property
+    def complete(self) -> bool:
+        """원격 저장소의 기존 논문까지 backfill 됐는지 — True면 index에 없는 hash는 원격에도 없음."""
+        if not self._complete:   # 한 번 True가 되면 다시 조회하지 않음
+            row = self._conn().execute("SELECT value FROM meta WHERE key='backfilled_at'").fetchone()
+            self._complete = row is not None
+        return self._complete
+
+    # ── near-duplicate ──
+
+    def find_near_duplicate(self, page_hashes: list, threshold: float = NEAR_THRESHOLD) -> Optional[tuple]:
+        """
+        page fingerprint가 가장 많이 겹치는 paper → (paper_id, score).
+        score = min(겹침/새 문서 페이지 수, 겹침/기존 문서 페이지 수) — 한쪽이 다른 쪽의 일부인 경우 제외.
+        """
+        if not page_hashes:
+            return None
+        marks = ", ".join("?" * len(page_hashes))
+        rows = self._conn().execute(
+            f"SELECT h.paper_id, COUNT(*), p.pages FROM page_hashes h JOIN papers p USING (paper_id)"
+            f" WHERE h.hash IN ({marks}) GROUP BY h.paper_id ORDER BY COUNT(*) DESC LIMIT 5",
+            list(page_hashes),
+        ).fetchall()
+        best = None
+        for paper_id, shared, pages in rows:
+            score = min(shared / len(page_hashes), shared / max(pages, 1))
+            if score >= threshold and (best is None or score > best[1]):
+                best = (paper_id, round(score, 3))
+        _lookups.inc(1, "near_duplicate" if best else "near_miss")
+        return best
+
+    # ── writes ──
+
+    def record(self, paper_id: str, content_hash: Optional[str] = None, page_hashes: Optional[list] = None) -> None:
+        """paper의 hash 등록. content hash는 먼저 등록된 paper가 유지 (INSERT OR IGNORE)."""
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if content_hash:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO content_hashes (hash, paper_id) VALUES (?, ?)",
+                        (content_hash, paper_id),
+                    )
+                if page_hashes:
+                    conn.execute("DELETE FROM page_hashes WHERE paper_id=?", (paper_id,))
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO page_hashes (hash, paper_id) VALUES (?, ?)",
+                        [(h, paper_id) for h in page_hashes],
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO papers (paper_id, pages) VALUES (?, ?)",
+                        (paper_id, len(page_hashes)),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if content_hash:
+                self._bloom.add(content_hash)
+
+    def backfill(self, entries: Iterable[tuple]) -> int:
+        """(paper_id, content_hash, page_hashes) 반복자로 기존 논문 등록 후 complete 표시."""
+        count = 0
+        for paper_id, content_hash, page_hashes in entries:
+            if content_hash or page_hashes:
+                self.record(paper_id, content_hash, page_hashes)
+                count += 1
+        self._conn().execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled_at', ?)", (str(time.time()),)
+        )
+        self._sync(force=True)
+        return count
+
+    def start_backfill(self, source: Callable[[], Iterable[tuple]]) -> None:
+        """backfill을 background thread로 1회 시작 (실패하면 다음 호출 때 다시 시도)."""
+        with self._lock:
+            if self._backfill_thread is not None and self._backfill_thread.is_alive():
+                return
+
+            def run():
+                started = time.perf_counter()
+                try:
+                    count = self.backfill(source())
+                    logger.info(f"[dedup] backfilled {count} paper(s) in {time.perf_counter() - started:.1f}s")
+                except Exception as e:
+                    logger.warning(f"[dedup] backfill failed: {e}")
+
+            self._backfill_thread = threading.Thread(target=run, name="dedup-backfill", daemon=True)
+            self._backfill_thread.start()
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        return {
+            "contentHashes": conn.execute("SELECT COUNT(*) FROM content_hashes").fetchone()[0],
+            "papersWithPages": conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0],
+            "bloomBytes": self._bloom.nbytes,
+            "complete": self.complete,
+        }
+
+
+_index: Optional[DedupIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> DedupIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = DedupIndex(os.getenv("DEDUP_DB_PATH") or _DEFAULT_PATH)
+    return _index
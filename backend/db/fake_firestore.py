@@ -0,0 +1,178 @@
+"""
+In-memory Firestore stand-in — db.firestore가 쓰는 google-cloud-firestore API 부분 구현.
+
+collection / document / set(merge) / get / delete / stream / where / order_by / limit / batch.
+batch.commit()은 실제 Firestore처럼 500 op 초과 시 에러. 테스트/bench에서 장애 주입:
+    fake.fail_next(2, ServiceUnavailable("..."))   # 다음 commit 2회 실패
+
+실제 emulator로 돌리려면 FIRESTORE_EMULATOR_HOST 설정 (db.firestore._get_db 참고).
+"""
+import copy
+import threading
+import time
+from typing import Any, Optional
+
+_MAX_BATCH_OPS = 500
+
+
+class FakeServiceUnavailable(Exception):
+    """google.api_core.exceptions.ServiceUnavailable 대용 (이름으로 transient 판정됨)."""
+
+
+class FakeSnapshot:
+    def __init__(self, ref: "FakeDocument", data: Optional[dict]):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, client: "FakeFirestore", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._client, f"{self.path}/{name}")
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        self._client._write(self.path, data, merge)
+
+    def get(self) -> FakeSnapshot:
+        self._client._tick()
+        with self._client._lock:
+            return FakeSnapshot(self, copy.deepcopy(self._client._docs.get(self.path)))
+
+    def delete(self) -> None:
+        self._client._delete(self.path)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeFirestore", path: str, filters=(), order=None, limit=None):
+        self._client = client
+        self._path = path
+        self._filters = tuple(filters)
+        self._order = order
+        self._limit = limit
+
+    def where(self, field: str, op: str, value: Any) -> "FakeQuery":
+        if op != "==":
+            raise NotImplementedError(f"fake firestore supports only '==' (got {op!r})")
+        return FakeQuery(self._client, self._path, self._filters + ((field, value),), self._order, self._limit)
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeQuery":
+        return FakeQuery(self._client, self._path, self._filters, (field, direction), self._limit)
+
+    def limit(self, n: int) -> "FakeQuery":
+        return FakeQuery(self._client, self._path, self._filters, self._order, n)
+
+    def stream(self):
+        self._client._tick()
+        prefix = self._path + "/"
+        with self._client._lock:
+            rows = [
+                (path, copy.deepcopy(data)) for path, data in self._client._docs.items()
+                if path.startswith(prefix) and "/" not in path[len(prefix):]
+            ]
+        rows = [r for r in rows if all(r[1].get(f) == v for f, v in self._filters)]
+        if self._order is not None:
+            field, direction = self._order
+            rows = [r for r in rows if field in r[1]]   # Firestore: order_by 필드 없는 문서 제외
+            rows.sort(key=lambda r: r[1][field], reverse=str(direction).upper().startswith("DESC"))
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        for path, data in rows:
+            yield FakeSnapshot(FakeDocument(self._client, path), data)
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client: "FakeFirestore", path: str):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self._client, f"{self._path}/{doc_id}")
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestore"):
+        self._client = client
+        self._ops: list = []
+
+    def set(self, ref: FakeDocument, data: dict, merge: bool = False) -> None:
+        self._ops.append(("set", ref.path, data, merge))
+
+    def delete(self, ref: FakeDocument) -> None:
+        self._ops.append(("delete", ref.path, None, False))
+
+    def commit(self) -> list:
+        if len(self._ops) > _MAX_BATCH_OPS:
+            raise ValueError(f"maximum {_MAX_BATCH_OPS} writes allowed per request")
+        self._client._tick(commit=True)
+        with self._client._lock:
+            for kind, path, data, merge in self._ops:
+                if kind == "set":
+                    self._client._apply(path, data, merge)
+                else:
+                    self._client._docs.pop(path, None)
+            self._client.commits += 1
+        return [None] * len(self._ops)
+
+
+class FakeFirestore:
+    def __init__(self, latency: float = 0.0):
+        self._docs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._failures: list[Exception] = []
+        self.latency = latency        # 호출당 인위적 지연 (초) — bench용
+        self.commits = 0
+        self.calls = 0
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def get_all(self, refs):
+        self._tick()
+        with self._lock:
+            snaps = [FakeSnapshot(ref, copy.deepcopy(self._docs.get(ref.path))) for ref in refs]
+        yield from snaps
+
+    def fail_next(self, n: int, exc: Optional[Exception] = None) -> None:
+        """다음 n번의 commit / 단건 write를 exc로 실패시킴."""
+        with self._lock:
+            self._failures.extend([exc or FakeServiceUnavailable("injected failure")] * n)
+
+    # ── internals ──
+
+    def _tick(self, commit: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            failure = self._failures.pop(0) if commit and self._failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if failure is not None:
+            raise failure
+
+    def _write(self, path: str, data: dict, merge: bool) -> None:
+        self._tick(commit=True)
+        with self._lock:
+            self._apply(path, data, merge)
+
+    def _delete(self, path: str) -> None:
+        self._tick(commit=True)
+        with self._lock:
+            self._docs.pop(path, None)
+
+    def _apply(self, path: str, data: dict, merge: bool) -> None:
+        data = copy.deepcopy(data)
+        if merge and path in self._docs:
+            self._docs[path].update(data)
+        else:
+            self._docs[path] = data
@@ -7,30 +7,102 @@ Firebase Firestore 연결 + 청크/annotation 저장/조회.
     annotations/{annotationId}
     threads/{threadId}
 
-Firebase credentials 없거나 권한 에러가 나면 모든 작업을 no-op/빈값으로 처리 (in-memory only mode).
+Backend (DB_BACKEND 환경변수):
+  - "firestore" (기본): Firebase credentials / FIRESTORE_EMULATOR_HOST. credentials가 없으면 모든 작업을
+    no-op/빈값으로 처리 (in-memory only mode — 재시작하면 데이터 없음)
+  - "sqlite": 로컬 WAL 모드 SQLite 파일 (DB_SQLITE_PATH, db.sqlite_store) — on-prem / 테스트 배포용.
+    같은 client API를 구현하므로 아래 함수들이 그대로 동작
+런타임 에러는 circuit breaker (services.circuit_breaker)가 집계 — open 동안만 no-op/빈값, cooldown 후 자동 복구.
+FIRESTORE_EMULATOR_HOST가 설정돼 있으면 credentials 없이 emulator에 연결.
+여러 문서 쓰기는 db.bulk_writer (≤500-op batch, 병렬 commit, transient 에러 재시도).
+getter는 컬렉션별 read-through cache (BoundedCache)를 거치고, save_* 경로가 해당 key를 갱신/invalidate.
+FIRESTORE_LISTEN=1이면 캐시된 hot 문서에 on_snapshot listener를 붙여 다른 worker의 write도 반영.
+async handler는 *_async 함수 사용 (bounded executor, 캐시 hit은 즉시 반환).
+contentHash / pageHashes는 로컬 dedup index (db.dedup_index)에도 기록 — find_paper_by_hash는 index 먼저 조회.
 """
+import asyncio
+import functools
 import os
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from db import dedup_index
+from db.bulk_writer import BulkWriteError, is_transient, write_documents, write_refs
+from services.cache import BoundedCache
+from services.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
 _CRED_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "firebase-credentials.json")
 _db = None
 _firebase_available: Optional[bool] = None  # None = not checked yet
+_DESCENDING = "DESCENDING"                    # google.cloud.firestore.Query.DESCENDING
+_BACKEND = os.getenv("DB_BACKEND", "firestore").lower()
+
+_breaker = CircuitBreaker("firestore")
+_call = threading.local()   # 현재 thread의 호출 결과 추적 (_guarded) + raising() 여부
+
+
+class WriteFailed(RuntimeError):
+    """raising() 안에서 저장이 실제로 반영되지 않음 (breaker open / 호출 실패). cause는 원래 에러."""
+
+
+@contextmanager
+def raising():
+    """
+    이 블록 안의 save_*는 실패를 삼키지 않고 WriteFailed를 raise (breaker 기록 / 로그는 그대로).
+    write-behind worker용 — op를 spool에 남겨 두고 재시도하려면 실패를 알아야 함.
+    in-memory only mode (credentials 없음)는 실패가 아니므로 그대로 no-op.
+    """
+    outer = getattr(_call, "raising", False)
+    _call.raising = True
+    try:
+        yield
+    finally:
+        _call.raising = outer
+
+
+def _unavailable(reason: str) -> None:
+    if getattr(_call, "raising", False):
+        raise WriteFailed(f"firestore unavailable ({reason})")
 
 
 def _get_db():
+    """client 반환. credentials 없음 / breaker open이면 None."""
     global _db, _firebase_available
     if _firebase_available is False:
         return None
+    if not _breaker.allow():
+        _unavailable("circuit breaker open")
+        return None
     if _db is not None:
+        _call.attempted = True
         return _db
     try:
+        if _BACKEND == "sqlite":
+            from db.sqlite_store import DEFAULT_PATH, SQLiteDocumentStore
+            _db = SQLiteDocumentStore(os.getenv("DB_SQLITE_PATH") or DEFAULT_PATH)
+            _firebase_available = True
+            _call.attempted = True
+            return _db
+        if os.getenv("FIRESTORE_EMULATOR_HOST"):
+            from google.cloud import firestore as gcf
+            _db = gcf.Client(project=os.getenv("GOOGLE_CLOUD_PROJECT", "coread-local"))
+            _firebase_available = True
+            _call.attempted = True
+            logger.info(f"[firestore] connected to emulator at {os.getenv('FIRESTORE_EMULATOR_HOST')}")
+            return _db
         import firebase_admin
         from firebase_admin import credentials, firestore as fs
         if not os.path.exists(_CRED_PATH):
-            logger.warning("[firestore] credentials not found — running in-memory only mode")
+            logger.warning(
+                "[firestore] credentials not found — running in-memory only mode "
+                "(set DB_BACKEND=sqlite to persist locally)"
+            )
             _firebase_available = False
             return None
         if not firebase_admin._apps:
@@ -40,100 +112,332 @@ def _get_db():
             firebase_admin.initialize_app(cred, options)
         _db = fs.client()
         _firebase_available = True
+        _call.attempted = True
         logger.info("[firestore] connected")
         return _db
-    except Exception as e:
-        logger.warning(f"[firestore] init failed ({e}) — running in-memory only mode")
+    except ImportError as e:
+        logger.warning(f"[firestore] SDK not installed ({e}) — running in-memory only mode")
         _firebase_available = False
         return None
+    except Exception as e:
+        logger.warning(f"[firestore] init failed ({e}) — will retry after breaker cooldown")
+        _breaker.record_failure(e)
+        _unavailable(f"init failed: {e}")
+        return None
+
+
+def set_client(db) -> None:
+    """client 주입 (emulator / db.fake_firestore.FakeFirestore — 테스트·bench용)."""
+    global _db, _firebase_available
+    _db = db
+    _firebase_available = db is not None
+
+
+def _failed(e: Exception) -> None:
+    """Firestore 호출 실패를 breaker에 기록하고 경고 로그."""
+    _call.failed = True
+    kind = _breaker.record_failure(e)
+    logger.warning(f"[firestore] {kind} error: {type(e).__name__}: {e}")
+    if getattr(_call, "raising", False):
+        raise WriteFailed(f"{kind} error: {type(e).__name__}: {e}") from e
+
+
+def _bulk_failed(e: BulkWriteError) -> None:
+    """권한 등 permanent 에러가 섞였으면 그것을, 아니면 마지막 transient 에러를 breaker에 기록."""
+    permanent = [err for err in e.errors if not is_transient(err)]
+    logger.warning(f"[firestore] bulk write partially failed ({e.written} written): {e}")
+    _failed(permanent[0] if permanent else e.errors[-1])
+
+
+def _guarded(fn):
+    """public 함수 wrapper — 실제 호출이 있었고 _failed가 없었으면 breaker에 성공 기록."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        outer = (getattr(_call, "attempted", False), getattr(_call, "failed", False))
+        _call.attempted = _call.failed = False
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if _call.attempted and not _call.failed:
+                _breaker.record_success()
+            _call.attempted, _call.failed = outer
+    return wrapper
+
+
+def retry_after() -> float:
+    """breaker가 쓰기를 거절하는 동안 기다릴 초 — open / probe 진행 중인 half_open (write-behind가 op를 버리지 않고 대기하는 데 사용)."""
+    if _firebase_available is False:
+        return 0.0
+    return _breaker.retry_after()
+
+
+def breaker_state() -> dict:
+    state = _breaker.snapshot()
+    state["configured"] = _firebase_available is not False
+    state["backend"] = _BACKEND
+    return state
+
+
+# ──────────────────────────────────────────────
+# Read-through caches
+# ──────────────────────────────────────────────
+# 반환값은 캐시 객체의 얕은 복사본 — 원소 dict는 공유되므로 호출부에서 제자리 수정 금지.
+# meta / library는 다른 worker의 write를 놓칠 수 있어 TTL을 짧게, pipeline 산출물은 길게.
+
+_MB = 1024 * 1024
+_META_TTL = float(os.getenv("FIRESTORE_CACHE_TTL", "30"))
+_LISTEN = os.getenv("FIRESTORE_LISTEN", "0") == "1"
+_MAX_WATCHES = 256
+
+_paper_meta_cache = BoundedCache("firestore.paper_meta", max_entries=5000, ttl=_META_TTL)
+_user_paper_meta_cache = BoundedCache("firestore.user_paper_meta", max_entries=5000, ttl=_META_TTL)
+_user_papers_cache = BoundedCache("firestore.user_papers", max_entries=2000, max_bytes=32 * _MB, ttl=_META_TTL)
+_agents_cache = BoundedCache("firestore.agents", max_entries=2000, max_bytes=16 * _MB, ttl=600)
+_user_threads_cache = BoundedCache("firestore.user_threads", max_entries=2000, max_bytes=64 * _MB, ttl=600)
+_chunks_cache = BoundedCache("firestore.chunks", max_entries=128, max_bytes=128 * _MB, ttl=600)
+_chunk_cache = BoundedCache("firestore.chunk", max_entries=20_000, max_bytes=64 * _MB, ttl=3600)
+
+# "{cache}:{key}" → listener watch handle (오래된 것부터 unsubscribe)
+_watches: "OrderedDict[str, object]" = OrderedDict()
+_watches_lock = threading.Lock()
+
+
+def _watch(cache: BoundedCache, key: str, ref, to_value: Callable) -> None:
+    """FIRESTORE_LISTEN=1일 때 ref (문서 또는 query)의 변경을 cache에 반영."""
+    if not _LISTEN:
+        return
+    watch_key = f"{cache.name}:{key}"
+    with _watches_lock:
+        if watch_key in _watches:
+            _watches.move_to_end(watch_key)
+            return
+
+    def on_snapshot(snapshots, changes, read_time):
+        value = to_value(snapshots)
+        if value is None:
+            cache.pop(key)
+        else:
+            cache.set(key, value)
+
+    try:
+        handle = ref.on_snapshot(on_snapshot)
+    except Exception as e:
+        logger.debug(f"[firestore] on_snapshot unavailable for {watch_key}: {e}")
+        return
+    with _watches_lock:
+        _watches[watch_key] = handle
+        while len(_watches) > _MAX_WATCHES:
+            _, old = _watches.popitem(last=False)
+            try:
+                old.unsubscribe()
+            except Exception:
+                pass
+
 
+def _doc_value(snapshots) -> Optional[dict]:
+    snap = snapshots[-1] if snapshots else None
+    return snap.to_dict() if snap is not None and snap.exists else None
 
-def _disable(e: Exception) -> None:
-    """권한/네트워크 에러 시 Firestore를 비활성화하고 경고 로그."""
-    global _firebase_available
-    _firebase_available = False
-    logger.warning(f"[firestore] disabled due to error: {type(e).__name__}: {e}")
+
+def _library_value(snapshots) -> List[dict]:
+    return [{**snap.to_dict(), "paperId": snap.id} for snap in snapshots]
+
+
+def _get_all(db, refs: list) -> dict:
+    """여러 문서를 round-trip 1번으로 조회. doc id → dict (없는 문서 제외)."""
+    if not refs:
+        return {}
+    return {snap.id: snap.to_dict() for snap in db.get_all(refs) if snap.exists}
+
+
+def cache_stats() -> dict:
+    caches = (
+        _paper_meta_cache, _user_paper_meta_cache, _user_papers_cache,
+        _agents_cache, _user_threads_cache, _chunks_cache, _chunk_cache,
+    )
+    return {c.name: c.stats() for c in caches}
 
 
 # ──────────────────────────────────────────────
 # Chunks
 # ──────────────────────────────────────────────
 
+@_guarded
 def save_chunks(paper_id: str, chunks: List[dict]) -> None:
+    if not chunks:
+        return
     db = _get_db()
     if db is None:
         return
     try:
-        batch = db.batch()
         col = db.collection("papers").document(paper_id).collection("chunks")
-        for chunk in chunks:
-            batch.set(col.document(chunk["id"]), chunk)
-        batch.commit()
+        write_documents(db, col, chunks)
+        _chunks_cache.pop(paper_id)
         logger.info(f"[firestore] saved {len(chunks)} chunks for paper {paper_id}")
+    except BulkWriteError as e:
+        _bulk_failed(e)
     except Exception as e:
-        _disable(e)
+        _failed(e)
 
 
+@_guarded
+def save_chunks_many(chunks_by_paper: dict) -> None:
+    """여러 paper의 chunks를 한 번에 — 컬렉션이 달라도 같은 ≤500-op batch에 묶어 commit (bulk import용)."""
+    if not any(chunks_by_paper.values()):
+        return
+    db = _get_db()
+    if db is None:
+        return
+    ops = [
+        (db.collection("papers").document(paper_id).collection("chunks").document(c["id"]), c, False)
+        for paper_id, chunks in chunks_by_paper.items()
+        for c in chunks
+    ]
+    try:
+        write_refs(db, ops, "chunks")
+        logger.info(f"[firestore] saved {len(ops)} chunks for {len(chunks_by_paper)} paper(s)")
+    except BulkWriteError as e:
+        _bulk_failed(e)
+    except Exception as e:
+        _failed(e)
+    finally:
+        for paper_id in chunks_by_paper:
+            _chunks_cache.pop(paper_id)
+
+
+@_guarded
 def get_chunks(paper_id: str) -> List[dict]:
+    cached = _chunks_cache.get(paper_id)
+    if cached is not None:
+        return list(cached)
     db = _get_db()
     if db is None:
         return []
     try:
         docs = db.collection("papers").document(paper_id).collection("chunks").stream()
-        return [doc.to_dict() for doc in docs]
+        chunks = [doc.to_dict() for doc in docs]
+        if chunks:
+            _chunks_cache.set(paper_id, chunks)
+        return list(chunks)
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return []
 
 
+@_guarded
 def get_chunk(paper_id: str, chunk_id: str) -> Optional[dict]:
+    return get_chunks_by_ids(paper_id, [chunk_id]).get(chunk_id)
+
+
+@_guarded
+def get_chunks_by_ids(paper_id: str, chunk_ids: Iterable[str]) -> dict:
+    """chunk id 목록 → {chunk_id: chunk}. 캐시에 없는 것만 get_all 1번으로 조회."""
+    found, missing = {}, []
+    for chunk_id in dict.fromkeys(chunk_ids):
+        cached = _chunk_cache.get(f"{paper_id}/{chunk_id}")
+        if cached is not None:
+            found[chunk_id] = cached
+        else:
+            missing.append(chunk_id)
+    if not missing:
+        return found
     db = _get_db()
     if db is None:
-        return None
+        return found
     try:
-        doc = db.collection("papers").document(paper_id).collection("chunks").document(chunk_id).get()
-        return doc.to_dict() if doc.exists else None
+        col = db.collection("papers").document(paper_id).collection("chunks")
+        fetched = _get_all(db, [col.document(cid) for cid in missing])
     except Exception as e:
-        _disable(e)
-        return None
+        _failed(e)
+        return found
+    for chunk_id, chunk in fetched.items():
+        _chunk_cache.set(f"{paper_id}/{chunk_id}", chunk)   # chunk는 생성 후 불변
+    found.update(fetched)
+    return found
 
 
 # ──────────────────────────────────────────────
 # Paper metadata
 # ──────────────────────────────────────────────
 
+@_guarded
 def save_paper_meta(paper_id: str, data: dict) -> None:
+    if data.get("contentHash") or data.get("pageHashes"):
+        # Firestore 사용 불가여도 로컬 dedup은 동작하도록 먼저 기록
+        dedup_index.get_index().record(paper_id, data.get("contentHash"), data.get("pageHashes"))
+    if not data:
+        return
     db = _get_db()
     if db is None:
         return
     try:
         db.collection("papers").document(paper_id).set(data, merge=True)
+        cached = _paper_meta_cache.get(paper_id)
+        if cached is not None:
+            _paper_meta_cache.set(paper_id, {**cached, **data})
     except Exception as e:
-        _disable(e)
+        _paper_meta_cache.pop(paper_id)
+        _failed(e)
 
 
+@_guarded
 def get_paper_meta(paper_id: str) -> Optional[dict]:
+    cached = _paper_meta_cache.get(paper_id)
+    if cached is not None:
+        return dict(cached)
     db = _get_db()
     if db is None:
         return None
     try:
-        doc = db.collection("papers").document(paper_id).get()
-        return doc.to_dict() if doc.exists else None
+        ref = db.collection("papers").document(paper_id)
+        doc = ref.get()
+        if not doc.exists:
+            return None
+        meta = doc.to_dict()
+        _paper_meta_cache.set(paper_id, meta)
+        _watch(_paper_meta_cache, paper_id, ref, _doc_value)
+        return dict(meta)
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return None
 
 
+@_guarded
+def get_paper_metas(paper_ids: Iterable[str]) -> dict:
+    """여러 paper 메타를 한 번에 조회 (캐시 miss만 get_all). paper_id → meta, 없는 paper 제외."""
+    found, missing = {}, []
+    for paper_id in dict.fromkeys(paper_ids):
+        cached = _paper_meta_cache.get(paper_id)
+        if cached is not None:
+            found[paper_id] = dict(cached)
+        else:
+            missing.append(paper_id)
+    if not missing:
+        return found
+    db = _get_db()
+    if db is None:
+        return found
+    try:
+        fetched = _get_all(db, [db.collection("papers").document(pid) for pid in missing])
+    except Exception as e:
+        _failed(e)
+        return found
+    for paper_id, meta in fetched.items():
+        _paper_meta_cache.set(paper_id, meta)
+        found[paper_id] = dict(meta)
+    return found
+
+
+@_guarded
 def get_papers_by_user(user_id: str) -> List[dict]:
     db = _get_db()
     if db is None:
         return []
     try:
-        from google.cloud import firestore as fs_module
         docs = (
             db.collection("papers")
             .where("userId", "==", user_id)
-            .order_by("uploadedAt", direction=fs_module.Query.DESCENDING)
+            .order_by("uploadedAt", direction=_DESCENDING)
             .stream()
         )
         result = []
@@ -143,7 +447,7 @@ def get_papers_by_user(user_id: str) -> List[dict]:
             result.append(d)
         return result
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return []
 
 
@@ -151,21 +455,24 @@ def get_papers_by_user(user_id: str) -> List[dict]:
 # Threads
 # ──────────────────────────────────────────────
 
+@_guarded
 def save_threads(paper_id: str, threads: List[dict]) -> None:
+    if not threads:
+        return
     db = _get_db()
-    if db is None or not threads:
+    if db is None:
         return
     try:
-        batch = db.batch()
         col = db.collection("papers").document(paper_id).collection("threads")
-        for thread in threads:
-            batch.set(col.document(thread["id"]), thread)
-        batch.commit()
+        write_documents(db, col, threads)
         logger.info(f"[firestore] saved {len(threads)} threads for paper {paper_id}")
+    except BulkWriteError as e:
+        _bulk_failed(e)
     except Exception as e:
-        _disable(e)
+        _failed(e)
 
 
+@_guarded
 def get_threads_by_paper(paper_id: str) -> List[dict]:
     db = _get_db()
     if db is None:
@@ -174,7 +481,7 @@ def get_threads_by_paper(paper_id: str) -> List[dict]:
         docs = db.collection("papers").document(paper_id).collection("threads").stream()
         return [doc.to_dict() for doc in docs]
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return []
 
 
@@ -182,30 +489,40 @@ def get_threads_by_paper(paper_id: str) -> List[dict]:
 # Dynamic Agents
 # ──────────────────────────────────────────────
 
+@_guarded
 def save_agents(paper_id: str, agents: List[dict]) -> None:
+    if not agents:
+        return
     db = _get_db()
-    if db is None or not agents:
+    if db is None:
         return
     try:
-        batch = db.batch()
         col = db.collection("papers").document(paper_id).collection("agents")
-        for agent in agents:
-            batch.set(col.document(agent["id"]), agent)
-        batch.commit()
+        write_documents(db, col, agents)
+        _agents_cache.pop(paper_id)
         logger.info(f"[firestore] saved {len(agents)} agents for paper {paper_id}")
+    except BulkWriteError as e:
+        _bulk_failed(e)
     except Exception as e:
-        _disable(e)
+        _failed(e)
 
 
+@_guarded
 def get_agents_by_paper(paper_id: str) -> List[dict]:
+    cached = _agents_cache.get(paper_id)
+    if cached is not None:
+        return list(cached)
     db = _get_db()
     if db is None:
         return []
     try:
         docs = db.collection("papers").document(paper_id).collection("agents").stream()
-        return [doc.to_dict() for doc in docs]
+        agents = [doc.to_dict() for doc in docs]
+        if agents:   # 비어 있으면 pipeline 진행 중일 수 있음 — 캐시 안 함
+            _agents_cache.set(paper_id, agents)
+        return list(agents)
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return []
 
 
@@ -213,105 +530,163 @@ def get_agents_by_paper(paper_id: str) -> List[dict]:
 # Agent Annotations
 # ──────────────────────────────────────────────
 
+@_guarded
 def save_annotations(paper_id: str, annotations: List[dict]) -> None:
+    if not annotations:
+        return
     db = _get_db()
-    if db is None or not annotations:
+    if db is None:
         return
     try:
-        batch = db.batch()
         col = db.collection("papers").document(paper_id).collection("agent_annotations")
-        for ann in annotations:
-            batch.set(col.document(ann["id"]), ann)
-        batch.commit()
+        write_documents(db, col, annotations)
         logger.info(f"[firestore] saved {len(annotations)} annotations for paper {paper_id}")
+    except BulkWriteError as e:
+        _bulk_failed(e)
     except Exception as e:
-        _disable(e)
+        _failed(e)
 
 
 # ──────────────────────────────────────────────
 # User-centric (hybrid schema)
 # ──────────────────────────────────────────────
 
+@_guarded
 def find_paper_by_hash(content_hash: str) -> Optional[str]:
-    """SHA256 해시로 기존 논문 조회. 있으면 paperId 반환, 없으면 None."""
+    """
+    SHA256 해시로 기존 논문 조회. 있으면 paperId 반환, 없으면 None.
+    로컬 dedup index 먼저 — backfill이 끝난 뒤에는 index (Bloom filter)에 없으면 원격 query 생략.
+    """
+    index = dedup_index.get_index()
+    paper_id = index.get(content_hash)
+    if paper_id is not None:
+        return paper_id
+    if index.complete:
+        return None
     db = _get_db()
     if db is None:
         return None
+    index.start_backfill(_dedup_entries)
     try:
         docs = db.collection("papers").where("contentHash", "==", content_hash).limit(1).stream()
         for doc in docs:
+            index.record(doc.id, content_hash)
             return doc.id
         return None
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return None
 
 
+@_guarded
+def _dedup_entries() -> list:
+    """dedup index backfill용: papers 컬렉션의 (paperId, contentHash, pageHashes)."""
+    db = _get_db()
+    if db is None:
+        raise RuntimeError("firestore unavailable")
+    try:
+        return [
+            (doc.id, d.get("contentHash"), d.get("pageHashes"))
+            for doc in db.collection("papers").stream()
+            for d in (doc.to_dict() or {},)
+        ]
+    except Exception as e:
+        _failed(e)
+        raise
+
+
+@_guarded
 def save_user_paper_meta(user_id: str, paper_id: str, data: dict) -> None:
+    if not data:
+        return
     db = _get_db()
     if db is None:
         return
+    key = f"{user_id}/{paper_id}"
     try:
         db.collection("users").document(user_id).collection("papers").document(paper_id).set(data, merge=True)
+        cached = _user_paper_meta_cache.get(key)
+        if cached is not None:
+            _user_paper_meta_cache.set(key, {**cached, **data})
     except Exception as e:
-        _disable(e)
+        _user_paper_meta_cache.pop(key)
+        _failed(e)
+    finally:
+        _user_papers_cache.pop(user_id)   # library 목록 순서/내용이 바뀔 수 있음
 
 
+@_guarded
 def get_user_paper_meta(user_id: str, paper_id: str) -> Optional[dict]:
+    key = f"{user_id}/{paper_id}"
+    cached = _user_paper_meta_cache.get(key)
+    if cached is not None:
+        return dict(cached)
     db = _get_db()
     if db is None:
         return None
     try:
         doc = db.collection("users").document(user_id).collection("papers").document(paper_id).get()
-        return doc.to_dict() if doc.exists else None
+        if not doc.exists:
+            return None
+        meta = doc.to_dict()
+        _user_paper_meta_cache.set(key, meta)
+        return dict(meta)
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return None
 
 
+@_guarded
 def get_papers_by_user_v2(user_id: str) -> List[dict]:
     """users/{userId}/papers 서브컬렉션 조회. composite index 불필요."""
+    cached = _user_papers_cache.get(user_id)
+    if cached is not None:
+        return [dict(d) for d in cached]
     db = _get_db()
     if db is None:
         return []
     try:
-        from google.cloud import firestore as fs_module
-        docs = (
+        query = (
             db.collection("users").document(user_id).collection("papers")
-            .order_by("uploadedAt", direction=fs_module.Query.DESCENDING)
-            .stream()
+            .order_by("uploadedAt", direction=_DESCENDING)
         )
-        result = []
-        for doc in docs:
-            d = doc.to_dict()
-            d["paperId"] = doc.id
-            result.append(d)
-        return result
+        result = _library_value(list(query.stream()))
+        _user_papers_cache.set(user_id, result)
+        _watch(_user_papers_cache, user_id, query, _library_value)
+        return [dict(d) for d in result]
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return []
 
 
+@_guarded
 def save_user_threads(user_id: str, paper_id: str, threads: List[dict]) -> None:
+    if not threads:
+        return
     db = _get_db()
-    if db is None or not threads:
+    if db is None:
         return
     try:
-        batch = db.batch()
         col = (
             db.collection("users").document(user_id)
             .collection("papers").document(paper_id)
             .collection("threads")
         )
-        for thread in threads:
-            batch.set(col.document(thread["id"]), thread)
-        batch.commit()
+        write_documents(db, col, threads)
+        _user_threads_cache.pop(f"{user_id}/{paper_id}")
         logger.info(f"[firestore] saved {len(threads)} threads for user={user_id} paper={paper_id}")
+    except BulkWriteError as e:
+        _bulk_failed(e)
     except Exception as e:
-        _disable(e)
+        _failed(e)
 
 
+@_guarded
 def get_user_threads(user_id: str, paper_id: str) -> List[dict]:
+    key = f"{user_id}/{paper_id}"
+    cached = _user_threads_cache.get(key)
+    if cached is not None:
+        return list(cached)
     db = _get_db()
     if db is None:
         return []
@@ -322,7 +697,106 @@ def get_user_threads(user_id: str, paper_id: str) -> List[dict]:
             .collection("threads")
             .stream()
         )
-        return [doc.to_dict() for doc in docs]
+        threads = [doc.to_dict() for doc in docs]
+        if threads:
+            _user_threads_cache.set(key, threads)
+        return list(threads)
     except Exception as e:
-        _disable(e)
+        _failed(e)
         return []
+
+
+# ──────────────────────────────────────────────
+# Warm-up
+# ──────────────────────────────────────────────
+
+def prefetch_paper(paper_id: str) -> dict:
+    """
+    paper의 meta / agents / chunks를 read-through cache에 올림 (services.warmup용).
+    chunk는 chat의 rect 조회 (get_chunks_by_ids)가 바로 hit하도록 id별 캐시에도 넣음.
+    """
+    meta = get_paper_meta(paper_id)
+    agents = get_agents_by_paper(paper_id)
+    chunks = get_chunks(paper_id)
+    for chunk in chunks:
+        chunk_id = chunk.get("id")
+        if chunk_id:
+            _chunk_cache.set(f"{paper_id}/{chunk_id}", chunk)
+    return {"meta": meta is not None, "agents": len(agents), "chunks": len(chunks)}
+
+
+# ──────────────────────────────────────────────
+# Async API (request handler용)
+# ──────────────────────────────────────────────
+# firebase_admin client는 동기 — event loop를 막지 않도록 bounded executor에서 실행.
+# 캐시 hit은 thread hop 없이 바로 반환.
+
+_IO_WORKERS = int(os.getenv("FIRESTORE_IO_WORKERS", "16"))
+_io_executor = ThreadPoolExecutor(max_workers=_IO_WORKERS, thread_name_prefix="fs-io")
+
+
+async def _in_executor(fn: Callable, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(fn, *args))
+
+
+async def get_paper_meta_async(paper_id: str) -> Optional[dict]:
+    cached = _paper_meta_cache.get(paper_id)
+    if cached is not None:
+        return dict(cached)
+    return await _in_executor(get_paper_meta, paper_id)
+
+
+async def get_paper_metas_async(paper_ids: Iterable[str]) -> dict:
+    return await _in_executor(get_paper_metas, list(paper_ids))
+
+
+async def get_user_paper_meta_async(user_id: str, paper_id: str) -> Optional[dict]:
+    cached = _user_paper_meta_cache.get(f"{user_id}/{paper_id}")
+    if cached is not None:
+        return dict(cached)
+    return await _in_executor(get_user_paper_meta, user_id, paper_id)
+
+
+async def get_papers_by_user_v2_async(user_id: str) -> List[dict]:
+    cached = _user_papers_cache.get(user_id)
+    if cached is not None:
+        return [dict(d) for d in cached]
+    return await _in_executor(get_papers_by_user_v2, user_id)
+
+
+async def get_agents_by_paper_async(paper_id: str) -> List[dict]:
+    cached = _agents_cache.get(paper_id)
+    if cached is not None:
+        return list(cached)
+    return await _in_executor(get_agents_by_paper, paper_id)
+
+
+async def get_user_threads_async(user_id: str, paper_id: str) -> List[dict]:
+    cached = _user_threads_cache.get(f"{user_id}/{paper_id}")
+    if cached is not None:
+        return list(cached)
+    return await _in_executor(get_user_threads, user_id, paper_id)
+
+
+async def get_chunks_async(paper_id: str) -> List[dict]:
+    cached = _chunks_cache.get(paper_id)
+    if cached is not None:
+        return list(cached)
+    return await _in_executor(get_chunks, paper_id)
+
+
+async def get_chunks_by_ids_async(paper_id: str, chunk_ids: Iterable[str]) -> dict:
+    return await _in_executor(get_chunks_by_ids, paper_id, list(chunk_ids))
+
+
+async def find_paper_by_hash_async(content_hash: str) -> Optional[str]:
+    return await _in_executor(find_paper_by_hash, content_hash)
+
+
+async def save_paper_meta_async(paper_id: str, data: dict) -> None:
+    await _in_executor(save_paper_meta, paper_id, data)
+
+
+async def save_user_paper_meta_async(user_id: str, paper_id: str, data: dict) -> None:
+    await _in_executor(save_user_paper_meta, user_id, paper_id, data)
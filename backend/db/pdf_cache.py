@@ -0,0 +1,267 @@
+"""
+PDF Disk Cache — Storage의 PDF를 로컬 디스크에 LRU로 보관해 FileResponse (Range / sendfile)로 서빙.
+
+- {PDF_CACHE_DIR}/{paperId}.pdf, 총 크기 PDF_CACHE_MB 초과 시 오래 안 쓴 파일부터 삭제
+- 시작 시 디렉터리를 스캔해 index 복원 (mtime = 마지막 사용 시각, hit 때 갱신)
+- 같은 디렉터리를 쓰는 다른 worker가 채운 파일도 lookup에서 발견하면 index에 편입
+- miss 채우기는 paper별 single-flight:
+    tee()             — Storage chunk를 client에 보내면서 .part 파일에 기록, 끝까지 받으면 rename
+    fill_background() — Range 요청 miss: 요청 구간은 Storage에서 바로 보내고 전체 파일은 thread에서 채움
+  중간에 끊기면 .part 삭제 (불완전한 파일은 캐시에 안 들어감). 시작 스캔은 오래된 .part만 정리
+  (같은 디렉터리를 쓰는 다른 worker가 쓰고 있는 .part는 mtime이 계속 갱신됨)
+- 업로드 직후 첫 열람도 hit이 되도록 adopt()로 spool 파일을 hard link
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "pdf_cache")
+_TOUCH_INTERVAL = 60.0     # 초 — hit 때 mtime 갱신 최소 간격 (매 Range 요청마다 utime 안 함)
+_STALE_PART = float(os.getenv("PDF_CACHE_STALE_PART_S", "3600"))   # 이보다 오래 안 쓰인 .part는 버려진 것으로 간주
+
+
+class PdfCache:
+    def __init__(self, directory: str = _DEFAULT_DIR, max_bytes: int = 2048 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()   # paper_id → size (오래된 것 먼저)
+        self._touched: dict[str, float] = {}
+        self._bytes = 0
+        self._filling: set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, paper_id: str) -> str:
+        return os.path.join(self.directory, f"{paper_id}.pdf")
+
+    def _scan(self) -> None:
+        files = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue        # 다른 worker가 방금 commit / evict
+            if name.endswith(".part"):
+                if now - st.st_mtime > _STALE_PART:
+                    _remove(path)   # 죽은 프로세스가 채우다 만 파일
+            elif name.endswith(".pdf"):
+                files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, paper_id, size in sorted(files):
+            self._entries[paper_id] = size
+            self._bytes += size
+        self._evict()
+        if files:
+            logger.info(f"[pdf_cache] {len(self._entries)} file(s), {self._bytes / 1e6:.0f}MB in {self.directory}")
+
+    # ── lookup ──
+
+    def lookup(self, paper_id: str) -> Optional[str]:
+        """캐시된 파일 경로 (hit) 또는 None (miss)."""
+        path = self._path(paper_id)
+        with self._lock:
+            known = paper_id in self._entries
+            if known:
+                self._entries.move_to_end(paper_id)
+        if not known:
+            try:
+                size = os.path.getsize(path)   # 다른 worker가 채운 파일
+            except OSError:
+                with self._lock:
+                    self.misses += 1
+                return None
+            self._add(paper_id, size)
+        elif not os.path.exists(path):         # 다른 worker가 evict
+            self._discard(paper_id)
+            with self._lock:
+                self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            self.hits += 1
+            touch = now - self._touched.get(paper_id, 0.0) >= _TOUCH_INTERVAL
+            if touch:
+                self._touched[paper_id] = now
+        if touch:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    # ── fill ──
+
+    def _begin(self, paper_id: str) -> bool:
+        with self._lock:
+            if paper_id in self._filling:
+                return False
+            self._filling.add(paper_id)
+            return True
+
+    def _end(self, paper_id: str) -> None:
+        with self._lock:
+            self._filling.discard(paper_id)
+
+    def tee(self, paper_id: str, chunks: Iterable[bytes], expected_size: Optional[int] = None) -> Iterator[bytes]:
+        """chunks를 그대로 yield하면서 캐시 파일로 기록. 다른 요청이 채우는 중이면 기록 없이 통과."""
+        if not self._begin(paper_id):
+            yield from chunks
+            return
+        part = os.path.join(self.directory, f"{paper_id}.{uuid.uuid4().hex}.part")
+        written = 0
+        complete = False
+        try:
+            with open(part, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+            complete = expected_size is None or written == expected_size
+        finally:
+            if complete:
+                self._commit(paper_id, part, written)
+            else:
+                _remove(part)
+            self._end(paper_id)
+
+    def fill(self, paper_id: str, source: Callable[[], Iterable[bytes]]) -> bool:
+        """호출 thread에서 전체 파일을 채움. 이미 채우는 중이거나 실패하면 False."""
+        if not self._begin(paper_id):
+            return False
+        return self._fill(paper_id, source)
+
+    def fill_background(self, paper_id: str, source: Callable[[], Iterable[bytes]]) -> bool:
+        """전체 파일을 background thread에서 채움. 이미 채우는 중이면 False."""
+        if not self._begin(paper_id):
+            return False
+        threading.Thread(
+            target=self._fill, args=(paper_id, source), name=f"pdf-fill-{paper_id[:8]}", daemon=True,
+        ).start()
+        return True
+
+    def _fill(self, paper_id: str, source: Callable[[], Iterable[bytes]]) -> bool:
+        """_begin() 이후 호출. source()의 chunk를 .part에 쓰고 완료되면 commit."""
+        part = os.path.join(self.directory, f"{paper_id}.{uuid.uuid4().hex}.part")
+        try:
+            written = 0
+            with open(part, "wb") as f:
+                for chunk in source():
+                    f.write(chunk)
+                    written += len(chunk)
+            self._commit(paper_id, part, written)
+            return True
+        except Exception as e:
+            logger.warning(f"[pdf_cache] fill failed for {paper_id}: {e}")
+            _remove(part)
+            return False
+        finally:
+            self._end(paper_id)
+
+    def adopt(self, paper_id: str, path: str) -> bool:
+        """이미 로컬에 있는 PDF (업로드 spool 등)를 hard link로 캐시에 등록. 다른 filesystem이면 False."""
+        part = os.path.join(self.directory, f"{paper_id}.{uuid.uuid4().hex}.part")
+        try:
+            os.link(path, part)
+        except OSError:
+            return False
+        self._commit(paper_id, part, os.path.getsize(part))
+        return True
+
+    def _commit(self, paper_id: str, part: str, size: int) -> None:
+        os.replace(part, self._path(paper_id))
+        self._add(paper_id, size)
+        logger.info(f"[pdf_cache] cached {paper_id} ({size / 1e6:.1f}MB)")
+
+    # ── bookkeeping ──
+
+    def _add(self, paper_id: str, size: int) -> None:
+        with self._lock:
+            old = self._entries.pop(paper_id, None)
+            if old is not None:
+                self._bytes -= old
+            self._entries[paper_id] = size
+            self._bytes += size
+            self._touched[paper_id] = time.time()
+        self._evict()
+
+    def _discard(self, paper_id: str) -> None:
+        with self._lock:
+            size = self._entries.pop(paper_id, None)
+            if size is not None:
+                self._bytes -= size
+            self._touched.pop(paper_id, None)
+
+    def _evict(self) -> None:
+        victims = []
+        with self._lock:
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                paper_id, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                self._touched.pop(paper_id, None)
+                self.evictions += 1
+                victims.append(paper_id)
+        for paper_id in victims:
+            _remove(self._path(paper_id))   # 이미 열린 응답은 unlink 후에도 끝까지 읽힘
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_cache: Optional[PdfCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> PdfCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PdfCache(
+                    os.getenv("PDF_CACHE_DIR") or _DEFAULT_DIR,
+                    int(os.getenv("PDF_CACHE_MB", "2048")) * 1024 * 1024,
+                )
+    return _cache
+
+
+def _collect() -> list[str]:
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    lines = []
+    for key in ("hits", "misses", "evictions"):
+        name = f"coread_pdf_cache_{key}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {stats[key]}"]
+    for key in ("entries", "bytes"):
+        name = f"coread_pdf_cache_{key}"
+        lines += [f"# TYPE {name} gauge", f"{name} {stats[key]}"]
+    return lines
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,262 @@
+"""
+SQLite document store — Firestore 없이 db.firestore를 그대로 쓰기 위한 embedded backend.
+
+db.firestore / db.bulk_writer가 쓰는 google-cloud-firestore client API 부분
+(collection / document / set(merge) / get / delete / stream / where / order_by / limit / batch / get_all)을
+SQLite 파일 1개 위에 구현. DB_BACKEND=sqlite면 db.firestore가 이 client를 사용 → 캐시 / circuit breaker /
+bulk writer / write-behind 경로는 Firestore와 동일.
+
+저장 형식: docs(path, parent, data) — path = "papers/{id}/chunks/{chunkId}", parent = 상위 컬렉션 경로,
+data = JSON. where / order_by 필드는 json_extract 식으로 조회하고, 자주 쓰는 조회는 expression index:
+  - papers.contentHash          → find_paper_by_hash
+  - users/{uid}/papers.uploadedAt → get_papers_by_user_v2 (정렬까지 index로)
+  - papers.userId + uploadedAt  → get_papers_by_user (legacy)
+index 식과 query 식이 글자 그대로 같아야 SQLite가 index를 씀 → 둘 다 _field_expr()로 생성.
+모든 index 끝에 path를 붙여 동률 정렬 (path)까지 index 순서로 처리 (temp B-tree 정렬 없음).
+
+WAL 모드 + thread별 connection. 같은 노드의 여러 uvicorn worker가 파일을 공유할 수 있음.
+JSON으로 저장하므로 datetime 값은 ISO 문자열로 돌아옴. on_snapshot은 지원하지 않음 (FIRESTORE_LISTEN 무시).
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "coread.sqlite3")
+_MAX_BATCH_OPS = 500
+_MAX_PARAMS = 500            # get_all의 IN (...) 한 번에 보낼 path 수
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# (index 이름, indexed field 목록)
+_INDEXES = (
+    ("docs_content_hash", ("contentHash",)),
+    ("docs_uploaded_at", ("uploadedAt",)),
+    ("docs_user_uploaded_at", ("userId", "uploadedAt")),
+)
+
+
+def _field_expr(field: str) -> str:
+    if not _FIELD_RE.match(field):
+        raise ValueError(f"unsupported field name: {field!r}")
+    return f"json_extract(data, '$.{field}')"
+
+
+def _json_default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    to_dicts = getattr(obj, "to_dicts", None)
+    if to_dicts is not None:
+        return to_dicts()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, default=_json_default)
+
+
+def _merge(base: dict, patch: dict) -> dict:
+    """Firestore set(merge=True)처럼 nested map은 재귀적으로 합침."""
+    out = dict(base)
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = _merge(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+def _parent(path: str) -> str:
+    return path.rsplit("/", 1)[0]
+
+
+class SQLiteSnapshot:
+    def __init__(self, ref: "SQLiteDocument", raw: Optional[str]):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = raw is not None
+        self._raw = raw
+
+    def to_dict(self) -> Optional[dict]:
+        return json.loads(self._raw) if self._raw is not None else None
+
+
+class SQLiteDocument:
+    def __init__(self, client: "SQLiteDocumentStore", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "SQLiteCollection":
+        return SQLiteCollection(self._client, f"{self.path}/{name}")
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        self._client._commit([("set", self.path, data, merge)])
+
+    def get(self) -> SQLiteSnapshot:
+        row = self._client._conn().execute("SELECT data FROM docs WHERE path=?", (self.path,)).fetchone()
+        return SQLiteSnapshot(self, row[0] if row else None)
+
+    def delete(self) -> None:
+        self._client._commit([("delete", self.path, None, False)])
+
+
+class SQLiteQuery:
+    def __init__(self, client: "SQLiteDocumentStore", path: str, filters=(), order=None, limit=None):
+        self._client = client
+        self._path = path
+        self._filters = tuple(filters)
+        self._order = order
+        self._limit = limit
+
+    def where(self, field: str, op: str, value: Any) -> "SQLiteQuery":
+        if op != "==":
+            raise NotImplementedError(f"sqlite store supports only '==' (got {op!r})")
+        _field_expr(field)   # 필드 이름 검증
+        return SQLiteQuery(self._client, self._path, self._filters + ((field, value),), self._order, self._limit)
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "SQLiteQuery":
+        _field_expr(field)
+        return SQLiteQuery(self._client, self._path, self._filters, (field, direction), self._limit)
+
+    def limit(self, n: int) -> "SQLiteQuery":
+        return SQLiteQuery(self._client, self._path, self._filters, self._order, n)
+
+    def _sql(self) -> tuple[str, list]:
+        clauses, params = ["parent = ?"], [self._path]
+        for field, value in self._filters:
+            if isinstance(value, (dict, list)):
+                clauses.append(f"{_field_expr(field)} = json(?)")
+                params.append(_dumps(value))
+            else:
+                clauses.append(f"{_field_expr(field)} = ?")
+                params.append(int(value) if isinstance(value, bool) else value)
+        if self._order is not None:
+            field, direction = self._order
+            desc = "DESC" if str(direction).upper().startswith("DESC") else "ASC"
+            # Firestore: order_by 필드가 없는 문서는 결과에서 제외
+            clauses.append(f"{_field_expr(field)} IS NOT NULL")
+            order = f"ORDER BY {_field_expr(field)} {desc}, path {desc}"
+        else:
+            order = "ORDER BY path"   # Firestore 기본 순서 (document id)
+        sql = f"SELECT path, data FROM docs WHERE {' AND '.join(clauses)} {order}"
+        if self._limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(self._limit))
+        return sql, params
+
+    def stream(self):
+        sql, params = self._sql()
+        rows = self._client._conn().execute(sql, params).fetchall()
+        for path, raw in rows:
+            yield SQLiteSnapshot(SQLiteDocument(self._client, path), raw)
+
+    def explain(self) -> list:
+        """EXPLAIN QUERY PLAN 결과 (index 사용 여부 확인용)."""
+        sql, params = self._sql()
+        return [row[-1] for row in self._client._conn().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+class SQLiteCollection(SQLiteQuery):
+    def __init__(self, client: "SQLiteDocumentStore", path: str):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, doc_id: str) -> SQLiteDocument:
+        return SQLiteDocument(self._client, f"{self._path}/{doc_id}")
+
+
+class SQLiteWriteBatch:
+    def __init__(self, client: "SQLiteDocumentStore"):
+        self._client = client
+        self._ops: list = []
+
+    def set(self, ref: SQLiteDocument, data: dict, merge: bool = False) -> None:
+        self._ops.append(("set", ref.path, data, merge))
+
+    def delete(self, ref: SQLiteDocument) -> None:
+        self._ops.append(("delete", ref.path, None, False))
+
+    def commit(self) -> list:
+        if len(self._ops) > _MAX_BATCH_OPS:
+            raise ValueError(f"maximum {_MAX_BATCH_OPS} writes allowed per request")
+        self._client._commit(self._ops)
+        return [None] * len(self._ops)
+
+
+class SQLiteDocumentStore:
+    """WAL 모드 SQLite 위의 Firestore 호환 client. thread마다 connection 1개."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)   # thread별 connection → ":memory:" 불가
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " path TEXT PRIMARY KEY, parent TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS docs_parent ON docs (parent, path)")
+        for name, fields in _INDEXES:
+            exprs = ", ".join(_field_expr(f) for f in fields)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON docs (parent, {exprs}, path)")
+        logger.info(f"[sqlite_store] document store at {path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    # ── client API ──
+
+    def collection(self, name: str) -> SQLiteCollection:
+        return SQLiteCollection(self, name)
+
+    def batch(self) -> SQLiteWriteBatch:
+        return SQLiteWriteBatch(self)
+
+    def get_all(self, refs: Iterable[SQLiteDocument]):
+        refs = list(refs)
+        conn = self._conn()
+        found: dict[str, str] = {}
+        for i in range(0, len(refs), _MAX_PARAMS):
+            paths = [r.path for r in refs[i:i + _MAX_PARAMS]]
+            marks = ", ".join("?" * len(paths))
+            found.update(conn.execute(f"SELECT path, data FROM docs WHERE path IN ({marks})", paths))
+        for ref in refs:
+            yield SQLiteSnapshot(ref, found.get(ref.path))
+
+    # ── internals ──
+
+    def _commit(self, ops: list) -> None:
+        """ops를 transaction 1개로 적용 (batch는 all-or-nothing)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for kind, path, data, merge in ops:
+                if kind == "delete":
+                    conn.execute("DELETE FROM docs WHERE path=?", (path,))
+                    continue
+                if merge:
+                    row = conn.execute("SELECT data FROM docs WHERE path=?", (path,)).fetchone()
+                    if row is not None:
+                        data = _merge(json.loads(row[0]), data)
+                conn.execute(
+                    "INSERT INTO docs (path, parent, data) VALUES (?, ?, ?)"
+                    " ON CONFLICT(path) DO UPDATE SET data=excluded.data",
+                    (path, _parent(path), _dumps(data)),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
@@ -3,20 +3,29 @@ Firebase Storage — PDF 업로드/다운로드.
 
 Firebase app은 firestore.py의 _get_db()가 먼저 호출되어 초기화된 상태를 가정.
 Storage bucket 이름은 FIREBASE_STORAGE_BUCKET 환경변수에서 읽음.
+bucket 설정이 없으면 영구 비활성, 런타임 에러는 circuit breaker가 집계 (cooldown 후 자동 복구).
 """
 import os
 import logging
+from typing import Iterator, Optional
+
+from services.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
 _bucket = None
-_available: bool | None = None  # None = not checked yet
+_available: bool | None = None  # None = not checked yet, False = 설정 없음
+_breaker = CircuitBreaker("storage")
+_UPLOAD_CHUNK = 8 * 1024 * 1024   # resumable upload chunk (256KB 배수여야 함)
+_DOWNLOAD_CHUNK = 1024 * 1024     # ranged download 1회 크기
 
 
 def _get_bucket():
     global _bucket, _available
     if _available is False:
         return None
+    if not _breaker.allow():
+        return None
     if _bucket is not None:
         return _bucket
     try:
@@ -42,14 +51,29 @@ def _get_bucket():
         _available = True
         logger.info(f"[storage] connected to bucket: {bucket_name}")
         return _bucket
-    except Exception as e:
-        logger.warning(f"[storage] init failed ({e}) — storage disabled")
+    except ImportError as e:
+        logger.warning(f"[storage] SDK not installed ({e}) — storage disabled")
         _available = False
         return None
+    except Exception as e:
+        logger.warning(f"[storage] init failed ({e}) — will retry after breaker cooldown")
+        _breaker.record_failure(e)
+        return None
 
 
 def is_available() -> bool:
-    return _get_bucket() is not None
+    """설정돼 있고 breaker가 호출을 받아 줄 상태면 True (probe 슬롯은 쓰지 않음)."""
+    if _available is False:
+        return False
+    if _bucket is None:
+        return _get_bucket() is not None
+    return _breaker.retry_after() == 0
+
+
+def breaker_state() -> dict:
+    state = _breaker.snapshot()
+    state["configured"] = _available is not False
+    return state
 
 
 def upload_pdf(paper_id: str, contents: bytes) -> str | None:
@@ -61,8 +85,31 @@ def upload_pdf(paper_id: str, contents: bytes) -> str | None:
         blob = bucket.blob(f"papers/{paper_id}.pdf")
         blob.upload_from_string(contents, content_type="application/pdf")
         logger.info(f"[storage] uploaded papers/{paper_id}.pdf")
+        _breaker.record_success()
         return f"gs://{bucket.name}/papers/{paper_id}.pdf"
     except Exception as e:
+        _breaker.record_failure(e)
+        logger.warning(f"[storage] upload failed for {paper_id}: {e}")
+        return None
+
+
+def upload_pdf_file(paper_id: str, path: str) -> str | None:
+    """
+    로컬 PDF 파일을 Storage에 업로드 (파일 전체를 메모리에 올리지 않음).
+    blob.chunk_size를 지정하면 resumable upload로 _UPLOAD_CHUNK 단위 전송. 실패 시 None.
+    """
+    bucket = _get_bucket()
+    if bucket is None:
+        return None
+    try:
+        blob = bucket.blob(f"papers/{paper_id}.pdf")
+        blob.chunk_size = _UPLOAD_CHUNK
+        blob.upload_from_filename(path, content_type="application/pdf")
+        logger.info(f"[storage] uploaded papers/{paper_id}.pdf ({os.path.getsize(path)} bytes, streamed)")
+        _breaker.record_success()
+        return f"gs://{bucket.name}/papers/{paper_id}.pdf"
+    except Exception as e:
+        _breaker.record_failure(e)
         logger.warning(f"[storage] upload failed for {paper_id}: {e}")
         return None
 
@@ -76,7 +123,56 @@ def download_pdf(paper_id: str) -> bytes | None:
         blob = bucket.blob(f"papers/{paper_id}.pdf")
         data = blob.download_as_bytes()
         logger.info(f"[storage] downloaded papers/{paper_id}.pdf ({len(data)} bytes)")
+        _breaker.record_success()
         return data
     except Exception as e:
+        _breaker.record_failure(e)
         logger.warning(f"[storage] download failed for {paper_id}: {e}")
         return None
+
+
+def pdf_size(paper_id: str) -> int | None:
+    """Storage의 PDF 크기 (metadata 조회만). 없거나 실패하면 None."""
+    bucket = _get_bucket()
+    if bucket is None:
+        return None
+    try:
+        blob = bucket.get_blob(f"papers/{paper_id}.pdf")
+        _breaker.record_success()
+        return None if blob is None else blob.size
+    except Exception as e:
+        _breaker.record_failure(e)
+        logger.warning(f"[storage] metadata lookup failed for {paper_id}: {e}")
+        return None
+
+
+def iter_pdf(
+    paper_id: str, start: int = 0, end: Optional[int] = None, chunk_size: int = _DOWNLOAD_CHUNK,
+) -> Iterator[bytes]:
+    """
+    PDF의 [start, end] (inclusive) 구간을 chunk_size씩 ranged download로 yield.
+    end=None이면 파일 끝까지. 중간 실패는 예외로 전파 (호출부가 응답/캐시 기록을 중단).
+    """
+    bucket = _get_bucket()
+    if bucket is None:
+        raise RuntimeError("storage unavailable")
+    blob = bucket.blob(f"papers/{paper_id}.pdf")
+    if end is None:
+        size = pdf_size(paper_id)
+        if size is None:
+            raise FileNotFoundError(f"papers/{paper_id}.pdf")
+        end = size - 1
+    offset = start
+    while offset <= end:
+        stop = min(offset + chunk_size, end + 1)
+        try:
+            data = blob.download_as_bytes(start=offset, end=stop - 1)
+        except Exception as e:
+            _breaker.record_failure(e)
+            logger.warning(f"[storage] ranged download failed for {paper_id} at {offset}: {e}")
+            raise
+        _breaker.record_success()
+        if not data:
+            break
+        yield data
+        offset += len(data)
@@ -6,23 +6,51 @@ Chroma 벡터 스토어 래퍼.
 """
 import os
 import logging
-from typing import List, Optional
+import threading
+from typing import TYPE_CHECKING, List, Optional
 
-import chromadb
+if TYPE_CHECKING:
+    import chromadb
 
 logger = logging.getLogger(__name__)
 
 _DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "chroma_db")
-_client: Optional[chromadb.PersistentClient] = None
+_client: Optional["chromadb.PersistentClient"] = None
+_client_lock = threading.Lock()
+_embedder = None
 
 
-def _get_client() -> chromadb.PersistentClient:
+def _get_client() -> "chromadb.PersistentClient":
+    # chromadb import (~0.6s)는 첫 사용 시점으로 미룸 — main.py cold start에서 제외
     global _client
     if _client is None:
-        _client = chromadb.PersistentClient(path=_DB_PATH)
+        with _client_lock:
+            if _client is None:
+                import chromadb
+                _client = chromadb.PersistentClient(path=_DB_PATH)
     return _client
 
 
+def _embed(documents: List[str]) -> list:
+    """collection 기본 embedding function과 같은 모델 (all-MiniLM-L6-v2) — 여러 paper 문서를 한 번에 임베딩."""
+    global _embedder
+    if _embedder is None:
+        with _client_lock:
+            if _embedder is None:
+                from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                _embedder = DefaultEmbeddingFunction()
+    return _embedder(documents)
+
+
+def _metadata(c: dict) -> dict:
+    return {
+        "section": c.get("section", ""),
+        "pageStart": c.get("pageStart", 1),
+        "pageEnd": c.get("pageEnd", 1),
+        "position": c.get("position", 0.0),
+    }
+
+
 def _collection(paper_id: str):
     return _get_client().get_or_create_collection(
         name=f"paper_{paper_id.replace('-', '_')}",
@@ -42,19 +70,32 @@ def add_chunks(paper_id: str, chunks: List[dict]) -> None:
     col.upsert(
         ids=[c["id"] for c in chunks],
         documents=[c["content"] for c in chunks],
-        metadatas=[
-            {
-                "section": c.get("section", ""),
-                "pageStart": c.get("pageStart", 1),
-                "pageEnd": c.get("pageEnd", 1),
-                "position": c.get("position", 0.0),
-            }
-            for c in chunks
-        ],
+        metadatas=[_metadata(c) for c in chunks],
     )
     logger.info(f"[vector_store] upserted {len(chunks)} chunks for paper {paper_id}")
 
 
+def add_chunks_many(chunks_by_paper: dict) -> None:
+    """
+    여러 paper의 chunk를 저장 (bulk import). 임베딩은 전체 문서를 모아 1번 계산하고
+    (ONNX batch 추론 — paper별 upsert마다 모델을 돌리는 것보다 빠름) paper별 collection에 embeddings와 함께 upsert.
+    """
+    items = [(paper_id, chunks) for paper_id, chunks in chunks_by_paper.items() if chunks]
+    if not items:
+        return
+    embeddings = _embed([c["content"] for _, chunks in items for c in chunks])
+    offset = 0
+    for paper_id, chunks in items:
+        _collection(paper_id).upsert(
+            ids=[c["id"] for c in chunks],
+            documents=[c["content"] for c in chunks],
+            embeddings=embeddings[offset:offset + len(chunks)],
+            metadatas=[_metadata(c) for c in chunks],
+        )
+        offset += len(chunks)
+    logger.info(f"[vector_store] upserted {offset} chunks for {len(items)} paper(s)")
+
+
 def query(paper_id: str, text: str, n_results: int = 5) -> List[dict]:
     """
     텍스트 쿼리 → 관련 chunk 반환.
@@ -88,6 +129,21 @@ def query(paper_id: str, text: str, n_results: int = 5) -> List[dict]:
     ]
 
 
+def warm(paper_id: str) -> int:
+    """
+    collection을 열고 query 1번 실행 — HNSW segment와 임베딩 모델을 메모리에 올림 (services.warmup용).
+    collection이 없으면 만들지 않고 0 반환. chunk 수 반환.
+    """
+    try:
+        col = _get_client().get_collection(f"paper_{paper_id.replace('-', '_')}")
+    except Exception:
+        return 0
+    count = col.count()
+    if count:
+        col.query(query_texts=["warm-up"], n_results=1)
+    return count
+
+
 def delete_paper(paper_id: str) -> None:
     try:
         _get_client().delete_collection(f"paper_{paper_id.replace('-', '_')}")
@@ -0,0 +1,432 @@
+"""
+Write-behind Queue — pipeline의 Firestore 저장을 백그라운드로 미룸.
+
+pipeline은 save_* 호출 즉시 다음 단계로 진행하고, worker thread가 실제 db.firestore 함수를 실행.
+
+- 문서(key)별 순서 보장: 같은 key의 op는 enqueue 순서대로 하나씩 실행, 다른 key끼리는 병렬
+- coalescing: 아직 실행 전인 같은 문서의 merge write (save_paper_meta / save_user_paper_meta)는 하나로 합침
+- durable spool: op를 append-only JSONL 파일에 기록 → 재시작 시 완료 표시 없는 op를 다시 실행
+  (write + flush만 하고 fsync는 하지 않음 — 프로세스 crash는 견디고 전원 장애는 보장 안 함).
+  spool은 프로세스마다 1개 (WRITE_BEHIND_SPOOL_DIR/wb-{pid}-{id}.spool, 살아 있는 동안 flock).
+  시작할 때 lock이 풀린 (= 주인이 죽은) spool만 rename으로 claim해서 replay → 여러 uvicorn worker가
+  같은 디렉터리를 써도 남의 대기 op를 중복 실행하거나 지우지 않음
+- Firestore circuit breaker가 open이면 worker는 op를 버리지 않고 cooldown이 끝날 때까지 대기
+- 실패한 op (transient / 권한 에러, breaker open으로 실행 못 함)는 spool과 lane 맨 앞에 그대로 두고
+  backoff 후 재시도 — 같은 key의 뒤 op는 그동안 대기. 호출 자체가 잘못된 op (InvalidArgument 등)만 버림
+- flush(*prefixes): 지금까지 enqueue된 해당 key의 op가 모두 저장될 때까지 대기 (status "ready" 전 barrier).
+  버려진 op가 있으면 False
+
+WRITE_BEHIND=0이면 모든 op를 호출 thread에서 즉시 실행 (기존 동작).
+"""
+import atexit
+import fcntl
+import glob
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_ENABLED = os.getenv("WRITE_BEHIND", "1") != "0"
+_WORKERS = int(os.getenv("WRITE_BEHIND_WORKERS", "2"))
+_RETRY_BASE = float(os.getenv("WRITE_BEHIND_RETRY_BASE_S", "0.5"))
+_RETRY_MAX = float(os.getenv("WRITE_BEHIND_RETRY_MAX_S", "60"))
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+_DEFAULT_SPOOL_DIR = os.getenv("WRITE_BEHIND_SPOOL_DIR") or os.path.join(_DATA_DIR, "write_behind")
+_LEGACY_SPOOL = os.path.join(_DATA_DIR, "write_behind.spool")   # 프로세스 공용 spool 시절 파일 — 있으면 claim
+
+# 같은 문서의 연속 merge write를 합칠 수 있는 op (마지막 인자가 merge할 dict)
+_COALESCIBLE = {"save_paper_meta", "save_user_paper_meta"}
+
+
+class _Op:
+    __slots__ = ("seq", "name", "args", "key", "attempts")
+
+    def __init__(self, seq: int, name: str, args: list, key: str):
+        self.seq = seq
+        self.name = name
+        self.args = args
+        self.key = key
+        self.attempts = 0
+
+    def record(self) -> dict:
+        return {"seq": self.seq, "op": self.name, "args": self.args, "key": self.key}
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        spool_dir: Optional[str] = _DEFAULT_SPOOL_DIR,
+        workers: int = _WORKERS,
+        executor=None,
+        retry_base: float = _RETRY_BASE,
+        retry_max: float = _RETRY_MAX,
+    ):
+        self._spool_dir = spool_dir
+        self._spool_path: Optional[str] = None
+        self._workers = workers
+        # op 이름 → 실제 실행 함수 (기본: db.firestore의 같은 이름 함수). 저장 안 됐으면 raise해야 함
+        self._executor = executor or _firestore_op
+        self._retry_base = retry_base
+        self._retry_max = retry_max
+        self._lanes: dict[str, deque] = {}        # key → 대기 중 op (순서대로)
+        self._ready: deque = deque()              # 실행 가능한 key (busy 아님)
+        self._busy: set[str] = set()              # worker가 실행 중인 key
+        self._pending: dict[int, str] = {}        # seq → key (대기 + 실행 중 + 재시도 대기)
+        self._delayed: list = []                  # heap (재시도 시각, key) — key는 그동안 busy 유지
+        self._dropped: deque = deque(maxlen=1000) # 버려진 op (seq, key) — flush 결과에 반영
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._spool = None
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    # ── public ──
+
+    def start(self) -> None:
+        """spool replay 후 worker 시작. 첫 submit 때 자동 호출됨."""
+        with self._cond:
+            if self._threads:
+                return
+            replay, claimed = self._open_spool()
+            for i in range(self._workers):
+                t = threading.Thread(target=self._worker, name=f"write-behind-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        for rec in replay:
+            self.submit(rec["op"], rec["args"], rec["key"])
+        if replay:
+            logger.warning(f"[write_behind] replaying {len(replay)} unfinished op(s) from {len(claimed)} orphaned spool(s)")
+        # 내 spool에 다시 기록된 뒤에 삭제 — 그 전에 죽으면 다음 프로세스가 claim된 파일을 다시 가져감
+        for path, f in claimed:
+            _remove(path)
+            f.close()
+
+    def submit(self, name: str, args: list, key: str) -> int:
+        if not self._threads:
+            self.start()
+        with self._cond:
+            lane = self._lanes.get(key)
+            if name in _COALESCIBLE and lane:
+                last = lane[-1]
+                if last.name == name and last.args[:-1] == list(args[:-1]):
+                    last.args[-1] = {**last.args[-1], **args[-1]}
+                    self.coalesced += 1
+                    self._append(last.record())   # 같은 seq 재기록 — replay 시 마지막 기록 사용
+                    return last.seq
+            self._seq += 1
+            op = _Op(self._seq, name, list(args), key)
+            self._pending[op.seq] = key
+            self._append(op.record())
+            if lane is None:
+                lane = self._lanes[key] = deque()
+            lane.append(op)
+            if key not in self._busy and len(lane) == 1:
+                self._ready.append(key)
+            self._cond.notify()
+            return op.seq
+
+    def flush(self, *prefixes: str, timeout: Optional[float] = 30.0) -> bool:
+        """
+        지금까지 enqueue된 op 중 key가 prefixes로 시작하는 것 (없으면 전부)이 저장될 때까지 대기.
+        timeout 안에 모두 저장되면 True — 재시도 중인 op는 저장될 때까지 기다리고, 버려진 op가 있으면 False.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            mark = self._seq
+
+            def matches(seq: int, key: str) -> bool:
+                return seq <= mark and (not prefixes or key.startswith(prefixes))
+
+            while any(matches(seq, key) for seq, key in self._pending.items()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logger.warning(f"[write_behind] flush timed out ({len(self._pending)} op(s) pending)")
+                    return False
+                self._cond.wait(remaining)
+            return not any(matches(seq, key) for seq, key in self._dropped)
+
+    def has_pending(self, key: str) -> bool:
+        """key의 op가 대기 / 실행 / 재시도 중이면 True."""
+        with self._cond:
+            return key in self._lanes
+
+    def dropped(self, *prefixes: str) -> bool:
+        """key가 prefixes로 시작하는 op 중 버려진 것이 있으면 True (flush 실패가 timeout인지 구분용)."""
+        with self._cond:
+            return any(not prefixes or key.startswith(prefixes) for _, key in self._dropped)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "completed": self.completed,
+                "failed": self.failed,
+                "retried": self.retried,
+                "coalesced": self.coalesced,
+            }
+
+    # ── worker ──
+
+    def _next_ready(self) -> str:
+        """lock held. 실행할 key — 재시도 시각이 된 key를 ready로 옮기면서 대기."""
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                self._ready.append(heapq.heappop(self._delayed)[1])
+            if self._ready:
+                return self._ready.popleft()
+            self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                key = self._next_ready()
+                op = self._lanes[key].popleft()
+                self._busy.add(key)
+            try:
+                self._executor(op.name, op.args)
+                error = None
+            except Exception as e:
+                error = e
+            with self._cond:
+                lane = self._lanes[key]
+                if error is not None and _retryable(error):
+                    # lane 맨 앞으로 되돌림 — 같은 문서의 뒤 op보다 먼저 실행돼야 함. key는 busy 유지
+                    op.attempts += 1
+                    delay = min(self._retry_max, self._retry_base * 2 ** (op.attempts - 1))
+                    lane.appendleft(op)
+                    heapq.heappush(self._delayed, (time.monotonic() + delay, key))
+                    self.retried += 1
+                    logger.warning(
+                        f"[write_behind] {op.name} for {op.key} failed (attempt {op.attempts}), "
+                        f"retrying in {delay:.1f}s: {error}"
+                    )
+                    self._cond.notify_all()
+                    continue
+                self._busy.discard(key)
+                if lane:
+                    self._ready.append(key)
+                else:
+                    del self._lanes[key]
+                del self._pending[op.seq]
+                if error is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                    self._dropped.append((op.seq, key))
+                    logger.error(f"[write_behind] {op.name} for {op.key} dropped: {error}", exc_info=error)
+                self._append({"done": op.seq})
+                if not self._pending:
+                    self._truncate_spool()
+                self._cond.notify_all()
+
+    # ── spool (lock held) ──
+
+    def _open_spool(self) -> tuple[list, list]:
+        """주인 없는 spool을 claim해서 (replay할 op, [(claim된 경로, lock 잡은 file)]) 반환하고 내 spool을 염."""
+        if not self._spool_dir:
+            return [], []
+        os.makedirs(self._spool_dir, exist_ok=True)
+        replay: list = []
+        claimed: list = []
+        legacy = [_LEGACY_SPOOL] if self._spool_dir == _DEFAULT_SPOOL_DIR else []
+        for path in [*legacy, *sorted(glob.glob(os.path.join(self._spool_dir, "*.spool")))]:
+            got = _claim_spool(path, self._spool_dir)
+            if got is not None:
+                records, claimed_path, f = got
+                replay += records
+                claimed.append((claimed_path, f))
+        # lock을 잡은 뒤에 *.spool 이름으로 — 동시에 시작한 다른 worker가 lock 전의 새 파일을 claim하지 않도록
+        name = f"wb-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        tmp = os.path.join(self._spool_dir, f"{name}.tmp")
+        self._spool = open(tmp, "w", encoding="utf-8")
+        fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX)
+        self._spool_path = os.path.join(self._spool_dir, f"{name}.spool")
+        os.replace(tmp, self._spool_path)
+        return replay, claimed
+
+    def _append(self, record: dict) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._spool.write(json.dumps(record, default=_to_json) + "\n")
+            self._spool.flush()
+        except (TypeError, ValueError, OSError) as e:
+            logger.warning(f"[write_behind] spool write failed: {e}")
+
+    def _truncate_spool(self) -> None:
+        if self._spool is not None:
+            self._spool.seek(0)
+            self._spool.truncate()
+
+
+def _claim_spool(path: str, spool_dir: str):
+    """
+    다른 프로세스가 lock을 잡고 있지 않은 spool을 rename으로 가져옴 → (미완료 op, claim된 경로, lock 잡은 file).
+    살아 있는 worker의 spool / 이미 다른 프로세스가 가져간 파일이면 None.
+    """
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        claimed_path = os.path.join(spool_dir, f"claimed-{uuid.uuid4().hex[:8]}.spool")
+        os.rename(path, claimed_path)    # lock을 기다리는 사이 다른 프로세스가 먼저 가져갔으면 FileNotFoundError
+    except (BlockingIOError, FileNotFoundError):
+        f.close()
+        return None
+    records: dict[int, dict] = {}
+    for line in f:
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue   # crash 중 잘린 마지막 줄
+        if "done" in rec:
+            records.pop(rec["done"], None)
+        else:
+            records[rec["seq"]] = rec
+    return [records[seq] for seq in sorted(records)], claimed_path, f
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _to_json(obj):
+    to_dicts = getattr(obj, "to_dicts", None)
+    if to_dicts is None:
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+    return to_dicts()
+
+
+def _retryable(e: Exception) -> bool:
+    """저장 안 된 op를 다시 시도할지 — 의존성 문제 (breaker open / transient / 권한)면 재시도, 호출 자체 문제면 버림."""
+    from db.firestore import WriteFailed
+    from services.circuit_breaker import classify
+
+    if isinstance(e, WriteFailed):
+        return e.__cause__ is None or classify(e.__cause__) != "other"
+    return classify(e) != "other"
+
+
+def _wait_writable(firestore) -> None:
+    # breaker open이면 op를 버리지 않고 probe 시점까지 대기 (대기 중에도 spool에 남아 있음)
+    delay = firestore.retry_after()
+    while delay > 0:
+        time.sleep(min(delay, 5.0))
+        delay = firestore.retry_after()
+
+
+def _firestore_op(name: str, args: list) -> None:
+    """worker용 — 저장이 실제로 반영되지 않았으면 WriteFailed를 raise (worker가 재시도)."""
+    from db import firestore
+    _wait_writable(firestore)
+    with firestore.raising():
+        getattr(firestore, name)(*args)
+
+
+queue = WriteBehindQueue()
+
+
+def _submit(name: str, key: str, *args) -> None:
+    if _ENABLED:
+        queue.submit(name, list(args), key)
+    else:
+        from db import firestore
+        _wait_writable(firestore)
+        getattr(firestore, name)(*args)
+
+
+def _save_now(name: str, key: str, *args) -> None:
+    """
+    호출 thread에서 바로 저장 — 응답 직후의 조회 / 다른 노드의 hash 조회가 바로 보도록 (upload 시점 메타용).
+    breaker가 쓰기를 받지 않거나 저장이 실패하면, 또는 같은 문서의 op가 아직 queue에 있으면 (순서 보장)
+    write-behind로 넘김.
+    """
+    from db import firestore
+    if not _ENABLED:
+        getattr(firestore, name)(*args)
+        return
+    if not queue.has_pending(key) and firestore.retry_after() == 0:
+        try:
+            with firestore.raising():
+                getattr(firestore, name)(*args)
+            return
+        except firestore.WriteFailed as e:
+            logger.warning(f"[write_behind] direct {name} for {key} failed ({e}) — queueing")
+    queue.submit(name, list(args), key)
+
+
+# ──────────────────────────────────────────────
+# db.firestore save_* 와 같은 시그니처
+# ──────────────────────────────────────────────
+
+def save_chunks(paper_id: str, chunks: list) -> None:
+    _submit("save_chunks", f"papers/{paper_id}/chunks", paper_id, chunks)
+
+
+def save_agents(paper_id: str, agents: list) -> None:
+    _submit("save_agents", f"papers/{paper_id}/agents", paper_id, agents)
+
+
+def save_annotations(paper_id: str, annotations: list) -> None:
+    _submit("save_annotations", f"papers/{paper_id}/agent_annotations", paper_id, annotations)
+
+
+def save_paper_meta(paper_id: str, data: dict) -> None:
+    _submit("save_paper_meta", f"papers/{paper_id}", paper_id, data)
+
+
+def save_user_paper_meta(user_id: str, paper_id: str, data: dict) -> None:
+    _submit("save_user_paper_meta", f"users/{user_id}/papers/{paper_id}", user_id, paper_id, data)
+
+
+def save_paper_meta_now(paper_id: str, data: dict) -> None:
+    _save_now("save_paper_meta", f"papers/{paper_id}", paper_id, data)
+
+
+def save_user_paper_meta_now(user_id: str, paper_id: str, data: dict) -> None:
+    _save_now("save_user_paper_meta", f"users/{user_id}/papers/{paper_id}", user_id, paper_id, data)
+
+
+def save_user_threads(user_id: str, paper_id: str, threads: list) -> None:
+    _submit("save_user_threads", f"users/{user_id}/papers/{paper_id}/threads", user_id, paper_id, threads)
+
+
+def flush(*prefixes: str, timeout: Optional[float] = 30.0) -> bool:
+    if not _ENABLED:
+        return True
+    return queue.flush(*prefixes, timeout=timeout)
+
+
+def dropped(*prefixes: str) -> bool:
+    return _ENABLED and queue.dropped(*prefixes)
+
+
+def _collect() -> list[str]:
+    stats = queue.stats()
+    lines = ["# TYPE coread_write_behind_pending gauge", f"coread_write_behind_pending {stats['pending']}"]
+    for key in ("completed", "failed", "retried", "coalesced"):
+        name = f"coread_write_behind_{key}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {stats[key]}"]
+    return lines
+
+
+metrics.register_collector(_collect)
+atexit.register(lambda: flush(timeout=10.0))
@@ -8,13 +8,30 @@ logging.basicConfig(
     datefmt="%H:%M:%S",
 )
 
+import os
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from api.papers import router as papers_router
 from api.threads import router as threads_router
 from api.chat import router as chat_router
+from services import llm_batch, llm_scheduler, llm_service, metrics, warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup.start_scheduler()   # 자주 열리는 paper를 캐시에 미리 올림 (background thread)
+    if os.getenv("LLM_PRELOAD", "1") != "0":
+        # provider SDK는 lazy import — 설정된 provider만 serving 시작 후 background에서 올림
+        threading.Thread(target=llm_service.preload, name="llm-preload", daemon=True).start()
+    yield
+    warmup.shutdown()
+
 
-app = FastAPI(title="CoRead API")
+app = FastAPI(title="CoRead API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,4 +47,29 @@ app.include_router(chat_router, prefix="/chat", tags=["chat"])
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    from db import firestore, storage
+    breakers = {"firestore": firestore.breaker_state(), "storage": storage.breaker_state()}
+    degraded = any(b["configured"] and b["state"] != "closed" for b in breakers.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "ready": warmup.warmup.ready,
+        "breakers": breakers,
+        "warmup": warmup.warmup.snapshot(),
+        "llmProviders": llm_service.providers(),
+        "llmScheduler": llm_scheduler.get_scheduler().stats(),
+        "llmBatch": llm_batch.get_collector().stats(),
+    }
+
+
+@app.get("/health/ready")
+def ready():
+    """readiness probe — 시작 warm-up이 끝나기 전 503 (이후 주기 warm-up 중에는 ready 유지)."""
+    snapshot = warmup.warmup.snapshot()
+    if not warmup.warmup.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "warmup": snapshot})
+    return {"ready": True, "warmup": snapshot}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
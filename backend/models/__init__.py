@@ -1,5 +1,6 @@
 from .paper import Paper
 from .chunk import Chunk
+from .chunk_table import ChunkTable, ChunkView
 from .annotation import Annotation, BoundingRect
 from .thread import Thread
 from .message import Message
@@ -8,6 +9,8 @@ from .learner import LearnerProfile
 __all__ = [
     "Paper",
     "Chunk",
+    "ChunkTable",
+    "ChunkView",
     "Annotation",
     "BoundingRect",
     "Thread",
@@ -0,0 +1,267 @@
+"""
+ChunkTable — 논문 1편의 chunk 목록을 column 단위로 보관하는 compact 표현.
+
+chunk dict 수백 개 + rect dict 수천 개는 객체당 오버헤드가 데이터보다 큼.
+여기서는:
+  - content: 하나의 연속 문자열 + offset 배열
+  - rects:  (R, 7) float32 배열 [page, x1, y1, x2, y2, width, height] + chunk별 offset
+  - section: 고유 제목 목록 + int32 index, page/char 범위: int32 배열
+
+기존 호출부 호환:
+  - table[i] / iter(table) → ChunkView (읽기 전용 Mapping — c["id"], c.get("section", "") 그대로 동작)
+  - table.to_dicts() → 원래 chunk dict 목록 (JSON / Firestore / Chroma용)
+  - table[a:b] → 같은 buffer를 공유하는 view (복사 없음)
+"""
+from collections.abc import Mapping
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+_RECT_FIELDS = ("page", "x1", "y1", "x2", "y2", "width", "height")
+_KEYS = (
+    "id", "paperId", "content", "section", "position",
+    "charStart", "charEnd", "pageStart", "pageEnd", "rects", "linkedChunks",
+)
+
+
+class ChunkTable:
+    __slots__ = (
+        "paper_id", "_ids", "_text", "_offsets", "_sections", "_section_idx",
+        "_position", "_char_range", "_page_range", "_rects", "_rect_offsets",
+        "_linked", "_start", "_stop", "_id_index",
+    )
+
+    def __init__(
+        self,
+        paper_id: str,
+        ids: list,
+        text: str,
+        offsets: np.ndarray,
+        sections: list,
+        section_idx: np.ndarray,
+        position: np.ndarray,
+        char_range: np.ndarray,
+        page_range: np.ndarray,
+        rects: np.ndarray,
+        rect_offsets: np.ndarray,
+        linked: list,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ):
+        self.paper_id = paper_id
+        self._ids = ids
+        self._text = text
+        self._offsets = offsets              # (n+1,) int64 — content i = text[off[i]:off[i+1]]
+        self._sections = sections
+        self._section_idx = section_idx      # (n,) int32
+        self._position = position            # (n,) float32
+        self._char_range = char_range        # (n, 2) int32 — charStart, charEnd
+        self._page_range = page_range        # (n, 2) int32 — pageStart, pageEnd
+        self._rects = rects                  # (R, 7) float32
+        self._rect_offsets = rect_offsets    # (n+1,) int32 — rects of i = rects[ro[i]:ro[i+1]]
+        self._linked = linked                # list[tuple[str, ...]]
+        # slice view: 모든 column을 공유하고 [start, stop) 구간만 노출
+        self._start = start
+        self._stop = len(ids) if stop is None else stop
+        self._id_index: Optional[dict] = None
+
+    # ── construction ──
+
+    @classmethod
+    def from_dicts(cls, chunks: list, paper_id: str = "") -> "ChunkTable":
+        n = len(chunks)
+        ids, parts, sections, linked = [], [], [], []
+        section_lookup: dict[str, int] = {}
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        section_idx = np.zeros(n, dtype=np.int32)
+        position = np.zeros(n, dtype=np.float32)
+        char_range = np.zeros((n, 2), dtype=np.int32)
+        page_range = np.zeros((n, 2), dtype=np.int32)
+        rect_offsets = np.zeros(n + 1, dtype=np.int32)
+        rect_rows: list = []
+
+        pos = 0
+        for i, c in enumerate(chunks):
+            content = c.get("content", "")
+            ids.append(c.get("id", ""))
+            parts.append(content)
+            pos += len(content)
+            offsets[i + 1] = pos
+
+            section = c.get("section", "")
+            idx = section_lookup.get(section)
+            if idx is None:
+                idx = section_lookup[section] = len(sections)
+                sections.append(section)
+            section_idx[i] = idx
+
+            position[i] = c.get("position", 0.0)
+            char_range[i] = (c.get("charStart", 0), c.get("charEnd", 0))
+            page_range[i] = (c.get("pageStart", 1), c.get("pageEnd", 1))
+            for r in c.get("rects") or []:
+                rect_rows.append([r.get(f, 0.0) for f in _RECT_FIELDS])
+            rect_offsets[i + 1] = len(rect_rows)
+            linked.append(tuple(c.get("linkedChunks") or ()))
+
+        if not paper_id and chunks:
+            paper_id = chunks[0].get("paperId", "")
+        rects = np.asarray(rect_rows, dtype=np.float32).reshape(-1, len(_RECT_FIELDS))
+        return cls(
+            paper_id, ids, "".join(parts), offsets, sections, section_idx,
+            position, char_range, page_range, rects, rect_offsets, linked,
+        )
+
+    @classmethod
+    def coerce(cls, chunks: Union["ChunkTable", list]) -> "ChunkTable":
+        """이미 ChunkTable이면 그대로, dict 목록이면 변환."""
+        return chunks if isinstance(chunks, ChunkTable) else cls.from_dicts(chunks)
+
+    def to_dicts(self) -> list:
+        return [self.row_dict(i) for i in range(len(self))]
+
+    # ── sequence / lookup ──
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __iter__(self) -> Iterator["ChunkView"]:
+        for i in range(len(self)):
+            yield ChunkView(self, i)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union["ChunkView", "ChunkTable"]:
+        n = len(self)
+        if isinstance(item, slice):
+            start, stop, step = item.indices(n)
+            if step != 1:
+                raise ValueError("ChunkTable slices must be contiguous")
+            return ChunkTable(
+                self.paper_id, self._ids, self._text, self._offsets, self._sections,
+                self._section_idx, self._position, self._char_range, self._page_range,
+                self._rects, self._rect_offsets, self._linked,
+                start=self._start + start, stop=self._start + max(start, stop),
+            )
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError(item)
+        return ChunkView(self, item)
+
+    def index_of(self, chunk_id: str) -> Optional[int]:
+        if self._id_index is None:
+            self._id_index = {
+                self._ids[j]: j - self._start for j in range(self._start, self._stop)
+            }
+        return self._id_index.get(chunk_id)
+
+    def by_id(self, chunk_id: str) -> Optional["ChunkView"]:
+        i = self.index_of(chunk_id)
+        return None if i is None else ChunkView(self, i)
+
+    def on_page(self, page: int) -> list:
+        """page에 걸쳐 있는 chunk의 index 목록."""
+        pr = self._page_range[self._start:self._stop]
+        return np.nonzero((pr[:, 0] <= page) & (pr[:, 1] >= page))[0].tolist()
+
+    def in_section(self, section: str) -> list:
+        try:
+            idx = self._sections.index(section)
+        except ValueError:
+            return []
+        return np.nonzero(self._section_idx[self._start:self._stop] == idx)[0].tolist()
+
+    # ── column access (prompt builder용 — view 객체 생성 없이) ──
+
+    def id(self, i: int) -> str:
+        return self._ids[self._start + i]
+
+    def content(self, i: int) -> str:
+        j = self._start + i
+        return self._text[self._offsets[j]:self._offsets[j + 1]]
+
+    def section(self, i: int) -> str:
+        return self._sections[self._section_idx[self._start + i]]
+
+    def rect_array(self, i: int) -> np.ndarray:
+        """chunk i의 rect (k, 7) float32 view (복사 없음)."""
+        j = self._start + i
+        return self._rects[self._rect_offsets[j]:self._rect_offsets[j + 1]]
+
+    def rects(self, i: int) -> list:
+        out = []
+        for row in self.rect_array(i).tolist():
+            page, x1, y1, x2, y2, w, h = row
+            out.append({
+                "page": int(page),
+                "x1": round(x1, 4), "y1": round(y1, 4),
+                "x2": round(x2, 4), "y2": round(y2, 4),
+                "width": round(w, 2), "height": round(h, 2),
+            })
+        return out
+
+    def field(self, i: int, key: str):
+        j = self._start + i
+        if key == "id":
+            return self._ids[j]
+        if key == "content":
+            return self.content(i)
+        if key == "section":
+            return self.section(i)
+        if key == "paperId":
+            return self.paper_id
+        if key == "position":
+            return round(float(self._position[j]), 4)
+        if key == "charStart":
+            return int(self._char_range[j, 0])
+        if key == "charEnd":
+            return int(self._char_range[j, 1])
+        if key == "pageStart":
+            return int(self._page_range[j, 0])
+        if key == "pageEnd":
+            return int(self._page_range[j, 1])
+        if key == "rects":
+            return self.rects(i)
+        if key == "linkedChunks":
+            return list(self._linked[j])
+        raise KeyError(key)
+
+    def row_dict(self, i: int) -> dict:
+        return {key: self.field(i, key) for key in _KEYS}
+
+    @property
+    def nbytes(self) -> int:
+        """대략적 메모리 크기 (slice view도 공유 buffer 전체를 셈)."""
+        arrays = (
+            self._offsets, self._section_idx, self._position, self._char_range,
+            self._page_range, self._rects, self._rect_offsets,
+        )
+        strings = sum(49 + len(s) for s in self._ids) + sum(49 + len(s) for s in self._sections)
+        linked = sum(56 + 8 * len(t) for t in self._linked)
+        return 49 + len(self._text) + strings + linked + sum(a.nbytes for a in arrays)
+
+
+class ChunkView(Mapping):
+    """ChunkTable의 한 행을 dict처럼 읽는 view. 값은 접근할 때 column에서 꺼냄."""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: ChunkTable, i: int):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, key: str):
+        return self._table.field(self._i, key)
+
+    def __iter__(self):
+        return iter(_KEYS)
+
+    def __len__(self) -> int:
+        return len(_KEYS)
+
+    def __contains__(self, key) -> bool:
+        return key in _KEYS
+
+    def to_dict(self) -> dict:
+        return self._table.row_dict(self._i)
+
+    def __repr__(self) -> str:
+        return f"ChunkView({self._table.id(self._i)!r})"
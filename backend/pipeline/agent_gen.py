@@ -7,9 +7,9 @@ Dynamic Agent Generation — 논문에서 토론 최적화된 에이전트 생
 
 프롬프트: backend/prompts/pipeline/agent_gen.py
 """
-import json
 import logging
-import re
+
+from models.chunk_table import ChunkTable
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +20,12 @@ _SKIP_SECTIONS = ("references", "acknowledgment", "appendix", "bibliography")
 
 def _build_paper_context(chunks: list) -> str:
     """skip 섹션만 제외하고 전체 포함."""
+    if isinstance(chunks, ChunkTable):
+        return "\n\n".join(
+            f"[{chunks.section(i)}]\n{chunks.content(i)}"
+            for i in range(len(chunks))
+            if not any(k in chunks.section(i).lower() for k in _SKIP_SECTIONS)
+        )
     parts = []
     for c in chunks:
         section = c.get("section", "").lower()
@@ -29,28 +35,21 @@ def _build_paper_context(chunks: list) -> str:
     return "\n\n".join(parts)
 
 
-def _parse_raw(raw: str) -> list:
-    raw = raw.strip()
-    if raw.startswith("```"):
-        raw = re.sub(r"^```[a-z]*\n?", "", raw)
-        raw = re.sub(r"```$", "", raw.strip())
-    return json.loads(raw).get("agents", [])
-
-
 async def _generate_async(paper_id: str, chunks: list) -> list:
     from services import llm_service
-    from prompts.pipeline.agent_gen import get_prompt
+    from prompts.pipeline.agent_gen import RESPONSE_SCHEMA, get_prompt
 
     paper_context = _build_paper_context(chunks)
     prompt = get_prompt(paper_context)
 
     try:
-        raw = await llm_service.complete(
+        result = await llm_service.complete_json(
             _MODEL,
             [{"role": "user", "content": prompt}],
+            RESPONSE_SCHEMA,
             max_tokens=3000,
         )
-        agents_raw = _parse_raw(raw)
+        agents_raw = result.get("agents", [])
     except Exception as e:
         logger.error(f"[agent_gen] LLM/parse error for {paper_id}: {e}")
         return []
@@ -6,12 +6,13 @@ Agent Reading — 각 에이전트가 논문 전체를 읽고 annotation 생성
 프롬프트: backend/prompts/pipeline/agent_reading.py
 """
 import asyncio
-import json
 import logging
 import re
 import uuid
 from difflib import SequenceMatcher
-from typing import Optional
+from typing import Callable, Optional
+
+from models.chunk_table import ChunkTable
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,11 @@ _MODEL = {"provider": "openai", "model": "gpt-4o-mini"}
 
 def _build_paper_text(chunks: list) -> str:
     """청크 목록 → [CHUNK:id] 태그 달린 논문 텍스트 (전체)."""
+    if isinstance(chunks, ChunkTable):
+        return "\n---\n".join(
+            f"[CHUNK:{chunks.id(i)}]\n[Section: {chunks.section(i)}]\n{chunks.content(i)}"
+            for i in range(len(chunks))
+        )
     parts = []
     for c in chunks:
         chunk_id = c.get("id", "")
@@ -36,11 +42,14 @@ def _normalize(s: str) -> str:
 def _find_chunk_for_quote(quote: str, claimed_id: str, chunks: list) -> Optional[dict]:
     """quote를 포함하는 chunk를 찾아 반환. 없으면 fuzzy 탐색."""
     norm_quote = _normalize(quote)
-    chunk_map = {c["id"]: c for c in chunks if "id" in c}
+    if isinstance(chunks, ChunkTable):
+        claimed = chunks.by_id(claimed_id)
+    else:
+        claimed = next((c for c in chunks if c.get("id") == claimed_id), None)
 
-    if claimed_id in chunk_map:
-        if norm_quote in _normalize(chunk_map[claimed_id].get("content", "")):
-            return chunk_map[claimed_id]
+    if claimed is not None:
+        if norm_quote in _normalize(claimed.get("content", "")):
+            return claimed
 
     for chunk in chunks:
         if norm_quote in _normalize(chunk.get("content", "")):
@@ -62,17 +71,44 @@ def _find_chunk_for_quote(quote: str, claimed_id: str, chunks: list) -> Optional
     return None
 
 
-def _parse_raw(raw: str) -> list:
-    raw = raw.strip()
-    if raw.startswith("```"):
-        raw = re.sub(r"^```[a-z]*\n?", "", raw)
-        raw = re.sub(r"```$", "", raw.strip())
-    return json.loads(raw).get("annotations", [])
+_VALID_TYPES = {"observation", "question", "tension", "alternative"}
+
+
+def _to_annotation(ann: dict, agent: dict, chunks: list) -> Optional[dict]:
+    """LLM annotation 원소 1개 검증 + quote→chunk 매칭. 유효하지 않으면 None."""
+    quote = ann.get("quote", "").strip()
+    claimed_id = ann.get("chunk_id", "").strip()
+    ann_type = ann.get("annotation_type", "observation")
+
+    if not quote or ann_type not in _VALID_TYPES:
+        return None
+
+    matched = _find_chunk_for_quote(quote, claimed_id, chunks)
+    if matched is None:
+        logger.debug(f"[agent_reading] quote not found, skipping: '{quote[:50]}'")
+        return None
 
+    return {
+        "id": str(uuid.uuid4()),
+        "agent_id": agent["id"],
+        "chunk_id": matched["id"],
+        "section": matched.get("section", ""),
+        "position": matched.get("position", 0.0),
+        "annotation_type": ann_type,
+        "content": ann.get("content", "").strip(),
+        "quote": quote,
+    }
 
-async def _read_for_agent(agent: dict, paper_text: str, chunks: list) -> list:
+
+async def _read_for_agent(
+    agent: dict,
+    paper_text: str,
+    chunks: list,
+    on_annotation: Optional[Callable[[dict], None]] = None,
+) -> list:
+    """에이전트 1명의 reading. on_annotation이 있으면 annotation이 매칭되는 즉시 호출."""
     from services import llm_service
-    from prompts.pipeline.agent_reading import get_prompt
+    from prompts.pipeline.agent_reading import RESPONSE_SCHEMA, get_prompt
 
     prompt = get_prompt(
         agent_name=agent["name"],
@@ -81,42 +117,23 @@ async def _read_for_agent(agent: dict, paper_text: str, chunks: list) -> list:
         paper_text=paper_text,
     )
 
+    # annotation은 배열 원소가 닫히는 즉시 검증 — 응답 뒷부분이 깨져도 앞부분은 유지
+    annotations = []
     try:
-        raw = await llm_service.complete(
+        async for ann in llm_service.stream_json_items(
             _MODEL,
             [{"role": "user", "content": prompt}],
+            RESPONSE_SCHEMA,
+            "annotations",
             max_tokens=4096,
-        )
-        annotations_raw = _parse_raw(raw)
+        ):
+            parsed = _to_annotation(ann, agent, chunks)
+            if parsed is not None:
+                annotations.append(parsed)
+                if on_annotation is not None:
+                    on_annotation(parsed)
     except Exception as e:
-        logger.warning(f"[agent_reading] agent {agent['id']} failed: {e}")
-        return []
-
-    valid_types = {"observation", "question", "tension", "alternative"}
-    annotations = []
-    for ann in annotations_raw:
-        quote = ann.get("quote", "").strip()
-        claimed_id = ann.get("chunk_id", "").strip()
-        ann_type = ann.get("annotation_type", "observation")
-
-        if not quote or ann_type not in valid_types:
-            continue
-
-        matched = _find_chunk_for_quote(quote, claimed_id, chunks)
-        if matched is None:
-            logger.debug(f"[agent_reading] quote not found, skipping: '{quote[:50]}'")
-            continue
-
-        annotations.append({
-            "id": str(uuid.uuid4()),
-            "agent_id": agent["id"],
-            "chunk_id": matched["id"],
-            "section": matched.get("section", ""),
-            "position": matched.get("position", 0.0),
-            "annotation_type": ann_type,
-            "content": ann.get("content", "").strip(),
-            "quote": quote,
-        })
+        logger.warning(f"[agent_reading] agent {agent['id']} failed after {len(annotations)} annotations: {e}")
 
     logger.info(f"[agent_reading] agent {agent['id']}: {len(annotations)} annotations")
     return annotations
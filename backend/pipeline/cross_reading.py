@@ -9,18 +9,25 @@ Cross Reading — 여러 에이전트가 동일한 구절을 인용한 지점 
 Output: ContestedExcerpt list — conflict_type, intensity, key_tension 포함
 """
 import asyncio
-import json
 import logging
 import re
 from collections import defaultdict
 from difflib import SequenceMatcher
 from typing import Optional
 
+from models.chunk_table import ChunkTable
+
 logger = logging.getLogger(__name__)
 
 _MIN_EXCERPT_CHARS = 30
 _MAX_EXCERPT_CHARS = 200
 _MODEL = {"provider": "openai", "model": "gpt-4o-mini"}
+_FALLBACK_ANALYSIS = {
+    "conflict_type": "interpretive",
+    "conflict_intensity": "medium",
+    "key_tension": "",
+    "tension_pair": [],
+}
 
 
 # ──────────────────────────────────────────────
@@ -113,31 +120,31 @@ def _build_conflict_analysis_input(candidates: list) -> str:
 async def _analyze_conflicts(candidates: list) -> list:
     """LLM 배치 호출로 각 excerpt의 conflict type/intensity 분석."""
     from services import llm_service
-    from prompts.pipeline.cross_reading import get_conflict_analysis_prompt
+    from prompts.pipeline.cross_reading import RESPONSE_SCHEMA, get_conflict_analysis_prompt
 
     excerpts_text = _build_conflict_analysis_input(candidates)
     prompt = get_conflict_analysis_prompt(excerpts_text)
 
+    analysis_map: dict[str, dict] = {}
     try:
-        raw = await llm_service.complete(
+        async for analysis in llm_service.stream_json_items(
             _MODEL,
             [{"role": "user", "content": prompt}],
+            RESPONSE_SCHEMA,
+            "analyses",
             max_tokens=2000,
-        )
-        raw = raw.strip()
-        if raw.startswith("```"):
-            raw = re.sub(r"^```[a-z]*\n?", "", raw)
-            raw = re.sub(r"```$", "", raw.strip())
-        analyses = json.loads(raw).get("analyses", [])
+        ):
+            if isinstance(analysis, dict) and analysis.get("index"):
+                analysis_map[analysis["index"]] = analysis
     except Exception as e:
-        logger.warning(f"[cross_reading] conflict analysis failed: {e} — returning all candidates as medium")
-        return [
-            {**ce, "conflict_type": "interpretive", "conflict_intensity": "medium",
-             "key_tension": "", "tension_pair": []}
-            for ce in candidates
-        ]
-
-    analysis_map = {a["index"]: a for a in analyses}
+        # 이미 받은 분석은 유지, 나머지만 medium으로 간주
+        logger.warning(
+            f"[cross_reading] conflict analysis failed after {len(analysis_map)}/{len(candidates)}: {e}"
+            " — treating the rest as medium"
+        )
+        for i in range(len(candidates)):
+            analysis_map.setdefault(f"E{i}", _FALLBACK_ANALYSIS)
+
     _intensity_order = {"high": 3, "medium": 2, "low": 1, "none": 0}
 
     enriched = []
@@ -173,31 +180,53 @@ async def _analyze_conflicts(candidates: list) -> list:
 # Main
 # ──────────────────────────────────────────────
 
-async def _find_async(annotations: list, chunks: list) -> list:
-    chunk_map = {c["id"]: c for c in chunks}
-    by_chunk: dict[str, list] = defaultdict(list)
-    for ann in annotations:
-        by_chunk[ann["chunk_id"]].append(ann)
-
-    candidates = []
-    for chunk_id, anns in by_chunk.items():
-        agent_ids = list({a["agent_id"] for a in anns})
-        if len(agent_ids) < 2:
-            continue
-
-        chunk = chunk_map.get(chunk_id, {})
+class CrossReadingIndex:
+    """
+    annotation을 하나씩 받아 chunk별로 모으는 incremental index.
+    chunk에 두 번째 에이전트의 annotation이 들어오는 순간 candidate가 됨 (progressive pipeline용).
+    """
+
+    def __init__(self, chunks: list):
+        if isinstance(chunks, ChunkTable):
+            self._lookup = chunks.by_id
+        else:
+            self._lookup = {c["id"]: c for c in chunks}.get
+        self._by_chunk: dict[str, list] = defaultdict(list)
+        self._agents: dict[str, set] = defaultdict(set)
+
+    def add(self, ann: dict) -> bool:
+        """annotation 추가. 이 annotation으로 chunk가 막 candidate가 됐으면 True."""
+        chunk_id = ann["chunk_id"]
+        self._by_chunk[chunk_id].append(ann)
+        agents = self._agents[chunk_id]
+        before = len(agents)
+        agents.add(ann["agent_id"])
+        return before == 1 and len(agents) == 2
+
+    def candidate_ids(self) -> list:
+        return [cid for cid, agents in self._agents.items() if len(agents) >= 2]
+
+    def candidate(self, chunk_id: str) -> dict:
+        """현재까지 모인 annotation으로 candidate excerpt 구성."""
+        anns = list(self._by_chunk[chunk_id])
+        chunk = self._lookup(chunk_id) or {}
         chunk_content = chunk.get("content", "")
-        excerpt = _pick_best_excerpt(anns, chunk_content)
-
-        candidates.append({
+        return {
             "chunk_id": chunk_id,
-            "excerpt": excerpt,
+            "excerpt": _pick_best_excerpt(anns, chunk_content),
             "section": chunk.get("section", ""),
             "rects": chunk.get("rects", []),
             "content": chunk_content,
             "annotations": anns,
-            "agent_ids": agent_ids,
-        })
+            "agent_ids": list({a["agent_id"] for a in anns}),
+        }
+
+
+async def _find_async(annotations: list, chunks: list) -> list:
+    index = CrossReadingIndex(chunks)
+    for ann in annotations:
+        index.add(ann)
+    candidates = [index.candidate(cid) for cid in index.candidate_ids()]
 
     logger.info(f"[cross_reading] {len(candidates)} candidate excerpts with 2+ agents")
 
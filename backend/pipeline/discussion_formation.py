@@ -7,9 +7,7 @@ chunk_id와 verbatim excerpt는 LLM 출력에 의존하지 않고 contested_exce
 
 프롬프트: backend/prompts/pipeline/discussion_formation.py
 """
-import json
 import logging
-import re
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -57,21 +55,62 @@ def _build_prompt_text(contested_excerpts: list) -> str:
     return "\n\n".join(parts)
 
 
-def _parse_raw(raw: str) -> list:
-    raw = raw.strip()
-    if raw.startswith("```"):
-        raw = re.sub(r"^```[a-z]*\n?", "", raw)
-        raw = re.sub(r"```$", "", raw.strip())
-    return json.loads(raw).get("threads", [])
+def _to_thread(
+    t: dict,
+    paper_id: str,
+    excerpt_map: dict,
+    contested_excerpts: list,
+    valid_agent_ids: set,
+):
+    """LLM thread 원소 1개 검증 → thread dict. 유효하지 않으면 None."""
+    excerpt_index = t.get("excerpt_index", "").strip()
+    open_q = t.get("open_question", "").strip()
+
+    if not open_q:
+        return None
+
+    seed_messages = [
+        m for m in t.get("seed_messages", [])
+        if m.get("author") in valid_agent_ids and m.get("content")
+    ]
+    if not seed_messages:
+        return None
+
+    # chunk_id와 excerpt는 LLM 출력 대신 contested_excerpt에서 직접 가져옴
+    ce = excerpt_map.get(excerpt_index)
+    if ce is None:
+        # fallback: excerpt_index가 없거나 잘못됐을 때 첫 번째 excerpt 사용
+        ce = contested_excerpts[0] if contested_excerpts else {}
+
+    return {
+        "id": str(uuid.uuid4()),
+        "paperId": paper_id,
+        "chunkId": ce.get("chunk_id", ""),
+        "contestablePoint": ce.get("excerpt", ""),   # 항상 verbatim 원문
+        "openQuestion": open_q,
+        "suggestedAgent": t.get("suggested_agent", seed_messages[0]["author"]),
+        "seedAnnotationSummaries": [],
+        "seedMessages": seed_messages,
+        "status": "open",
+        "chunkRects": ce.get("rects", []),           # 항상 올바른 rects
+        "chunkContent": ce.get("content", "")[:400],
+        "chunkSection": ce.get("section", ""),
+        "conflictType": ce.get("conflict_type", ""),
+    }
 
 
 async def _form_async(
     paper_id: str,
     contested_excerpts: list,
     agents: list,
+    max_threads: int = 7,
 ) -> list:
+    """
+    contested excerpts → 토론 thread.
+    max_threads < 7이면 micro-batch 모드 (progressive pipeline): excerpt당 최대 1개 thread 요청.
+    """
     from services import llm_service
-    from prompts.pipeline.discussion_formation import get_prompt
+    from prompts.pipeline.discussion_formation import RESPONSE_SCHEMA, get_prompt
 
     if not contested_excerpts:
         logger.warning(f"[discussion_formation] no contested excerpts for {paper_id}")
@@ -79,60 +118,33 @@ async def _form_async(
 
     agent_names = ", ".join(f"{a['name']}({a['id']})" for a in agents)
     prompt_text = _build_prompt_text(contested_excerpts)
-    prompt = get_prompt(prompt_text, agent_names)
-
-    try:
-        raw = await llm_service.complete(
-            _MODEL,
-            [{"role": "user", "content": prompt}],
-            max_tokens=4096,
-        )
-        threads_raw = _parse_raw(raw)
-    except Exception as e:
-        logger.error(f"[discussion_formation] LLM/parse error for {paper_id}: {e}")
-        return []
+    if max_threads >= 7:
+        prompt = get_prompt(prompt_text, agent_names)
+    else:
+        upper = min(max_threads, len(contested_excerpts))
+        prompt = get_prompt(prompt_text, agent_names, thread_range=f"1–{upper}" if upper > 1 else "1")
 
     valid_agent_ids = {a["id"] for a in agents}
 
     # excerpt_index → contested_excerpt 매핑
     excerpt_map = {f"E{i}": ce for i, ce in enumerate(contested_excerpts)}
 
+    # thread 원소가 닫히는 즉시 검증 — 응답 뒷부분이 깨져도 앞의 thread는 유지
     threads = []
-    for t in threads_raw[:7]:
-        excerpt_index = t.get("excerpt_index", "").strip()
-        open_q = t.get("open_question", "").strip()
-
-        if not open_q:
-            continue
-
-        seed_messages = [
-            m for m in t.get("seed_messages", [])
-            if m.get("author") in valid_agent_ids and m.get("content")
-        ]
-        if not seed_messages:
-            continue
-
-        # chunk_id와 excerpt는 LLM 출력 대신 contested_excerpt에서 직접 가져옴
-        ce = excerpt_map.get(excerpt_index)
-        if ce is None:
-            # fallback: excerpt_index가 없거나 잘못됐을 때 첫 번째 excerpt 사용
-            ce = contested_excerpts[0] if contested_excerpts else {}
-
-        threads.append({
-            "id": str(uuid.uuid4()),
-            "paperId": paper_id,
-            "chunkId": ce.get("chunk_id", ""),
-            "contestablePoint": ce.get("excerpt", ""),   # 항상 verbatim 원문
-            "openQuestion": open_q,
-            "suggestedAgent": t.get("suggested_agent", seed_messages[0]["author"]),
-            "seedAnnotationSummaries": [],
-            "seedMessages": seed_messages,
-            "status": "open",
-            "chunkRects": ce.get("rects", []),           # 항상 올바른 rects
-            "chunkContent": ce.get("content", "")[:400],
-            "chunkSection": ce.get("section", ""),
-            "conflictType": ce.get("conflict_type", ""),
-        })
+    try:
+        async for t in llm_service.stream_json_items(
+            _MODEL,
+            [{"role": "user", "content": prompt}],
+            RESPONSE_SCHEMA,
+            "threads",
+            max_tokens=4096,
+            max_items=max_threads,   # 상한 이후는 파싱만 멈추고 usage가 오도록 끝까지 받음
+        ):
+            thread = _to_thread(t, paper_id, excerpt_map, contested_excerpts, valid_agent_ids)
+            if thread is not None:
+                threads.append(thread)
+    except Exception as e:
+        logger.error(f"[discussion_formation] LLM/parse error for {paper_id} after {len(threads)} threads: {e}")
 
     logger.info(f"[discussion_formation] {len(threads)} threads formed for {paper_id}")
     return threads
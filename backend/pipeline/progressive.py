@@ -0,0 +1,183 @@
+"""
+Progressive Pipeline — agent reading / cross reading / discussion formation을 겹쳐서 실행
+
+기존 순차 실행(모든 agent reading 완료 → cross reading → discussion)은 가장 느린 에이전트가
+전체 latency를 결정함. 여기서는:
+
+1. 에이전트별 reading이 annotation을 매칭하는 즉시 CrossReadingIndex에 추가
+2. chunk에 2번째 에이전트가 annotation하는 순간 candidate → micro-batch에 적재
+3. micro-batch가 차면 conflict analysis → 남은 contested excerpt로 바로 thread 생성
+   (micro-batch당 최대 _BATCH_THREADS개, reading 중에는 전체 thread 중 _EARLY_SHARE만큼만)
+4. thread는 생성되는 즉시 on_thread 콜백으로 전달 (SSE 등)
+
+reading이 끝나면 in-flight micro-batch를 기다린 뒤 final flush: 남은 candidate를 분석하고, 앞선 micro-batch에서
+thread가 되지 않은 contested excerpt와 합쳐 intensity 순으로 재정렬해서 남은 slot을 채움 → 초반 candidate가
+slot을 다 차지해서 뒤에 나온 더 강한 conflict가 버려지는 일이 없음 (순차 실행의 전체 best-of 선택 유지).
+이미 분석에 들어간 chunk에 뒤늦게 붙은 annotation은 저장만 되고 해당 thread에는 반영되지 않음.
+
+batch mode (services.llm_batch)에서는 LLM 왕복 1번이 수 분 이상이라 micro-batch로 겹칠 이득이 없음 →
+reading이 끝난 뒤 candidate 전체를 한 번에 분석 (paper당 왕복: reading → cross reading → discussion).
+"""
+import asyncio
+import logging
+import math
+from typing import Callable, Optional
+
+from pipeline.agent_reading import _build_paper_text, _read_for_agent
+from pipeline.cross_reading import CrossReadingIndex, _analyze_conflicts
+from pipeline.discussion_formation import _form_async
+from services import llm_batch, metrics
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE = 3      # conflict analysis micro-batch 크기 (candidate 수)
+_MAX_THREADS = 7
+_BATCH_THREADS = 2   # micro-batch 1개가 만들 수 있는 thread 상한
+_EARLY_SHARE = 0.5   # reading 중 micro-batch가 채울 수 있는 thread 비율 — 나머지는 final flush의 재정렬로
+_INTENSITY = {"high": 2, "medium": 1}
+
+
+class _Progressive:
+    def __init__(
+        self,
+        paper_id: str,
+        agents: list,
+        chunks: list,
+        on_annotation: Optional[Callable[[dict], None]],
+        on_contested: Optional[Callable[[list], None]],
+        on_thread: Optional[Callable[[dict], None]],
+        batch_size: int,
+        max_threads: int,
+    ):
+        self.paper_id = paper_id
+        self.agents = agents
+        self.chunks = chunks
+        self.on_annotation = on_annotation
+        self.on_contested = on_contested
+        self.on_thread = on_thread
+        self.batch_size = batch_size
+        self.max_threads = max_threads
+
+        self.index = CrossReadingIndex(chunks)
+        self.annotations: list = []
+        self.contested: list = []
+        self.threads: list = []
+        self._pending: list[str] = []       # 아직 분석에 안 들어간 candidate chunk ids
+        self._unused: list = []             # 분석됐지만 thread가 되지 않은 contested excerpt (final flush 후보)
+        self._early_budget = math.ceil(max_threads * _EARLY_SHARE)
+        self._early_claimed = 0             # reading 중 micro-batch가 예약한 thread slot
+        self._tasks: set[asyncio.Task] = set()
+
+    # ── reading ──
+
+    def _accept_annotation(self, ann: dict) -> None:
+        self.annotations.append(ann)
+        if self.on_annotation is not None:
+            self.on_annotation(ann)
+        if self.index.add(ann):
+            self._pending.append(ann["chunk_id"])
+            # early slot이 다 찼으면 candidate는 그대로 모아 두고 final flush에서 함께 분석
+            if len(self._pending) >= self.batch_size and self._early_claimed < self._early_budget:
+                self._dispatch()
+
+    async def _read(self, agent: dict, paper_text: str) -> None:
+        with metrics.tagged(stage="agent_reading"):
+            await _read_for_agent(agent, paper_text, self.chunks, on_annotation=self._accept_annotation)
+
+    # ── cross reading → discussion ──
+
+    def _dispatch(self) -> None:
+        batch = [self.index.candidate(cid) for cid in self._pending]
+        self._pending = []
+        task = asyncio.create_task(self._analyze_and_form(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _analyze(self, batch: list) -> list:
+        with metrics.tagged(stage="cross_reading"):
+            contested = await _analyze_conflicts(batch)
+        if contested:
+            self.contested.extend(contested)
+            if self.on_contested is not None:
+                self.on_contested(contested)
+        return contested
+
+    async def _form(self, contested: list, quota: int) -> int:
+        """contested에서 최대 quota개 thread 생성. thread가 되지 않은 excerpt는 _unused로. 추가된 thread 수 반환."""
+        with metrics.tagged(stage="discussion_formation"):
+            formed = await _form_async(
+                self.paper_id, contested, self.agents,
+                max_threads=min(quota, len(contested)),
+            )
+        accepted = formed[:min(quota, self.max_threads - len(self.threads))]
+        for thread in accepted:
+            self.threads.append(thread)
+            if self.on_thread is not None:
+                self.on_thread(thread)
+        used = {t["chunkId"] for t in accepted}
+        self._unused.extend(ce for ce in contested if ce.get("chunk_id") not in used)
+        return len(accepted)
+
+    async def _analyze_and_form(self, batch: list) -> None:
+        contested = await self._analyze(batch)
+        if not contested:
+            return
+        # await 전에 slot 예약 — 동시에 도는 micro-batch끼리 early budget을 넘지 않도록
+        quota = min(_BATCH_THREADS, self._early_budget - self._early_claimed)
+        if quota <= 0:
+            self._unused.extend(contested)
+            return
+        self._early_claimed += quota
+        added = await self._form(contested, quota)
+        self._early_claimed -= quota - added
+
+    async def _final_flush(self) -> None:
+        """남은 candidate 분석 + 앞서 thread가 안 된 excerpt와 합쳐 intensity 순으로 남은 slot 채움."""
+        batch = [self.index.candidate(cid) for cid in self._pending]
+        self._pending = []
+        contested = await self._analyze(batch) if batch else []
+        pool, self._unused = self._unused + contested, []
+        pool.sort(key=lambda ce: _INTENSITY.get(ce.get("conflict_intensity"), 0), reverse=True)
+        remaining = self.max_threads - len(self.threads)
+        if pool and remaining > 0:
+            await self._form(pool, remaining)
+
+    async def run(self) -> tuple[list, list, list]:
+        paper_text = _build_paper_text(self.chunks)
+        await asyncio.gather(*[self._read(a, paper_text) for a in self.agents])
+        logger.info(
+            f"[progressive] reading done for {self.paper_id}: {len(self.annotations)} annotations, "
+            f"{len(self.index.candidate_ids())} candidates, {len(self.threads)} threads so far"
+        )
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+        await self._final_flush()
+        logger.info(
+            f"[progressive] done for {self.paper_id}: {len(self.contested)} contested, "
+            f"{len(self.threads)} threads"
+        )
+        return self.annotations, self.contested, self.threads
+
+
+def run_progressive_discussions(
+    paper_id: str,
+    agents: list,
+    chunks: list,
+    on_annotation: Optional[Callable[[dict], None]] = None,
+    on_contested: Optional[Callable[[list], None]] = None,
+    on_thread: Optional[Callable[[dict], None]] = None,
+    batch_size: int = _BATCH_SIZE,
+    max_threads: int = _MAX_THREADS,
+) -> tuple[list, list, list]:
+    """
+    Sync wrapper — safe to call from a background thread.
+    Returns (annotations, contested_excerpts, threads). 콜백은 pipeline thread의 event loop에서 호출됨.
+    """
+    if llm_batch.active() is not None:
+        batch_size = len(chunks) + 1
+    runner = _Progressive(
+        paper_id, agents, chunks,
+        on_annotation, on_contested, on_thread,
+        batch_size, max_threads,
+    )
+    return asyncio.run(runner.run())
@@ -69,3 +69,35 @@ Return 3–4 agents as JSON:
 }}
 
 Respond with JSON only — no other text."""
+
+
+RESPONSE_SCHEMA = {
+    "name": "agents",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "agents": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "name": {"type": "string"},
+                        "field": {"type": "string"},
+                        "reading_lens": {"type": "string"},
+                        "core_value": {"type": "string"},
+                        "default_skepticism": {"type": "string"},
+                        "system_prompt": {"type": "string"},
+                    },
+                    "required": [
+                        "id", "name", "field", "reading_lens",
+                        "core_value", "default_skepticism", "system_prompt",
+                    ],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["agents"],
+        "additionalProperties": False,
+    },
+}
@@ -37,3 +37,32 @@ Respond in JSON:
 }}
 
 Respond with JSON only — no other text."""
+
+
+RESPONSE_SCHEMA = {
+    "name": "annotations",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "annotations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "chunk_id": {"type": "string"},
+                        "annotation_type": {
+                            "type": "string",
+                            "enum": ["observation", "question", "tension", "alternative"],
+                        },
+                        "content": {"type": "string"},
+                        "quote": {"type": "string"},
+                    },
+                    "required": ["chunk_id", "annotation_type", "content", "quote"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["annotations"],
+        "additionalProperties": False,
+    },
+}
@@ -46,3 +46,36 @@ Return analysis for all excerpts as JSON:
 }}
 
 Respond with JSON only — no other text."""
+
+
+RESPONSE_SCHEMA = {
+    "name": "conflict_analyses",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "analyses": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "string"},
+                        "conflict_type": {
+                            "type": "string",
+                            "enum": ["interpretive", "trade-off", "value-based", "methodological", "none"],
+                        },
+                        "conflict_intensity": {
+                            "type": "string",
+                            "enum": ["high", "medium", "low", "none"],
+                        },
+                        "key_tension": {"type": "string"},
+                        "tension_pair": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["index", "conflict_type", "conflict_intensity", "key_tension", "tension_pair"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["analyses"],
+        "additionalProperties": False,
+    },
+}
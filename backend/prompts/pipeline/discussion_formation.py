@@ -1,4 +1,4 @@
-def get_prompt(contested_excerpts_text: str, agent_names: str) -> str:
+def get_prompt(contested_excerpts_text: str, agent_names: str, thread_range: str = "5–7") -> str:
     return f"""You are an academic discussion designer. Goal: a live debate that surfaces socio-cognitive conflict with clear stakes.
 
 Below are paper passages where multiple expert agents ({agent_names}) have responded in genuinely conflicting ways.
@@ -62,7 +62,7 @@ Each excerpt has an analyzed conflict_type and key_tension.
 - Copying the open_question verbatim as the first seed message
 - Two consecutive messages by the same agent
 
-Return 5–7 threads as JSON:
+Return {thread_range} threads as JSON:
 {{
   "threads": [
     {{
@@ -80,3 +80,40 @@ Return 5–7 threads as JSON:
 }}
 
 Respond with JSON only — no other text."""
+
+
+RESPONSE_SCHEMA = {
+    "name": "discussion_threads",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "threads": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "excerpt_index": {"type": "string"},
+                        "open_question": {"type": "string"},
+                        "suggested_agent": {"type": "string"},
+                        "seed_messages": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "author": {"type": "string"},
+                                    "content": {"type": "string"},
+                                },
+                                "required": ["author", "content"],
+                                "additionalProperties": False,
+                            },
+                        },
+                    },
+                    "required": ["excerpt_index", "open_question", "suggested_agent", "seed_messages"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["threads"],
+        "additionalProperties": False,
+    },
+}
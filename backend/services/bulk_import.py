@@ -0,0 +1,522 @@
+"""
+Bulk import — PDF 여러 편 (zip 1개 또는 서버 디렉터리)을 job 1개로 라이브러리에 추가. 코스 onboarding용.
+
+/papers/upload를 N번 부르면 pipeline N개가 제각각 돌고 chunk 저장도 paper마다 따로 감. job은:
+  1. scan: zip은 spool로 풀고 디렉터리는 재귀 탐색해서 spool로 복사 — 복사하면서 SHA256 계산
+  2. dedup (up front, 순서대로): job 안의 같은 파일 / near-duplicate는 처음 것 1개만, 기존 논문
+     (exact hash → 페이지 텍스트 hash)은 thread-only pipeline으로 (upload와 같은 규칙).
+     job 안의 매칭은 job 로컬 hash 목록으로 — dedup index에는 /upload처럼 paper 등록 시점에만 기록
+     (등록 전에 실패한 paper가 index에 남아 이후 upload를 없는 paper로 보내지 않도록)
+  3. worker pool (BULK_IMPORT_WORKERS)에서 paper별 pipeline 실행. batch=True면 LLM 호출은 provider batch API
+     (services.llm_batch) — 결과를 기다리는 동안 worker가 block되므로 pool을 paper 수만큼 (LLM_BATCH_PIPELINE_WORKERS까지) 키움
+  4. chunk 저장은 ChunkWriter가 여러 paper를 모아서: Chroma는 임베딩 1번 + collection별 upsert,
+     Firestore는 컬렉션이 섞인 ≤500-op batch. pipeline은 ready 직전에만 자기 chunk 저장 완료를 기다림
+  5. 진행 상황: ImportJob.snapshot() — 헤드라인은 papersPerMin (끝난 paper 수 / 경과 분)
+
+job 상태는 프로세스 메모리에만 있음 (GET /papers/import/{jobId}는 job을 시작한 worker에서만 보임).
+
+CLI:
+    cd backend
+    python -m services.bulk_import ~/course/readings --user prof1
+    python -m services.bulk_import readings.zip --user prof1 --workers 16 --batch
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", "8"))
+_BATCH_WORKERS = int(os.getenv("LLM_BATCH_PIPELINE_WORKERS", "64"))
+_MAX_FILES = int(os.getenv("BULK_IMPORT_MAX_FILES", "1000"))
+_MAX_FILE_BYTES = int(os.getenv("MAX_UPLOAD_MB", "200")) * 1024 * 1024
+_WRITE_PAPERS = int(os.getenv("BULK_IMPORT_WRITE_PAPERS", "8"))
+_WRITE_CHUNKS = int(os.getenv("BULK_IMPORT_WRITE_CHUNKS", "2000"))
+_WRITE_WAIT_S = float(os.getenv("BULK_IMPORT_WRITE_WAIT_S", "2"))
+_COPY_CHUNK = 1024 * 1024
+
+_papers = metrics.Counter(
+    "coread_bulk_import_papers_total", "Files handled by bulk import jobs", ("result",),
+)
+_chunk_writes = metrics.Histogram(
+    "coread_bulk_import_chunk_write_papers", "Papers per bulk chunk write", buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+class Handlers(NamedTuple):
+    """api.papers가 넘기는 pipeline 진입점."""
+    find_near_duplicate: Callable[[str, str], tuple]   # (pdf_path, sha256) → (기존 paper_id | None, page_hashes)
+    run_new: Callable[..., str]                          # 신규 paper 등록 + 전체 pipeline → 최종 status
+    run_duplicate: Callable[..., str]                    # 기존 paper → thread-only pipeline → 최종 status
+
+
+# ──────────────────────────────────────────────
+# Chunk writer — 여러 paper의 chunk 저장을 묶음
+# ──────────────────────────────────────────────
+
+def _write_chunks(chunks_by_paper: dict) -> None:
+    from db import firestore, vector_store
+    vector_store.add_chunks_many(chunks_by_paper)
+    firestore.save_chunks_many(chunks_by_paper)
+
+
+class ChunkWriter:
+    """
+    submit(paper_id, chunks) → Future. max_papers / max_chunks가 차거나 첫 요청 후 max_wait_s가 지나면
+    모인 paper를 write()로 한 번에 씀. 실패하면 그 묶음의 Future 전부에 예외.
+    """
+
+    def __init__(
+        self,
+        max_papers: int = _WRITE_PAPERS,
+        max_chunks: int = _WRITE_CHUNKS,
+        max_wait_s: float = _WRITE_WAIT_S,
+        write: Callable[[dict], None] = _write_chunks,
+    ):
+        self.max_papers = max_papers
+        self.max_chunks = max_chunks
+        self.max_wait_s = max_wait_s
+        self._write = write
+        self._pending: list[tuple[str, list, Future]] = []
+        self._pending_chunks = 0
+        self._first_at = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+
+    def submit(self, paper_id: str, chunks: list) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="bulk-chunk-writer", daemon=True)
+                self._thread.start()
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((paper_id, chunks, future))
+            self._pending_chunks += len(chunks)
+            self._cond.notify()
+        return future
+
+    def close(self) -> None:
+        """남은 요청을 쓰고 thread 종료."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _due(self) -> bool:
+        return bool(self._pending) and (
+            self._closed
+            or len(self._pending) >= self.max_papers
+            or self._pending_chunks >= self.max_chunks
+            or time.monotonic() - self._first_at >= self.max_wait_s
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed:
+                        return
+                    timeout = self._first_at + self.max_wait_s - time.monotonic() if self._pending else None
+                    self._cond.wait(timeout)
+                batch, self._pending, self._pending_chunks = self._pending, [], 0
+            chunks_by_paper = {paper_id: chunks for paper_id, chunks, _ in batch}
+            try:
+                self._write(chunks_by_paper)
+            except Exception as e:
+                logger.error(f"[bulk_import] chunk write for {len(batch)} paper(s) failed: {e}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.writes += 1
+            _chunk_writes.observe(len(batch))
+            for _, _, future in batch:
+                future.set_result(None)
+
+
+# ──────────────────────────────────────────────
+# Job
+# ──────────────────────────────────────────────
+
+def _near_in_job(page_hashes: list, new_pages: list) -> Optional[str]:
+    """이 job에서 앞서 신규로 판정된 paper 중 near-duplicate (dedup_index.find_near_duplicate와 같은 점수)."""
+    from db.dedup_index import NEAR_THRESHOLD
+
+    if not page_hashes:
+        return None
+    wanted = set(page_hashes)
+    best, best_score = None, 0.0
+    for paper_id, pages, n in new_pages:
+        shared = len(wanted & pages)
+        score = min(shared / len(page_hashes), shared / max(n, 1))
+        if score >= NEAR_THRESHOLD and score > best_score:
+            best, best_score = paper_id, score
+    return best
+
+
+class _Entry:
+    __slots__ = ("filename", "path", "sha256", "status", "paper_id", "duplicate_of", "error", "page_hashes", "handed_off")
+
+    def __init__(self, filename: str, path: str, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.sha256 = sha256
+        self.status = "queued"       # queued → new / duplicate / skipped → running → ready / error
+        self.paper_id: Optional[str] = None
+        self.duplicate_of: Optional[str] = None
+        self.error: Optional[str] = None
+        self.page_hashes: list = []
+        self.handed_off = False      # spool 파일이 pipeline 소유가 됨 (Storage 업로드 / local 보관)
+
+    def snapshot(self) -> dict:
+        out = {"filename": self.filename, "status": self.status, "paperId": self.paper_id}
+        if self.duplicate_of:
+            out["duplicateOf"] = self.duplicate_of
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class ImportJob:
+    def __init__(
+        self,
+        source: str,
+        user_id: str,
+        handlers: Handlers,
+        spool_dir: str,
+        workers: int = _WORKERS,
+        batch: bool = False,
+        remove_source: bool = False,
+        writer: Optional[ChunkWriter] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.user_id = user_id
+        self.handlers = handlers
+        self.spool_dir = os.path.join(spool_dir, f"import-{self.id}")
+        self.workers = workers
+        self.batch = batch
+        self.remove_source = remove_source
+        self.writer = writer or ChunkWriter()
+        self.state = "pending"          # pending → scanning → deduping → running → done | failed
+        self.error: Optional[str] = None
+        self.entries: list[_Entry] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ImportJob":
+        self._thread = threading.Thread(target=self._run, name=f"bulk-import-{self.id[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    # ── 진행 상황 ──
+
+    def _counts(self) -> dict:
+        counts: dict[str, int] = {}
+        for entry in self.entries:
+            counts[entry.status] = counts.get(entry.status, 0) + 1
+        return counts
+
+    def snapshot(self, details: bool = False) -> dict:
+        with self._lock:
+            counts = self._counts()
+            papers = [e.snapshot() for e in self.entries] if details else None
+        finished = counts.get("ready", 0) + counts.get("error", 0)
+        remaining = counts.get("new", 0) + counts.get("duplicate", 0) + counts.get("running", 0)
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0.0
+        rate = finished / elapsed * 60 if elapsed > 0 else 0.0
+        out = {
+            "jobId": self.id,
+            "userId": self.user_id,
+            "state": self.state,
+            "batch": self.batch,
+            "papersPerMin": round(rate, 1),
+            "files": len(self.entries),
+            "ready": counts.get("ready", 0),
+            "failed": counts.get("error", 0),
+            "running": counts.get("running", 0),
+            "queued": remaining - counts.get("running", 0),
+            "duplicates": sum(1 for e in self.entries if e.duplicate_of),
+            "skipped": counts.get("skipped", 0),
+            "elapsedS": round(elapsed, 1),
+            "etaS": round(remaining / rate * 60, 1) if rate > 0 and remaining else None,
+            "chunkWrites": self.writer.writes,
+        }
+        if self.error:
+            out["error"] = self.error
+        if papers is not None:
+            out["papers"] = papers
+        return out
+
+    def headline(self) -> str:
+        s = self.snapshot()
+        return (
+            f"{s['papersPerMin']:.1f} papers/min — {s['ready']} ready, {s['failed']} failed, "
+            f"{s['running']} running, {s['queued']} queued of {s['files']} ({s['state']})"
+        )
+
+    # ── 실행 ──
+
+    def _run(self) -> None:
+        self.started_at = time.monotonic()
+        with _jobs_lock:
+            _jobs_active.add(self)
+        try:
+            self.state = "scanning"
+            self._scan()
+            self.state = "deduping"
+            self._dedup()
+            self.state = "running"
+            self._process()
+            self.state = "done"
+        except Exception as e:
+            logger.error(f"[bulk_import] job {self.id} failed: {e}", exc_info=True)
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self.writer.close()
+            self._cleanup()
+            if self.remove_source and os.path.isfile(self.source):
+                os.remove(self.source)
+            self.finished_at = time.monotonic()
+            with _jobs_lock:
+                _jobs_active.discard(self)
+            self._done.set()
+            logger.info(f"[bulk_import] job {self.id}: {self.headline()}")
+
+    def _cleanup(self) -> None:
+        # pipeline에 넘기지 않은 spool 파일 (중복 / 건너뜀 / 중단)만 삭제 — 넘긴 파일은 upload와 같은 규칙으로 처리됨
+        for entry in self.entries:
+            if entry.path and not entry.handed_off and os.path.exists(entry.path):
+                os.remove(entry.path)
+        try:
+            os.rmdir(self.spool_dir)
+        except OSError:
+            pass
+
+    def _scan(self) -> None:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        if zipfile.is_zipfile(self.source):
+            with zipfile.ZipFile(self.source) as archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or not name.lower().endswith(".pdf") or "__MACOSX/" in name:
+                        continue
+                    if self._too_many() or self._too_large(os.path.basename(name), info.file_size):
+                        continue
+                    with archive.open(info) as src:
+                        self._spool(os.path.basename(name), src)
+        elif os.path.isdir(self.source):
+            for root, dirs, files in os.walk(self.source):
+                dirs.sort()
+                for name in sorted(files):
+                    if not name.lower().endswith(".pdf"):
+                        continue
+                    path = os.path.join(root, name)
+                    if self._too_many() or self._too_large(name, os.path.getsize(path)):
+                        continue
+                    with open(path, "rb") as src:
+                        self._spool(name, src)
+        else:
+            raise ValueError(f"not a zip file or directory: {self.source}")
+        logger.info(f"[bulk_import] job {self.id}: {len(self.entries)} PDF(s) from {self.source}")
+
+    def _too_many(self) -> bool:
+        if len(self.entries) < _MAX_FILES:
+            return False
+        if len(self.entries) == _MAX_FILES:
+            logger.warning(f"[bulk_import] job {self.id}: more than {_MAX_FILES} PDFs — ignoring the rest")
+        return True
+
+    def _too_large(self, filename: str, size: int) -> bool:
+        if size <= _MAX_FILE_BYTES:
+            return False
+        entry = _Entry(filename, "", "")
+        entry.status = "skipped"
+        entry.error = f"larger than {_MAX_FILE_BYTES // (1024 * 1024)}MB"
+        self.entries.append(entry)
+        _papers.inc(1, "skipped")
+        return True
+
+    def _spool(self, filename: str, src) -> None:
+        """src를 spool 파일로 복사하면서 SHA256 계산 (원본 디렉터리 파일은 건드리지 않음)."""
+        path = os.path.join(self.spool_dir, f"{uuid.uuid4().hex}.pdf")
+        hasher = hashlib.sha256()
+        with open(path, "wb") as dst:
+            while True:
+                block = src.read(_COPY_CHUNK)
+                if not block:
+                    break
+                hasher.update(block)
+                dst.write(block)
+        with self._lock:
+            self.entries.append(_Entry(filename, path, hasher.hexdigest()))
+
+    def _dedup(self) -> None:
+        from db.firestore import find_paper_by_hash
+
+        candidates = [e for e in self.entries if e.status == "queued"]
+
+        def lookup(entry: _Entry) -> tuple:
+            existing = find_paper_by_hash(entry.sha256)
+            if existing:
+                return existing, []
+            return self.handlers.find_near_duplicate(entry.path, entry.sha256)
+
+        # 라이브러리 조회 + 페이지 fingerprint (PDF 파싱)는 병렬로 — 판정은 순서대로 (job 안에서는 첫 파일이 기준)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            found = list(pool.map(lookup, candidates))
+        in_job: dict[str, _Entry] = {}          # paper_id → 이 job에서 처음 그 paper로 판정된 entry
+        # 이 job의 신규 paper hash — dedup index에는 등록 (_register_new_paper의 save_paper_meta) 때만 기록되므로
+        # 등록 전에 실패한 paper가 index에 남지 않음. job 안의 매칭은 여기서
+        new_hashes: dict[str, str] = {}         # sha256 → paper_id
+        new_pages: list[tuple[str, set, int]] = []   # (paper_id, page hash set, 페이지 수)
+        for entry, (existing, page_hashes) in zip(candidates, found):
+            if not existing:
+                existing = new_hashes.get(entry.sha256) or _near_in_job(page_hashes, new_pages)
+            with self._lock:
+                if existing in in_job:
+                    entry.status = "skipped"
+                    entry.paper_id = existing
+                    entry.duplicate_of = in_job[existing].filename
+                elif existing:
+                    entry.status = "duplicate"
+                    entry.paper_id = existing
+                    entry.duplicate_of = existing
+                    in_job[existing] = entry
+                else:
+                    entry.status = "new"
+                    entry.paper_id = str(uuid.uuid4())
+                    in_job[entry.paper_id] = entry
+            if entry.status == "new":
+                new_hashes[entry.sha256] = entry.paper_id
+                if page_hashes:
+                    new_pages.append((entry.paper_id, set(page_hashes), len(page_hashes)))
+                entry.page_hashes = page_hashes
+            _papers.inc(1, entry.status)
+        counts = self._counts()
+        logger.info(
+            f"[bulk_import] job {self.id}: {counts.get('new', 0)} new, {counts.get('duplicate', 0)} already in "
+            f"library, {counts.get('skipped', 0)} skipped (duplicates inside the import / too large)"
+        )
+
+    def _process(self) -> None:
+        todo = [e for e in self.entries if e.status in ("new", "duplicate")]
+        if not todo:
+            return
+        workers = min(len(todo), max(self.workers, _BATCH_WORKERS)) if self.batch else self.workers
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-import") as pool:
+            for entry in todo:
+                pool.submit(self._process_one, entry)
+
+    def _process_one(self, entry: _Entry) -> None:
+        new = entry.status == "new"
+        with self._lock:
+            entry.status = "running"
+        try:
+            if new:
+                entry.handed_off = True
+                status = self.handlers.run_new(
+                    entry.paper_id, self.user_id, entry.path, entry.filename, entry.sha256,
+                    entry.page_hashes, self.writer.submit, self.batch,
+                )
+            else:
+                status = self.handlers.run_duplicate(entry.paper_id, self.user_id, entry.filename, self.batch)
+        except Exception as e:
+            logger.error(f"[bulk_import] {entry.filename} failed: {e}", exc_info=True)
+            status = "error"
+            entry.error = str(e)
+        with self._lock:
+            entry.status = "ready" if status == "ready" else "error"
+            finished = sum(1 for e in self.entries if e.status in ("ready", "error"))
+        _papers.inc(1, entry.status)
+        if finished % 10 == 0:
+            logger.info(f"[bulk_import] job {self.id}: {self.headline()}")
+
+
+# ──────────────────────────────────────────────
+# Registry
+# ──────────────────────────────────────────────
+
+_jobs: dict[str, ImportJob] = {}
+_jobs_active: set[ImportJob] = set()
+_jobs_lock = threading.Lock()
+_MAX_JOBS = 100     # 끝난 job은 최근 것만 보관
+
+
+def start(source: str, user_id: str, handlers: Handlers, spool_dir: str, **kwargs) -> ImportJob:
+    job = ImportJob(source, user_id, handlers, spool_dir, **kwargs)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        finished = [jid for jid, j in _jobs.items() if j.finished_at is not None]
+        for jid in finished[:max(0, len(_jobs) - _MAX_JOBS)]:
+            del _jobs[jid]
+    return job.start()
+
+
+def get(job_id: str) -> Optional[ImportJob]:
+    return _jobs.get(job_id)
+
+
+def _collect() -> list[str]:
+    with _jobs_lock:
+        jobs = list(_jobs_active)
+    rate = sum(job.snapshot()["papersPerMin"] for job in jobs)
+    return [
+        "# TYPE coread_bulk_import_jobs_active gauge",
+        f"coread_bulk_import_jobs_active {len(jobs)}",
+        "# TYPE coread_bulk_import_papers_per_minute gauge",
+        f"coread_bulk_import_papers_per_minute {rate:.2f}",
+    ]
+
+
+metrics.register_collector(_collect)
+
+
+# ──────────────────────────────────────────────
+# CLI
+# ──────────────────────────────────────────────
+
+def main() -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of PDFs or a .zip")
+    parser.add_argument("--user", default="anonymous", help="userId whose library receives the papers")
+    parser.add_argument("--workers", type=int, default=_WORKERS)
+    parser.add_argument("--batch", action="store_true", help="use provider batch APIs for LLM stages")
+    parser.add_argument("--interval", type=float, default=10.0, help="progress report interval (s)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    from api import papers
+    from db import write_behind
+
+    job = papers.start_import(os.path.abspath(args.source), args.user, batch=args.batch, workers=args.workers)
+    while not job.wait(args.interval):
+        print(f"[bulk_import] {job.headline()}", flush=True)
+    write_behind.flush(timeout=None)
+    print(json.dumps(job.snapshot(details=True), indent=2, ensure_ascii=False))
+    return 0 if job.state == "done" and not job.snapshot()["failed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,163 @@
+"""
+Bounded Cache — 엔트리 수 / 대략적 byte 크기 / TTL로 제한되는 thread-safe LRU cache.
+
+프로세스가 만지는 모든 paper·user 데이터를 계속 쌓아두면 장시간 실행 pod가 OOM으로 죽음.
+캐시마다 hit / miss / eviction / expiration 통계를 유지하고 /metrics로 노출.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from services import metrics
+
+_MISSING = object()
+
+
+def approx_size(obj: Any, _depth: int = 0) -> int:
+    """JSON 형태 객체(dict/list/str/number)의 대략적 메모리 크기 (bytes)."""
+    if _depth > 8:
+        return sys.getsizeof(obj)
+    if isinstance(obj, str):
+        return 49 + len(obj)
+    if isinstance(obj, dict):
+        return 64 + sum(
+            approx_size(k, _depth + 1) + approx_size(v, _depth + 1) + 16 for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        return 56 + sum(approx_size(v, _depth + 1) + 8 for v in obj)
+    nbytes = getattr(obj, "nbytes", None)   # ChunkTable 등 자체 크기 계산 객체
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(obj)
+
+
+class BoundedCache:
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Callable[[Any], int] = approx_size,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        # key → (value, size, expires_at)
+        self._data: "OrderedDict[str, tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        _caches.append(self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[2] is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def set(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        if size is None:
+            size = self._sizeof(value)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self.evictions += 1   # 단일 값이 한도 초과 — 캐시하지 않음
+                return
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            self._evict()
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # ── internals (lock held) ──
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        if self.ttl:
+            # 가장 오래 안 쓰인 쪽부터 만료 확인 (LRU 순서 ≈ 만료 순서)
+            while self._data:
+                key, (_, _, expires_at) = next(iter(self._data.items()))
+                if expires_at is None or expires_at >= now:
+                    break
+                self._remove(key)
+                self.expirations += 1
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            key = next(iter(self._data))
+            self._remove(key)
+            self.evictions += 1
+
+
+_caches: list[BoundedCache] = []
+
+
+def _collect() -> list[str]:
+    lines: list[str] = []
+    counters = ("hits", "misses", "evictions", "expirations")
+    gauges = ("entries", "bytes")
+    rows = [(c.name, c.stats()) for c in _caches]
+    for key in counters + gauges:
+        name = f"coread_cache_{key}" + ("_total" if key in counters else "")
+        kind = "counter" if key in counters else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, stats in rows:
+            lines.append(f'{name}{{cache="{cache_name}"}} {stats[key]}')
+    return lines
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,202 @@
+"""
+Circuit Breaker — 외부 의존성 (Firestore, Storage) 장애 시 호출을 잠시 끊었다가 자동 복구.
+
+상태:
+  closed    — 정상. 최근 window 내 실패율이 임계치를 넘으면 open
+  open      — 호출 차단 (호출부는 no-op/빈값). cooldown이 지나면 half_open
+  half_open — probe 호출만 허용. 성공하면 closed, 실패하면 cooldown을 2배로 늘려 다시 open
+
+에러 분류:
+  - 권한/인증 에러 (PermissionDenied, Unauthenticated, Forbidden, 자격증명 에러): 설정 문제라
+    곧 회복되지 않음 → 즉시 open, 최대 cooldown
+  - transient 에러 (네트워크, UNAVAILABLE, DEADLINE_EXCEEDED 등): 실패율 window에 집계
+  - 그 외 (NotFound, InvalidArgument 등 호출 자체의 문제): 의존성 상태와 무관 → 집계 안 함
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_PERMISSION_ERRORS = {
+    "PermissionDenied", "Unauthenticated", "Forbidden", "Unauthorized",
+    "DefaultCredentialsError", "RefreshError",
+}
+_TRANSIENT_ERRORS = {
+    "ServiceUnavailable", "DeadlineExceeded", "Aborted", "InternalServerError",
+    "ResourceExhausted", "TooManyRequests", "GatewayTimeout", "RetryError",
+    "TransportError", "FakeServiceUnavailable",
+}
+
+_transitions = metrics.Counter(
+    "coread_breaker_transitions_total", "Circuit breaker state transitions", ("breaker", "to"),
+)
+_state_gauge = metrics.Gauge(
+    "coread_breaker_state", "Circuit breaker state (0=closed, 1=half_open, 2=open)", ("breaker",),
+)
+_rejected = metrics.Counter(
+    "coread_breaker_rejected_total", "Calls short-circuited by an open breaker", ("breaker",),
+)
+
+
+def classify(e: BaseException) -> str:
+    """'permission' | 'transient' | 'other'."""
+    names = {cls.__name__ for cls in type(e).__mro__}
+    if names & _PERMISSION_ERRORS:
+        return "permission"
+    if names & _TRANSIENT_ERRORS or isinstance(e, OSError):   # ConnectionError, TimeoutError 포함
+        return "transient"
+    return "other"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: float = 60.0,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        base_cooldown: float = 5.0,
+        max_cooldown: float = 300.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self._events: deque = deque()     # (monotonic time, ok)
+        self._cooldown = base_cooldown
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+        self.last_change = time.time()
+        _breakers.append(self)
+        _state_gauge.set(0, name)
+
+    # ── gate ──
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self._cooldown:
+                    _rejected.inc(1, self.name)
+                    return False
+                self._transition(HALF_OPEN)
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    _rejected.inc(1, self.name)
+                    return False
+                self._probes += 1
+            return True
+
+    def retry_after(self) -> float:
+        """
+        지금 호출해도 allow()가 거절할 동안 기다릴 시간 (초). 0이면 호출 가능 (closed, 또는 이번 호출이 probe).
+        open이면 cooldown 남은 시간, half_open인데 probe 슬롯이 다 찼으면 probe 결과가 나올 때까지 짧게 재확인.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return max(0.0, self._cooldown - (time.monotonic() - self._opened_at))
+            if self.state == HALF_OPEN and self._probes >= self.half_open_probes:
+                return min(1.0, self.base_cooldown)
+            return 0.0
+
+    # ── outcomes ──
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._cooldown = self.base_cooldown
+                self._events.clear()
+                self._transition(CLOSED)
+                return
+            self._add_event(True)
+
+    def record_failure(self, e: BaseException) -> str:
+        """실패 기록. 에러 분류 반환."""
+        kind = classify(e)
+        with self._lock:
+            if kind == "other":
+                if self.state == HALF_OPEN:
+                    self._probes = max(0, self._probes - 1)   # probe가 판정 못 함 → 다음 호출이 다시 probe
+                return kind
+            self.last_error = f"{type(e).__name__}: {e}"[:300]
+            if kind == "permission":
+                self._open(self.max_cooldown)
+            elif self.state == HALF_OPEN:
+                self._open(min(self._cooldown * 2, self.max_cooldown))
+            else:
+                self._add_event(False)
+                total = len(self._events)
+                failures = sum(1 for _, ok in self._events if not ok)
+                if total >= self.min_calls and failures / total >= self.failure_rate:
+                    self._open(self._cooldown)
+        return kind
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = len(self._events)
+            failures = sum(1 for _, ok in self._events if not ok)
+            out = {
+                "state": self.state,
+                "failureRate": round(failures / total, 3) if total else 0.0,
+                "calls": total,
+                "cooldownSeconds": self._cooldown,
+                "since": self.last_change,
+            }
+            if self.state == OPEN:
+                out["retryAfterSeconds"] = round(
+                    max(0.0, self._cooldown - (time.monotonic() - self._opened_at)), 1
+                )
+            if self.last_error:
+                out["lastError"] = self.last_error
+            return out
+
+    # ── internals (lock held) ──
+
+    def _add_event(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._events.append((now, ok))
+        while self._events and now - self._events[0][0] > self.window:
+            self._events.popleft()
+
+    def _open(self, cooldown: float) -> None:
+        self._cooldown = cooldown
+        self._opened_at = time.monotonic()
+        self._events.clear()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state and state != OPEN:
+            return
+        self.state = state
+        self.last_change = time.time()
+        if state == OPEN:
+            logger.warning(
+                f"[breaker] {self.name} open for {self._cooldown:.1f}s (last error: {self.last_error})"
+            )
+        else:
+            logger.info(f"[breaker] {self.name} {state}")
+        _transitions.inc(1, self.name, state)
+        _state_gauge.set(_STATE_VALUE[state], self.name)
+
+
+_breakers: list[CircuitBreaker] = []
+
+
+def snapshot_all() -> dict:
+    return {b.name: b.snapshot() for b in _breakers}
@@ -0,0 +1,145 @@
+"""
+JSON 응답 파싱 — structured output 보조 + streaming incremental parser.
+
+- parse_json(raw): ```json fence 제거 후 파싱. 앞뒤 잡음이 있으면 첫 '{' ~ 마지막 '}'만 재시도.
+- JsonArrayStream(key): {"<key>": [ {...}, {...} ]} 형태의 응답을 chunk 단위로 feed하면
+  배열 원소가 닫히는 즉시 dict로 반환. 원소 하나가 깨져도 나머지는 살림.
+"""
+import json
+import logging
+import re
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_FENCE_OPEN = re.compile(r"^```[a-zA-Z]*\n?")
+_FENCE_CLOSE = re.compile(r"```$")
+
+
+def parse_json(raw: str) -> Any:
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = _FENCE_OPEN.sub("", raw)
+        raw = _FENCE_CLOSE.sub("", raw.strip())
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        start, end = raw.find("{"), raw.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(raw[start:end + 1])
+
+
+class JsonArrayStream:
+    """
+    Top-level object의 `key` 배열 원소를 완성되는 대로 꺼내는 incremental parser.
+
+    문자열/escape 상태와 괄호 depth만 추적하는 단순 상태 기계.
+    feed()는 새로 들어온 문자만 스캔하므로 전체 비용은 응답 길이에 선형.
+    """
+
+    def __init__(self, key: str):
+        self._key = key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._str_start = -1
+        self._last_key: str | None = None
+        self._await_value = False      # depth 1에서 key 다음 ':'를 본 상태
+        self._array_depth = 0           # 대상 배열 내부 depth (0 = 아직 못 찾음)
+        self._elem_start = -1
+        self.done = False
+        self.errors = 0
+
+    def feed(self, chunk: str) -> list:
+        """chunk를 추가하고 이번에 완성된 원소 리스트 반환."""
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        items: list = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._depth == 1 and not self._array_depth:
+                        self._last_key = self._decode_str(self._str_start, i + 1)
+                continue
+
+            if ch == '"':
+                if self._depth >= 1:
+                    self._in_str = True
+                    self._str_start = i
+                    self._begin_elem(i)
+                continue
+
+            if ch in "{[":
+                if self._depth == 1 and ch == "[" and self._await_value and self._last_key == self._key:
+                    self._array_depth = 2
+                    self._await_value = False
+                else:
+                    self._begin_elem(i)
+                self._depth += 1
+                continue
+
+            if ch in "}]":
+                self._depth -= 1
+                if self._array_depth and self._depth < self._array_depth:
+                    # 대상 배열 종료 — 마지막 scalar 원소 처리 후 완료
+                    self._end_elem(i, items)
+                    self.done = True
+                    self._pos = i + 1
+                    return items
+                if self._array_depth and self._depth == self._array_depth:
+                    self._end_elem(i + 1, items)
+                continue
+
+            if ch == ":" and self._depth == 1:
+                self._await_value = True
+                continue
+
+            if ch == ",":
+                if self._depth == 1:
+                    self._await_value = False
+                elif self._array_depth and self._depth == self._array_depth:
+                    self._end_elem(i, items)
+                continue
+
+            if not ch.isspace():
+                self._begin_elem(i)
+
+        self._pos = len(text)
+        return items
+
+    # ── internals ──
+
+    def _begin_elem(self, i: int) -> None:
+        if self._array_depth and self._depth == self._array_depth and self._elem_start == -1:
+            self._elem_start = i
+
+    def _end_elem(self, end: int, items: list) -> None:
+        if self._elem_start == -1:
+            return
+        raw = self._text[self._elem_start:end].strip()
+        self._elem_start = -1
+        if not raw:
+            return
+        try:
+            items.append(json.loads(raw))
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            logger.debug(f"[json_stream] skipping malformed element in '{self._key}': {e}")
+
+    def _decode_str(self, start: int, end: int) -> str | None:
+        try:
+            return json.loads(self._text[start:end])
+        except json.JSONDecodeError:
+            return None
@@ -0,0 +1,429 @@
+"""
+LLM Batch mode — 지연이 중요하지 않은 pipeline 호출을 provider batch API로 모아서 제출.
+
+bulk import / 라이브러리 전체 재처리처럼 결과를 몇 시간 뒤에 받아도 되는 작업용 (batch API는 단가 ~50%,
+rate limit도 별도). pipeline 코드는 그대로:
+  - pipeline thread에서 `with llm_batch.use(get_collector()):` 안에서 stage를 실행하면
+    llm_service.complete / complete_json / stream_json_items가 실시간 호출 대신 collector에 요청을 넣고
+    결과를 기다림 (contextvar — asyncio.run이 만든 task들도 상속)
+  - collector는 여러 paper의 요청을 (provider, model)별로 모아 max_requests개 또는 max_wait_s마다 batch 1개로
+    제출하고, background thread가 poll_s마다 상태를 확인 → 결과가 오면 해당 요청의 future를 깨움
+    → 그 paper의 pipeline이 다음 stage로 진행
+  - batch 전체 실패 / 개별 요청 실패는 해당 호출의 예외로 전달 (stage의 기존 에러 처리 그대로)
+
+provider:
+  openai    — Files API (purpose=batch) + /v1/batches, endpoint /v1/chat/completions
+  anthropic — Message Batches API
+  fake      — 프로세스 내 가짜 batch 서버 (LLM_BATCH_PROVIDER=fake, 테스트 / 개발용).
+              latency_s 뒤 완료, 응답은 responder(provider, body) 또는 response schema의 최소 객체
+google은 batch 미지원 → 실시간 호출 그대로.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_PROVIDERS = ("openai", "anthropic")
+_TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+_requests = metrics.Counter(
+    "coread_llm_batch_requests_total", "LLM requests sent through provider batch APIs", ("provider", "result"),
+)
+
+
+class BatchError(RuntimeError):
+    pass
+
+
+# ──────────────────────────────────────────────
+# Providers — submit(requests) → batch id, status(id) → str, results(id) → {custom_id: (ok, body | error)}
+# ──────────────────────────────────────────────
+
+class OpenAIBatchProvider:
+    name = "openai"
+
+    def __init__(self):
+        from openai import OpenAI
+        self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def submit(self, requests: list) -> str:
+        lines = "\n".join(
+            json.dumps({"custom_id": cid, "method": "POST", "url": "/v1/chat/completions", "body": body})
+            for cid, body in requests
+        )
+        upload = self._client.files.create(file=("batch.jsonl", lines.encode()), purpose="batch")
+        batch = self._client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self._client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> dict:
+        batch = self._client.batches.retrieve(batch_id)
+        out = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self._client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                response = row.get("response") or {}
+                if response.get("status_code") == 200:
+                    out[row["custom_id"]] = (True, response["body"])
+                else:
+                    out[row["custom_id"]] = (False, str(row.get("error") or response.get("body")))
+        return out
+
+
+class AnthropicBatchProvider:
+    name = "anthropic"
+
+    def __init__(self):
+        from anthropic import Anthropic
+        self._client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+    def submit(self, requests: list) -> str:
+        batch = self._client.messages.batches.create(
+            requests=[{"custom_id": cid, "params": body} for cid, body in requests],
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        status = self._client.messages.batches.retrieve(batch_id).processing_status
+        return "completed" if status == "ended" else status
+
+    def results(self, batch_id: str) -> dict:
+        out = {}
+        for row in self._client.messages.batches.results(batch_id):
+            if row.result.type == "succeeded":
+                out[row.custom_id] = (True, row.result.message.model_dump())
+            else:
+                out[row.custom_id] = (False, row.result.type)
+        return out
+
+
+class FakeBatchProvider:
+    """가짜 batch 서버 — 제출 latency_s 뒤 완료. provider 형식 (openai / anthropic)의 응답 body를 만들어 줌."""
+
+    def __init__(self, kind: str, latency_s: float = 2.0, responder: Optional[Callable[[str, dict], str]] = None):
+        self.name = f"fake-{kind}"
+        self.kind = kind
+        self.latency_s = latency_s
+        self.responder = responder or _minimal_response
+        self.batches: dict[str, tuple[float, list]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, requests: list) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.batches[batch_id] = (time.monotonic() + self.latency_s, list(requests))
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        with self._lock:
+            ready_at, _ = self.batches[batch_id]
+        return "completed" if time.monotonic() >= ready_at else "in_progress"
+
+    def results(self, batch_id: str) -> dict:
+        with self._lock:
+            _, requests = self.batches.pop(batch_id)
+        out = {}
+        for cid, body in requests:
+            try:
+                text = self.responder(self.kind, body)
+            except Exception as e:
+                out[cid] = (False, str(e))
+                continue
+            out[cid] = (True, _fake_body(self.kind, body, text))
+        return out
+
+
+def _fake_body(kind: str, body: dict, text: str) -> dict:
+    usage_in = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+    usage_out = len(text) // 4
+    if kind == "openai":
+        return {
+            "choices": [{"message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": usage_in, "completion_tokens": usage_out},
+        }
+    if body.get("tools"):
+        content = [{"type": "tool_use", "name": body["tools"][0]["name"], "input": json.loads(text)}]
+    else:
+        content = [{"type": "text", "text": text}]
+    return {"content": content, "usage": {"input_tokens": usage_in, "output_tokens": usage_out}}
+
+
+def _minimal_response(kind: str, body: dict) -> str:
+    """response schema가 있으면 그 schema의 최소 객체 (필수 필드만, 배열은 비움), 없으면 'ok'."""
+    schema = None
+    if kind == "openai":
+        schema = ((body.get("response_format") or {}).get("json_schema") or {}).get("schema")
+    elif body.get("tools"):
+        schema = body["tools"][0]["input_schema"]
+    return json.dumps(_minimal(schema)) if schema else "ok"
+
+
+def _minimal(schema: dict):
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = kind[0]
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {key: _minimal(props.get(key, {})) for key in schema.get("required", [])}
+    return {"array": [], "string": "", "integer": 0, "number": 0, "boolean": False}.get(kind)
+
+
+def _make_provider(provider: str):
+    mode = os.getenv("LLM_BATCH_PROVIDER", "auto")
+    if mode == "fake":
+        return FakeBatchProvider(provider, latency_s=float(os.getenv("LLM_BATCH_FAKE_LATENCY_S", "2")))
+    return OpenAIBatchProvider() if provider == "openai" else AnthropicBatchProvider()
+
+
+# ──────────────────────────────────────────────
+# Collector
+# ──────────────────────────────────────────────
+
+class _Pending:
+    __slots__ = ("custom_id", "body", "loop", "future")
+
+    def __init__(self, custom_id: str, body: dict, loop, future):
+        self.custom_id = custom_id
+        self.body = body
+        self.loop = loop
+        self.future = future
+
+
+class BatchCollector:
+    """
+    여러 thread / event loop의 요청을 모아 batch로 제출하고 결과를 돌려줌.
+    background thread 1개가 flush (max_wait_s)와 poll (poll_s)을 담당.
+    """
+
+    def __init__(
+        self,
+        provider_factory: Callable[[str], object] = _make_provider,
+        max_requests: int = 1000,
+        max_wait_s: float = 60.0,
+        poll_s: float = 30.0,
+    ):
+        self._factory = provider_factory
+        self.max_requests = max_requests
+        self.max_wait_s = max_wait_s
+        self.poll_s = poll_s
+        self._providers: dict[str, object] = {}
+        self._pending: dict[tuple, list[_Pending]] = {}     # (provider, model) → 대기 요청
+        self._first_at: dict[tuple, float] = {}
+        self._inflight: dict[str, tuple] = {}              # batch_id → (provider, {custom_id: _Pending}, next_poll)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0          # 제출한 요청 수
+        self.batches_submitted = 0
+
+    async def submit(self, provider: str, model: str, body: dict) -> dict:
+        """요청 1개를 batch에 넣고 provider 응답 body (dict)를 기다림."""
+        loop = asyncio.get_running_loop()
+        item = _Pending(uuid.uuid4().hex, body, loop, loop.create_future())
+        key = (provider, model)
+        with self._lock:
+            first = key not in self._pending
+            self._pending.setdefault(key, []).append(item)
+            self._first_at.setdefault(key, time.monotonic())
+            full = len(self._pending[key]) >= self.max_requests
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-batch", daemon=True)
+                self._thread.start()
+        if first or full:
+            self._wakeup.set()   # 다음 flush 시각 재계산
+        return await item.future
+
+    def flush(self) -> None:
+        """대기 요청을 바로 제출 (max_wait_s를 기다리지 않음)."""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self._submit(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": sum(len(v) for v in self._pending.values()),
+                "batches": len(self._inflight),
+                "inflightRequests": sum(len(v[1]) for v in self._inflight.values()),
+                "submitted": self.submitted,
+                "batchesSubmitted": self.batches_submitted,
+            }
+
+    # ── background ──
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self._next_wake())
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    key for key, items in self._pending.items()
+                    if len(items) >= self.max_requests or now - self._first_at[key] >= self.max_wait_s
+                ]
+            for key in due:
+                self._submit(key)
+            self._poll()
+
+    def _next_wake(self) -> Optional[float]:
+        """다음 flush / poll까지 남은 시간 (초). 할 일이 없으면 새 요청이 깨울 때까지 대기."""
+        with self._lock:
+            due = [at + self.max_wait_s for at in self._first_at.values()]
+            due += [v[2] for v in self._inflight.values()]
+        if not due:
+            return None
+        return max(0.0, min(due) - time.monotonic())
+
+    def _provider(self, provider: str):
+        if provider not in self._providers:
+            self._providers[provider] = self._factory(provider)
+        return self._providers[provider]
+
+    def _submit(self, key: tuple) -> None:
+        with self._lock:
+            items = self._pending.pop(key, [])
+            self._first_at.pop(key, None)
+        if not items:
+            return
+        provider = key[0]
+        for start in range(0, len(items), self.max_requests):
+            chunk = items[start:start + self.max_requests]
+            try:
+                batch_id = self._provider(provider).submit([(p.custom_id, p.body) for p in chunk])
+            except Exception as e:
+                logger.error(f"[llm_batch] submit failed ({provider}, {len(chunk)} requests): {e}")
+                _requests.inc(len(chunk), provider, "submit_error")
+                self._reject(chunk, BatchError(f"batch submit failed: {e}"))
+                continue
+            with self._lock:
+                self._inflight[batch_id] = (provider, {p.custom_id: p for p in chunk}, time.monotonic() + self.poll_s)
+                self.submitted += len(chunk)
+                self.batches_submitted += 1
+            logger.info(f"[llm_batch] submitted {batch_id}: {len(chunk)} {provider} request(s) ({key[1]})")
+
+    def _poll(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = [(bid, v) for bid, v in self._inflight.items() if v[2] <= now]
+        for batch_id, (provider, items, _) in due:
+            try:
+                status = self._provider(provider).status(batch_id)
+            except Exception as e:
+                logger.warning(f"[llm_batch] poll failed for {batch_id}: {e}")
+                status = None
+            if status not in _TERMINAL:
+                with self._lock:
+                    self._inflight[batch_id] = (provider, items, time.monotonic() + self.poll_s)
+                continue
+            with self._lock:
+                self._inflight.pop(batch_id, None)
+            try:
+                results = self._provider(provider).results(batch_id) if status == "completed" else {}
+            except Exception as e:
+                logger.error(f"[llm_batch] fetching results for {batch_id} failed: {e}")
+                results = {}
+            ok = 0
+            for custom_id, item in items.items():
+                success, payload = results.get(custom_id, (False, f"batch {status}"))
+                if success:
+                    ok += 1
+                    _resolve(item, payload)
+                else:
+                    _resolve(item, BatchError(f"batch request failed: {payload}"))
+            _requests.inc(ok, provider, "ok")
+            _requests.inc(len(items) - ok, provider, "error")
+            logger.info(f"[llm_batch] {batch_id} {status}: {ok}/{len(items)} succeeded")
+
+    def _reject(self, items: list, error: Exception) -> None:
+        for item in items:
+            _resolve(item, error)
+
+
+def _resolve(item: _Pending, value) -> None:
+    def settle():
+        if item.future.done():
+            return
+        if isinstance(value, Exception):
+            item.future.set_exception(value)
+        else:
+            item.future.set_result(value)
+    try:
+        item.loop.call_soon_threadsafe(settle)
+    except RuntimeError:   # 요청한 pipeline thread의 loop가 이미 닫힘
+        pass
+
+
+# ──────────────────────────────────────────────
+# Context routing
+# ──────────────────────────────────────────────
+
+_collector_var: contextvars.ContextVar[Optional[BatchCollector]] = contextvars.ContextVar("llm_batch", default=None)
+
+
+def active() -> Optional[BatchCollector]:
+    return _collector_var.get()
+
+
+@contextmanager
+def use(collector: BatchCollector):
+    """블록 안의 (pipeline) LLM 호출을 collector로 보냄. pipeline thread에서 asyncio.run 바깥에 씀."""
+    token = _collector_var.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector_var.reset(token)
+
+
+_collector: Optional[BatchCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_collector() -> BatchCollector:
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                _collector = BatchCollector(
+                    max_requests=int(os.getenv("LLM_BATCH_MAX_REQUESTS", "1000")),
+                    max_wait_s=float(os.getenv("LLM_BATCH_MAX_WAIT_S", "60")),
+                    poll_s=float(os.getenv("LLM_BATCH_POLL_S", "30")),
+                )
+    return _collector
+
+
+def _collect() -> list[str]:
+    if _collector is None:
+        return []
+    stats = _collector.stats()
+    return [
+        "# TYPE coread_llm_batch_pending gauge",
+        f"coread_llm_batch_pending {stats['pending']}",
+        "# TYPE coread_llm_batch_inflight_requests gauge",
+        f"coread_llm_batch_inflight_requests {stats['inflightRequests']}",
+        "# TYPE coread_llm_batch_inflight gauge",
+        f"coread_llm_batch_inflight {stats['batches']}",
+    ]
+
+
+metrics.register_collector(_collect)
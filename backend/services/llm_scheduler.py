@@ -0,0 +1,296 @@
+"""
+LLM Scheduler — llm_service 앞단의 fair-share admission control.
+
+한 사용자가 논문 30편을 한꺼번에 올리면 pipeline LLM 호출이 provider rate limit을 다 차지해서 학생 chat
+지연이 튐. 모든 LLM 호출 (streaming은 끝날 때까지)은 slot()으로 in-flight 1칸을 잡고 실행:
+
+  - priority class: interactive (chat / routing) > pipeline (그 외 stage). 빈 칸이 생기면 interactive
+    대기열부터 처리하고, pipeline은 LLM_PIPELINE_MAX_INFLIGHT까지만 → interactive용 여유가 항상 남음
+  - class 안에서는 start-time fair queuing (WFQ 근사): flow = (tenant, user). 호출마다
+      start = max(V, flow.finish), flow.finish = start + cost,  cost = tenant의 대기 중 user 수
+    start가 가장 작은 flow부터 처리 → tenant끼리 균등, tenant 안에서는 user끼리 균등.
+    tenant 태그가 없으면 user 자체가 tenant (= user 단위 균등)
+  - concurrency ceiling: 전체 / class / user (class별) / paper (pipeline만)
+
+pipeline은 thread마다 asyncio.run()으로 별도 event loop를 돌림 → 상태는 threading.Lock으로 보호하고
+대기자는 자기 loop의 future로 깨움 (call_soon_threadsafe). class / user / paper는 metrics 태그에서 읽음.
+대기 시간은 coread_llm_queue_wait_seconds{class}.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+PIPELINE = "pipeline"
+_CLASSES = (INTERACTIVE, PIPELINE)            # 우선순위 순
+_INTERACTIVE_STAGES = {"chat", "routing"}
+
+_wait = metrics.Histogram(
+    "coread_llm_queue_wait_seconds", "Time LLM calls waited for admission", ("class",),
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class _Flow:
+    __slots__ = ("key", "tenant", "finish", "waiters")
+
+    def __init__(self, key: tuple, tenant: str):
+        self.key = key
+        self.tenant = tenant
+        self.finish = 0.0
+        self.waiters: deque = deque()
+
+
+class _Waiter:
+    __slots__ = ("cls", "flow", "user", "paper", "start", "seq", "loop", "future", "granted", "enqueued")
+
+    def __init__(self, cls: str, flow: _Flow, user: str, paper: str, start: float, seq: int, loop, future):
+        self.cls = cls
+        self.flow = flow
+        self.user = user
+        self.paper = paper
+        self.start = start
+        self.seq = seq
+        self.loop = loop
+        self.future = future
+        self.granted = False
+        self.enqueued = time.perf_counter()
+
+
+class Scheduler:
+    def __init__(
+        self,
+        max_inflight: int = 32,
+        class_max: Optional[dict] = None,
+        user_max: Optional[dict] = None,
+        paper_max: int = 4,
+    ):
+        self.max_inflight = max_inflight
+        self.class_max = class_max or {INTERACTIVE: max_inflight, PIPELINE: max(1, max_inflight * 3 // 4)}
+        self.user_max = user_max or {INTERACTIVE: 4, PIPELINE: 8}
+        self.paper_max = paper_max
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._flows: dict[str, dict[tuple, _Flow]] = {cls: {} for cls in _CLASSES}
+        self._vtime = {cls: 0.0 for cls in _CLASSES}
+        self._inflight = 0
+        self._class_inflight = defaultdict(int)
+        self._user_inflight = defaultdict(int)     # (cls, user)
+        self._paper_inflight = defaultdict(int)    # paper (pipeline만)
+        self._queued = defaultdict(int)
+
+    # ── admission ──
+
+    async def acquire(self, cls: str, user: str = "", paper: str = "", tenant: str = "") -> _Waiter:
+        loop = asyncio.get_running_loop()
+        user = user or "anonymous"
+        tenant = tenant or user
+        with self._lock:
+            flows = self._flows[cls]
+            key = (tenant, user)
+            flow = flows.get(key)
+            if flow is None:
+                flow = flows[key] = _Flow(key, tenant)
+            # tenant 안에서 대기 중인 user 수만큼 비싸게 → tenant 몫을 user끼리 나눔
+            cost = sum(1 for f in flows.values() if f.tenant == tenant and (f.waiters or f is flow))
+            start = max(self._vtime[cls], flow.finish)
+            flow.finish = start + cost
+            waiter = _Waiter(cls, flow, user, paper, start, next(self._seq), loop, loop.create_future())
+            flow.waiters.append(waiter)
+            self._queued[cls] += 1
+            wake = self._dispatch()
+        self._wake(wake, skip=waiter)
+        if not waiter.granted:
+            try:
+                await waiter.future
+            except BaseException:
+                with self._lock:
+                    if waiter.granted:
+                        wake = self._release(waiter)
+                    else:
+                        self._dequeue(waiter)
+                        wake = []
+                self._wake(wake)
+                raise
+        _wait.observe(time.perf_counter() - waiter.enqueued, cls)
+        return waiter
+
+    def release(self, waiter: _Waiter) -> None:
+        with self._lock:
+            wake = self._release(waiter)
+        self._wake(wake)
+
+    # ── internals (self._lock 보유 상태에서 호출) ──
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        try:
+            waiter.flow.waiters.remove(waiter)
+            self._queued[waiter.cls] -= 1
+        except ValueError:
+            pass
+        self._gc_flow(waiter.flow, waiter.cls)
+
+    def _gc_flow(self, flow: _Flow, cls: str) -> None:
+        # 대기자 없고 finish가 virtual time보다 과거인 flow는 제거 (다시 오면 V부터 시작 — 결과 동일)
+        if not flow.waiters and flow.finish <= self._vtime[cls]:
+            self._flows[cls].pop(flow.key, None)
+
+    def _eligible(self, waiter: _Waiter) -> bool:
+        if self._user_inflight[(waiter.cls, waiter.user)] >= self.user_max[waiter.cls]:
+            return False
+        if waiter.cls == PIPELINE and waiter.paper and self._paper_inflight[waiter.paper] >= self.paper_max:
+            return False
+        return True
+
+    def _pick(self) -> Optional[_Waiter]:
+        for cls in _CLASSES:
+            if self._class_inflight[cls] >= self.class_max[cls] or not self._queued[cls]:
+                continue
+            best = None
+            for flow in self._flows[cls].values():
+                if not flow.waiters:
+                    continue
+                head = flow.waiters[0]
+                if not self._eligible(head):
+                    continue
+                if best is None or (head.start, head.seq) < (best.start, best.seq):
+                    best = head
+            if best is not None:
+                return best
+        return None
+
+    def _dispatch(self) -> list:
+        granted = []
+        while self._inflight < self.max_inflight:
+            waiter = self._pick()
+            if waiter is None:
+                break
+            waiter.flow.waiters.popleft()
+            self._queued[waiter.cls] -= 1
+            self._vtime[waiter.cls] = max(self._vtime[waiter.cls], waiter.start)
+            waiter.granted = True
+            self._inflight += 1
+            self._class_inflight[waiter.cls] += 1
+            self._user_inflight[(waiter.cls, waiter.user)] += 1
+            if waiter.cls == PIPELINE and waiter.paper:
+                self._paper_inflight[waiter.paper] += 1
+            granted.append(waiter)
+        return granted
+
+    def _release(self, waiter: _Waiter) -> list:
+        self._inflight -= 1
+        self._class_inflight[waiter.cls] -= 1
+        user_key = (waiter.cls, waiter.user)
+        self._user_inflight[user_key] -= 1
+        if not self._user_inflight[user_key]:
+            del self._user_inflight[user_key]
+        if waiter.cls == PIPELINE and waiter.paper:
+            self._paper_inflight[waiter.paper] -= 1
+            if not self._paper_inflight[waiter.paper]:
+                del self._paper_inflight[waiter.paper]
+        self._gc_flow(waiter.flow, waiter.cls)
+        return self._dispatch()
+
+    def _wake(self, waiters: list, skip: Optional[_Waiter] = None) -> None:
+        """lock 밖에서 호출 — 대기자의 event loop에 grant 통지."""
+        for waiter in waiters:
+            if waiter is skip:
+                continue
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve, self, waiter)
+            except RuntimeError:   # loop가 이미 닫힘 (pipeline thread 종료) — 칸 반납
+                self.release(waiter)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "inflight": self._inflight,
+                "classes": {
+                    cls: {
+                        "inflight": self._class_inflight[cls],
+                        "queued": self._queued[cls],
+                        "flows": sum(1 for f in self._flows[cls].values() if f.waiters),
+                        "max": self.class_max[cls],
+                    }
+                    for cls in _CLASSES
+                },
+            }
+
+
+def _resolve(scheduler: Scheduler, waiter: _Waiter) -> None:
+    if waiter.future.done():   # 대기 중 cancel됨 — acquire()의 except에서 반납 처리
+        return
+    waiter.future.set_result(None)
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                total = _env_int("LLM_MAX_INFLIGHT", 32)
+                _scheduler = Scheduler(
+                    max_inflight=total,
+                    class_max={
+                        INTERACTIVE: total,
+                        PIPELINE: _env_int("LLM_PIPELINE_MAX_INFLIGHT", max(1, total * 3 // 4)),
+                    },
+                    user_max={
+                        INTERACTIVE: _env_int("LLM_USER_MAX_INFLIGHT", 4),
+                        PIPELINE: _env_int("LLM_USER_PIPELINE_MAX_INFLIGHT", 8),
+                    },
+                    paper_max=_env_int("LLM_PAPER_MAX_INFLIGHT", 4),
+                )
+    return _scheduler
+
+
+def current_class() -> str:
+    return INTERACTIVE if metrics.stage_var.get() in _INTERACTIVE_STAGES else PIPELINE
+
+
+@asynccontextmanager
+async def slot():
+    """현재 metrics 태그 (stage / user / paper / tenant) 기준으로 in-flight 1칸 확보."""
+    scheduler = get_scheduler()
+    waiter = await scheduler.acquire(
+        current_class(),
+        user=metrics.user_id_var.get(),
+        paper=metrics.paper_id_var.get(),
+        tenant=metrics.tenant_var.get(),
+    )
+    try:
+        yield
+    finally:
+        scheduler.release(waiter)
+
+
+def _collect() -> list[str]:
+    if _scheduler is None:
+        return []
+    stats = _scheduler.stats()
+    lines = ["# TYPE coread_llm_inflight gauge"]
+    lines += [f'coread_llm_inflight{{class="{cls}"}} {s["inflight"]}' for cls, s in stats["classes"].items()]
+    lines.append("# TYPE coread_llm_queued gauge")
+    lines += [f'coread_llm_queued{{class="{cls}"}} {s["queued"]}' for cls, s in stats["classes"].items()]
+    return lines
+
+
+metrics.register_collector(_collect)
@@ -4,44 +4,103 @@ LLM Service — provider-agnostic streaming interface.
 model_config: {"provider": "openai"|"anthropic"|"google", "model": str}
 messages: OpenAI-format list [{"role": "system"|"user"|"assistant", "content": str}, ...]
 """
+import asyncio
+import json
+import logging
 import os
-from typing import AsyncIterator
+import threading
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Iterable
 
-# ── OpenAI ──────────────────────────────────────────────────────────────────
-from openai import AsyncOpenAI
+from services import json_stream, llm_batch, llm_scheduler, metrics
 
-_openai_client: AsyncOpenAI | None = None
+logger = logging.getLogger(__name__)
 
-def _get_openai() -> AsyncOpenAI:
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    return _openai_client
+# ── Provider registry ────────────────────────────────────────────────────────
+# SDK import (openai ~0.4s, google.genai ~0.7s, anthropic)는 첫 호출 시점으로 미룸 — main.py import /
+# pod cold start에 설정 안 된 provider 비용이 안 붙음. preload()로 설정된 provider만 미리 올릴 수 있음.
 
+class _Provider:
+    """provider SDK client 1개 — import + 생성은 첫 client() 호출 때 1번 (thread-safe)."""
 
-# ── Anthropic ────────────────────────────────────────────────────────────────
-from anthropic import AsyncAnthropic
+    def __init__(self, name: str, api_key_env: str, factory: Callable[[str | None], object]):
+        self.name = name
+        self.api_key_env = api_key_env
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
 
-_anthropic_client: AsyncAnthropic | None = None
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv(self.api_key_env))
 
-def _get_anthropic() -> AsyncAnthropic:
-    global _anthropic_client
-    if _anthropic_client is None:
-        _anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-    return _anthropic_client
+    @property
+    def loaded(self) -> bool:
+        return self._client is not None
 
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    started = time.perf_counter()
+                    self._client = self._factory(os.getenv(self.api_key_env))
+                    logger.info(f"[llm_service] {self.name} SDK loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return self._client
 
-# ── Google ───────────────────────────────────────────────────────────────────
-from google import genai as google_genai
-from google.genai import types as google_types
 
-_google_client: google_genai.Client | None = None
+def _make_openai(api_key: str | None):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key)
 
-def _get_google() -> google_genai.Client:
-    global _google_client
-    if _google_client is None:
-        _google_client = google_genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-    return _google_client
+
+def _make_anthropic(api_key: str | None):
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=api_key)
+
+
+def _make_google(api_key: str | None):
+    from google import genai as google_genai
+    return google_genai.Client(api_key=api_key)
+
+
+_PROVIDERS: dict[str, _Provider] = {
+    "openai": _Provider("openai", "OPENAI_API_KEY", _make_openai),
+    "anthropic": _Provider("anthropic", "ANTHROPIC_API_KEY", _make_anthropic),
+    "google": _Provider("google", "GOOGLE_API_KEY", _make_google),
+}
+
+
+def _get_openai():
+    return _PROVIDERS["openai"].client()
+
+
+def _get_anthropic():
+    return _PROVIDERS["anthropic"].client()
+
+
+def _get_google():
+    return _PROVIDERS["google"].client()
+
+
+def preload(names: Iterable[str] | None = None) -> list[str]:
+    """
+    SDK를 미리 import (기본: API key가 설정된 provider만). 시작 직후 background thread에서 호출하면
+    첫 요청이 import 비용을 안 냄. 실제로 올린 provider 이름 반환.
+    """
+    loaded = []
+    for name in names if names is not None else [n for n, p in _PROVIDERS.items() if p.configured]:
+        try:
+            _PROVIDERS[name].client()
+            loaded.append(name)
+        except Exception as e:
+            logger.warning(f"[llm_service] preload {name} failed: {e}")
+    return loaded
+
+
+def providers() -> dict:
+    """/health용 — provider별 설정 / 로드 여부."""
+    return {name: {"configured": p.configured, "loaded": p.loaded} for name, p in _PROVIDERS.items()}
 
 
 # ── Shared helpers ────────────────────────────────────────────────────────────
@@ -67,6 +126,35 @@ def _to_google_contents(conv_messages: list[dict]) -> list[dict]:
     return result
 
 
+def _openai_usage(call: metrics.CallTimer, usage) -> None:
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    call.set_usage(
+        usage.prompt_tokens,
+        usage.completion_tokens,
+        getattr(details, "cached_tokens", 0) if details else 0,
+    )
+
+
+def _anthropic_usage(call: metrics.CallTimer, usage) -> None:
+    if usage is None:
+        return
+    cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+    # Anthropic input_tokens는 cache read분을 제외한 값 — 합산해서 OpenAI 기준과 맞춤
+    call.set_usage(usage.input_tokens + cached, usage.output_tokens, cached)
+
+
+def _google_usage(call: metrics.CallTimer, usage) -> None:
+    if usage is None:
+        return
+    call.set_usage(
+        usage.prompt_token_count,
+        usage.candidates_token_count,
+        usage.cached_content_token_count,
+    )
+
+
 # ── Public API ────────────────────────────────────────────────────────────────
 
 async def stream(model_config: dict, messages: list[dict]) -> AsyncIterator[str]:
@@ -74,47 +162,178 @@ async def stream(model_config: dict, messages: list[dict]) -> AsyncIterator[str]
     Stream tokens from the specified provider.
     messages는 OpenAI 포맷 (system 포함). provider별 변환은 내부에서 처리.
     """
-    provider = model_config["provider"]
-    model = model_config["model"]
+    async for token in _stream(model_config, messages, mode="stream"):
+        yield token
 
-    if provider == "openai":
-        async for token in _stream_openai(model, messages):
-            yield token
 
-    elif provider == "anthropic":
-        async for token in _stream_anthropic(model, messages):
-            yield token
+async def complete(model_config: dict, messages: list[dict], max_tokens: int = 10) -> str:
+    """Non-streaming single completion. 라우팅 등 짧은 응답용."""
+    provider = model_config["provider"]
+    model = model_config["model"]
 
-    elif provider == "google":
-        async for token in _stream_google(model, messages):
-            yield token
+    collector = _batch_collector(provider)
+    if collector is not None:
+        return await _complete_batch(collector, provider, model, messages, max_tokens)
+
+    async with llm_scheduler.slot():
+        call = metrics.start_call(provider, model)
+        outcome = "error"
+        try:
+            text = await _complete(provider, model, messages, max_tokens, call)
+            outcome = "ok"
+            return text
+        finally:
+            call.finish(outcome)
+
+
+async def complete_json(
+    model_config: dict,
+    messages: list[dict],
+    schema: dict,
+    max_tokens: int = 1024,
+) -> dict:
+    """
+    Structured output completion — provider native JSON mode로 schema에 맞는 dict 반환.
+    schema: {"name": str, "schema": JSON Schema}
+      - openai: response_format json_schema (strict)
+      - anthropic: 강제 tool use (tool input = 결과 객체)
+      - google: response_mime_type=application/json + response_json_schema
+    """
+    provider = model_config["provider"]
+    model = model_config["model"]
 
+    collector = _batch_collector(provider)
+    if collector is not None:
+        text = await _complete_batch(collector, provider, model, messages, max_tokens, schema=schema)
+        return json_stream.parse_json(text)
+
+    async with llm_scheduler.slot():
+        call = metrics.start_call(provider, model, mode="json")
+        outcome = "error"
+        try:
+            result = await _complete(provider, model, messages, max_tokens, call, schema=schema)
+            outcome = "ok"
+            return result
+        finally:
+            call.finish(outcome)
+
+
+async def stream_json_items(
+    model_config: dict,
+    messages: list[dict],
+    schema: dict,
+    key: str,
+    max_tokens: int = 4096,
+    max_items: int | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Structured output을 streaming으로 받아 top-level `key` 배열의 원소를 완성되는 즉시 yield.
+    중간에 깨진 원소는 건너뛰고, 스트림이 도중에 끊겨도 이미 yield된 원소는 유효.
+    배열이 닫히거나 max_items개를 yield한 뒤에도 스트림은 끝까지 받음 (파싱만 멈춤) — provider usage는
+    마지막 chunk에 오므로 중간에 닫으면 token / cost가 0으로 기록됨. 소비자가 break하면 그때만 'cancelled'.
+    """
+    parser = json_stream.JsonArrayStream(key)
+    provider = model_config["provider"]
+    yielded = 0
+    collector = _batch_collector(provider)
+    if collector is not None:
+        # batch mode — 응답 전체가 한 번에 옴. 파싱 / 깨진 원소 처리는 streaming과 동일
+        text = await _complete_batch(collector, provider, model_config["model"], messages, max_tokens, schema=schema)
+        for item in parser.feed(text):
+            if max_items is not None and yielded >= max_items:
+                break
+            yielded += 1
+            yield item
     else:
-        raise ValueError(f"Unknown provider: {provider}")
-
-
-async def complete(model_config: dict, messages: list[dict], max_tokens: int = 10) -> str:
-    """Non-streaming single completion. 라우팅 등 짧은 응답용."""
+        tokens = _stream(model_config, messages, mode="json_stream", schema=schema, max_tokens=max_tokens)
+        async with aclosing(tokens):
+            parsing = True
+            async for text in tokens:
+                if not parsing:
+                    continue   # 남은 응답은 usage를 받기 위해 drain
+                for item in parser.feed(text):
+                    yielded += 1
+                    yield item
+                    if max_items is not None and yielded >= max_items:
+                        break
+                parsing = not parser.done and (max_items is None or yielded < max_items)
+    if parser.errors:
+        logger.warning(f"[llm_service] skipped {parser.errors} malformed '{key}' item(s)")
+
+
+async def _stream(
+    model_config: dict,
+    messages: list[dict],
+    mode: str,
+    schema: dict | None = None,
+    max_tokens: int | None = None,
+) -> AsyncIterator[str]:
     provider = model_config["provider"]
     model = model_config["model"]
 
+    impl = _STREAM_IMPLS.get(provider)
+    if impl is None:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    # fair-share admission (services.llm_scheduler) — stream이 끝날 때까지 in-flight 1칸 점유.
+    # 대기 시간은 scheduler 지표로 따로 잡히도록 call 계측은 admission 이후 시작
+    async with llm_scheduler.slot():
+        call = metrics.start_call(provider, model, mode=mode)
+        outcome = "error"
+        tokens = impl(model, messages, call, schema=schema, max_tokens=max_tokens)
+        try:
+            async for token in tokens:
+                if call.ttft is None:
+                    call.mark_first_token()
+                call.streamed_chars += len(token)
+                yield token
+            outcome = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            # 소비자가 중간에 멈춤 (client disconnect 등) — 아래 aclose로 provider 응답을 바로 닫음
+            outcome = "cancelled"
+            raise
+        finally:
+            await tokens.aclose()
+            call.finish(outcome)
+
+
+async def _complete(
+    provider: str,
+    model: str,
+    messages: list[dict],
+    max_tokens: int,
+    call: metrics.CallTimer,
+    schema: dict | None = None,
+):
     if provider == "openai":
+        extra = {"response_format": _openai_response_format(schema)} if schema else {}
         resp = await _get_openai().chat.completions.create(
             model=model,
             messages=messages,
             max_tokens=max_tokens,
             temperature=0,
+            **extra,
         )
-        return resp.choices[0].message.content.strip()
+        _openai_usage(call, resp.usage)
+        text = resp.choices[0].message.content.strip()
+        return json_stream.parse_json(text) if schema else text
 
     elif provider == "anthropic":
         system, conv = _extract_system(messages)
+        extra = _anthropic_tool_args(schema) if schema else {}
         resp = await _get_anthropic().messages.create(
             model=model,
             system=system,
             messages=conv,
             max_tokens=max_tokens,
+            **extra,
         )
+        _anthropic_usage(call, resp.usage)
+        if schema:
+            for block in resp.content:
+                if block.type == "tool_use":
+                    return block.input
+            raise ValueError("Anthropic response contained no tool_use block")
         return resp.content[0].text.strip()
 
     elif provider == "google":
@@ -123,52 +342,206 @@ async def complete(model_config: dict, messages: list[dict], max_tokens: int = 1
         resp = await _get_google().aio.models.generate_content(
             model=model,
             contents=contents,
-            config=google_types.GenerateContentConfig(
-                system_instruction=system if system else None,
-                max_output_tokens=max_tokens,
-            ),
+            config=_google_config(system, max_tokens, schema),
         )
-        return resp.text.strip()
+        _google_usage(call, resp.usage_metadata)
+        text = resp.text.strip()
+        return json_stream.parse_json(text) if schema else text
 
     else:
         raise ValueError(f"Unknown provider: {provider}")
 
 
-# ── Provider implementations ──────────────────────────────────────────────────
+# ── Batch mode ────────────────────────────────────────────────────────────────
+# llm_batch.use(collector) 안의 호출은 provider batch API로 (openai / anthropic만 — google은 실시간 그대로).
+# 결과는 몇 분~몇 시간 뒤 → scheduler slot은 잡지 않음 (batch는 실시간 rate limit과 별도 한도)
 
-async def _stream_openai(model: str, messages: list[dict]) -> AsyncIterator[str]:
+def _batch_collector(provider: str):
+    collector = llm_batch.active()
+    if collector is None or provider not in llm_batch.BATCH_PROVIDERS:
+        return None
+    return collector
+
+
+def _batch_body(provider: str, model: str, messages: list[dict], max_tokens: int, schema: dict | None) -> dict:
+    """실시간 _complete()와 같은 요청을 batch request body로."""
+    if provider == "openai":
+        body = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": 0}
+        if schema:
+            body["response_format"] = _openai_response_format(schema)
+        return body
+    system, conv = _extract_system(messages)
+    body = {"model": model, "messages": conv, "max_tokens": max_tokens}
+    if system:
+        body["system"] = system
+    if schema:
+        body.update(_anthropic_tool_args(schema))
+    return body
+
+
+def _batch_text(provider: str, result: dict, call: metrics.CallTimer) -> str:
+    """batch 결과 body (dict) → 응답 text (schema 호출은 JSON 문자열). usage도 기록."""
+    usage = result.get("usage") or {}
+    if provider == "openai":
+        details = usage.get("prompt_tokens_details") or {}
+        call.set_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"), details.get("cached_tokens"))
+        return (result["choices"][0]["message"]["content"] or "").strip()
+    cached = usage.get("cache_read_input_tokens") or 0
+    call.set_usage((usage.get("input_tokens") or 0) + cached, usage.get("output_tokens"), cached)
+    for block in result["content"]:
+        if block["type"] == "tool_use":
+            return json.dumps(block["input"])
+    return result["content"][0]["text"].strip()
+
+
+async def _complete_batch(
+    collector,
+    provider: str,
+    model: str,
+    messages: list[dict],
+    max_tokens: int,
+    schema: dict | None = None,
+) -> str:
+    call = metrics.start_call(provider, model, mode="batch")
+    outcome = "error"
+    try:
+        result = await collector.submit(provider, model, _batch_body(provider, model, messages, max_tokens, schema))
+        text = _batch_text(provider, result, call)
+        outcome = "ok"
+        return text
+    finally:
+        call.finish(outcome)
+
+
+# ── Structured output helpers ─────────────────────────────────────────────────
+
+def _openai_response_format(schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema["name"], "schema": schema["schema"], "strict": True},
+    }
+
+
+def _anthropic_tool_args(schema: dict) -> dict:
+    return {
+        "tools": [{
+            "name": schema["name"],
+            "description": "Return the result in this exact structure.",
+            "input_schema": schema["schema"],
+        }],
+        "tool_choice": {"type": "tool", "name": schema["name"]},
+    }
+
+
+def _google_config(system: str, max_tokens: int | None, schema: dict | None):
+    kwargs = {"system_instruction": system if system else None}
+    if max_tokens:
+        kwargs["max_output_tokens"] = max_tokens
+    if schema:
+        kwargs["response_mime_type"] = "application/json"
+        kwargs["response_json_schema"] = schema["schema"]
+    from google.genai import types as google_types
+    return google_types.GenerateContentConfig(**kwargs)
+
+
+# ── Provider implementations ──────────────────────────────────────────────────
+# 소비자가 중간에 멈추면 _stream()이 impl을 aclose → 각 impl의 finally에서 provider HTTP 응답을 닫음.
+# 연결이 끊기면 provider도 generation을 멈추므로 남은 output token이 과금되지 않음.
+
+async def _close_upstream(stream) -> None:
+    """openai AsyncStream.close() / google async generator aclose()."""
+    close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+    if close is not None:
+        await close()
+
+
+async def _stream_openai(
+    model: str,
+    messages: list[dict],
+    call: metrics.CallTimer,
+    schema: dict | None = None,
+    max_tokens: int | None = None,
+) -> AsyncIterator[str]:
+    extra = {}
+    if schema:
+        extra["response_format"] = _openai_response_format(schema)
+        extra["temperature"] = 0
+    if max_tokens:
+        extra["max_tokens"] = max_tokens
     stream = await _get_openai().chat.completions.create(
         model=model,
         messages=messages,
         stream=True,
+        stream_options={"include_usage": True},
+        **extra,
     )
-    async for chunk in stream:
-        delta = chunk.choices[0].delta.content
-        if delta:
-            yield delta
-
-
-async def _stream_anthropic(model: str, messages: list[dict]) -> AsyncIterator[str]:
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                # include_usage: 마지막 chunk는 choices 없이 usage만 담고 옴
+                _openai_usage(call, chunk.usage)
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        await _close_upstream(stream)
+
+
+async def _stream_anthropic(
+    model: str,
+    messages: list[dict],
+    call: metrics.CallTimer,
+    schema: dict | None = None,
+    max_tokens: int | None = None,
+) -> AsyncIterator[str]:
     system, conv = _extract_system(messages)
+    extra = _anthropic_tool_args(schema) if schema else {}
+    # async with 종료 시 (중간 종료 포함) HTTP 응답이 닫힘
     async with _get_anthropic().messages.stream(
         model=model,
         system=system,
         messages=conv,
-        max_tokens=1024,
+        max_tokens=max_tokens or 1024,
+        **extra,
     ) as s:
-        async for text in s.text_stream:
-            yield text
-
-
-async def _stream_google(model: str, messages: list[dict]) -> AsyncIterator[str]:
+        if schema:
+            # 강제 tool use — tool input JSON이 input_json delta로 흘러나옴
+            async for event in s:
+                if event.type == "input_json" and event.partial_json:
+                    yield event.partial_json
+        else:
+            async for text in s.text_stream:
+                yield text
+        _anthropic_usage(call, s.current_message_snapshot.usage)
+
+
+async def _stream_google(
+    model: str,
+    messages: list[dict],
+    call: metrics.CallTimer,
+    schema: dict | None = None,
+    max_tokens: int | None = None,
+) -> AsyncIterator[str]:
     system, conv = _extract_system(messages)
     contents = _to_google_contents(conv)
-    async for chunk in await _get_google().aio.models.generate_content_stream(
+    stream = await _get_google().aio.models.generate_content_stream(
         model=model,
         contents=contents,
-        config=google_types.GenerateContentConfig(
-            system_instruction=system if system else None,
-        ),
-    ):
-        if chunk.text:
-            yield chunk.text
+        config=_google_config(system, max_tokens, schema),
+    )
+    try:
+        async for chunk in stream:
+            if chunk.usage_metadata is not None:
+                _google_usage(call, chunk.usage_metadata)
+            if chunk.text:
+                yield chunk.text
+    finally:
+        await _close_upstream(stream)
+
+
+_STREAM_IMPLS = {
+    "openai": _stream_openai,
+    "anthropic": _stream_anthropic,
+    "google": _stream_google,
+}
@@ -0,0 +1,334 @@
+"""
+Metrics — LLM token usage / latency 계측 + Prometheus text exposition.
+
+태그(paper_id, user_id, stage, tenant)는 contextvars로 전달.
+pipeline thread에서 `tagged(...)` 안에서 asyncio.run()을 호출하면 그 안의 task들이 태그를 상속.
+
+계측 지표:
+  - input / output / cached tokens (provider, model, stage별)
+  - wall time, time-to-first-token (streaming)
+  - paper/user별 비용 요약 → paper meta의 "usage" 필드로 저장
+
+/metrics 엔드포인트가 render()를 그대로 반환.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+paper_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("paper_id", default="")
+user_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("user_id", default="")
+stage_var: contextvars.ContextVar[str] = contextvars.ContextVar("stage", default="")
+# 조직 / 강의 단위 (services.llm_scheduler fair share용). 없으면 user가 곧 tenant
+tenant_var: contextvars.ContextVar[str] = contextvars.ContextVar("tenant", default="")
+
+_VARS = {"paper_id": paper_id_var, "user_id": user_id_var, "stage": stage_var, "tenant": tenant_var}
+
+# USD per 1M tokens: (input, cached input, output)
+_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "claude-3-5-haiku-latest": (0.80, 0.08, 4.00),
+    "claude-sonnet-4-5": (3.00, 0.30, 15.00),
+    "gemini-2.0-flash": (0.10, 0.025, 0.40),
+    "gemini-2.5-flash": (0.30, 0.075, 2.50),
+}
+_BATCH_DISCOUNT = 0.5   # OpenAI Batch / Anthropic Message Batches 단가
+
+_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+# ──────────────────────────────────────────────
+# Tags
+# ──────────────────────────────────────────────
+
+def set_tags(**tags: str) -> None:
+    """현재 context에 태그 설정 (request handler / pipeline thread 진입 시)."""
+    for key, value in tags.items():
+        _VARS[key].set(value or "")
+
+
+@contextmanager
+def tagged(**tags: str):
+    """블록 범위 안에서만 태그 적용. 종료 시 이전 값 복원."""
+    tokens = [(_VARS[key], _VARS[key].set(value or "")) for key, value in tags.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+# ──────────────────────────────────────────────
+# Primitive metric types
+# ──────────────────────────────────────────────
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, amount: float = 1.0, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for lv, v in self._values.items():
+                lines.append(f"{self.name}{_fmt_labels(self.labels, lv)} {v:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label_values → [bucket counts..., sum, count]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value: float, *label_values) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for lv, row in self._values.items():
+                cumulative = 0
+                for bound, n in zip(self.buckets, row):
+                    cumulative += n
+                    labels = _fmt_labels(self.labels + ("le",), lv + (f"{bound:g}",))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _fmt_labels(self.labels + ("le",), lv + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {row[-1]}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labels, lv)} {row[-2]:g}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labels, lv)} {row[-1]}")
+        return lines
+
+
+_registry: list = []
+_collectors: list[Callable[[], list[str]]] = []
+
+
+def _register(metric) -> None:
+    _registry.append(metric)
+
+
+def register_collector(fn: Callable[[], list[str]]) -> None:
+    """scrape 시점에 계산되는 지표용 (cache stats 등). fn은 exposition line 리스트 반환."""
+    _collectors.append(fn)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for fn in _collectors:
+        lines.extend(fn())
+    return "\n".join(lines) + "\n"
+
+
+# ──────────────────────────────────────────────
+# LLM call accounting
+# ──────────────────────────────────────────────
+
+llm_calls = Counter(
+    "coread_llm_calls_total", "LLM calls", ("provider", "model", "stage", "mode", "outcome"),
+)
+llm_tokens = Counter(
+    "coread_llm_tokens_total", "LLM tokens", ("provider", "model", "stage", "kind"),
+)
+llm_cost = Counter(
+    "coread_llm_cost_usd_total", "Estimated LLM cost in USD", ("provider", "model", "stage"),
+)
+llm_latency = Histogram(
+    "coread_llm_call_seconds", "LLM call wall time", ("provider", "stage", "mode"),
+)
+llm_ttft = Histogram(
+    "coread_llm_ttft_seconds", "LLM streaming time to first token", ("provider", "stage"),
+)
+llm_tokens_saved = Counter(
+    "coread_llm_tokens_saved_total",
+    "Estimated output tokens not generated because a stream was cancelled (client disconnect)",
+    ("provider", "model", "stage"),
+)
+
+_CHARS_PER_TOKEN = 4
+# (provider, model, mode) → 끝까지 간 streaming 호출의 output token EWMA — 취소 시 "남은 분량" 추정용
+_typical_output: dict[tuple[str, str, str], float] = {}
+_typical_lock = threading.Lock()   # 여러 pipeline thread에서 갱신
+
+# (paper_id, user_id) → {"stages": {stage: {...}}, "costUsd": float, ...}
+# open_usage()로 열린 pipeline run만 집계 (chat 호출은 Prometheus 지표에만 반영).
+# user별 합계는 여기서만 — Prometheus에 user label을 붙이면 series 수가 user 수만큼 늘어남
+_usage: dict[tuple[str, str], dict] = {}
+_usage_lock = threading.Lock()
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    price = _PRICES.get(model)
+    if price is None:
+        return 0.0
+    p_in, p_cached, p_out = price
+    uncached = max(input_tokens - cached_tokens, 0)
+    return (uncached * p_in + cached_tokens * p_cached + output_tokens * p_out) / 1_000_000
+
+
+class CallTimer:
+    """LLM 호출 1회의 계측 상태. streaming hot path에서는 mark_first_token()만 호출."""
+
+    __slots__ = (
+        "provider", "model", "mode", "started", "ttft",
+        "input_tokens", "output_tokens", "cached_tokens", "streamed_chars", "_done",
+    )
+
+    def __init__(self, provider: str, model: str, mode: str):
+        self.provider = provider
+        self.model = model
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.streamed_chars = 0     # streaming 중 받은 text 길이 (usage가 안 오는 취소 시 추정용)
+        self._done = False
+
+    def mark_first_token(self) -> None:
+        self.ttft = time.perf_counter() - self.started
+
+    def set_usage(self, input_tokens=0, output_tokens=0, cached_tokens=0) -> None:
+        self.input_tokens = input_tokens or 0
+        self.output_tokens = output_tokens or 0
+        self.cached_tokens = cached_tokens or 0
+
+    def finish(self, outcome: str = "ok") -> None:
+        if self._done:
+            return
+        self._done = True
+        _record(self, time.perf_counter() - self.started, outcome)
+
+
+def start_call(provider: str, model: str, mode: str = "complete") -> CallTimer:
+    return CallTimer(provider, model, mode)
+
+
+def _record(call: CallTimer, wall: float, outcome: str) -> None:
+    stage = stage_var.get() or "unknown"
+    paper_id = paper_id_var.get()
+    user_id = user_id_var.get()
+    provider, model = call.provider, call.model
+    if call.streamed_chars or outcome == "cancelled":
+        _track_cancellation(call, stage, outcome)
+    cost = estimate_cost(model, call.input_tokens, call.output_tokens, call.cached_tokens)
+    if call.mode == "batch":
+        cost *= _BATCH_DISCOUNT
+
+    llm_calls.inc(1, provider, model, stage, call.mode, outcome)
+    llm_tokens.inc(call.input_tokens, provider, model, stage, "input")
+    llm_tokens.inc(call.output_tokens, provider, model, stage, "output")
+    llm_tokens.inc(call.cached_tokens, provider, model, stage, "cached")
+    llm_cost.inc(cost, provider, model, stage)
+    llm_latency.observe(wall, provider, stage, call.mode)
+    if call.ttft is not None:
+        llm_ttft.observe(call.ttft, provider, stage)
+
+    if not paper_id:
+        return
+    with _usage_lock:
+        summary = _usage.get((paper_id, user_id))
+        if summary is None:
+            return
+        stage_summary = summary["stages"].setdefault(stage, {
+            "calls": 0, "inputTokens": 0, "outputTokens": 0, "cachedTokens": 0,
+            "costUsd": 0.0, "wallSeconds": 0.0, "provider": provider, "model": model,
+        })
+        for s in (summary, stage_summary):
+            s["calls"] += 1
+            s["inputTokens"] += call.input_tokens
+            s["outputTokens"] += call.output_tokens
+            s["cachedTokens"] += call.cached_tokens
+            s["costUsd"] = round(s["costUsd"] + cost, 6)
+            s["wallSeconds"] = round(s["wallSeconds"] + wall, 3)
+
+
+def _track_cancellation(call: CallTimer, stage: str, outcome: str) -> None:
+    """
+    완료된 stream은 output token EWMA 갱신. 취소된 stream은 usage가 안 오므로 받은 text로 output token을
+    추정하고, (보통 응답 길이 - 받은 분량)을 절약한 token으로 집계.
+    """
+    key = (call.provider, call.model, call.mode)
+    if outcome == "ok" and call.output_tokens:
+        with _typical_lock:
+            prev = _typical_output.get(key)
+            _typical_output[key] = call.output_tokens if prev is None else 0.8 * prev + 0.2 * call.output_tokens
+    elif outcome == "cancelled":
+        if not call.output_tokens:
+            call.output_tokens = -(-call.streamed_chars // _CHARS_PER_TOKEN)
+        with _typical_lock:
+            typical = _typical_output.get(key)
+        if typical:
+            llm_tokens_saved.inc(max(0.0, round(typical - call.output_tokens)), call.provider, call.model, stage)
+
+
+def open_usage(paper_id: str, user_id: str = "") -> None:
+    """(paper, user) 사용량 집계 시작. pipeline 실행 단위로 열고 usage_summary(pop=True)로 닫음."""
+    with _usage_lock:
+        _usage[(paper_id, user_id)] = {
+            "calls": 0, "inputTokens": 0, "outputTokens": 0, "cachedTokens": 0,
+            "costUsd": 0.0, "wallSeconds": 0.0, "stages": {},
+        }
+
+
+def usage_summary(paper_id: str, user_id: str = "", pop: bool = False) -> dict:
+    """(paper, user) 단위 누적 사용량. pop=True면 반환 후 메모리에서 제거."""
+    with _usage_lock:
+        key = (paper_id, user_id)
+        summary = _usage.pop(key, None) if pop else _usage.get(key)
+        if summary is None:
+            return {}
+        return {**summary, "stages": {k: dict(v) for k, v in summary["stages"].items()}}
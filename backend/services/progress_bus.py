@@ -0,0 +1,371 @@
+"""
+Progress Bus — pipeline 진행 이벤트 pub/sub.
+
+pipeline thread(동기, 별도 thread)에서 publish → SSE 핸들러(event loop)에서 subscribe.
+polling 없이 publish 즉시 구독자를 깨움 (loop.call_soon_threadsafe).
+
+- 이벤트는 publish 시점에 한 번만 JSON 인코딩, 구독자는 문자열 그대로 전송
+- event id는 topic 내에서 단조 증가하는 문자열 → SSE id / Last-Event-ID 이어받기
+  (local backend는 "{generation}.{n}" — reset마다 generation이 바뀌어서 이전 run의 cursor는 처음부터 다시 받음)
+- 구독은 topic을 만들지 않음 — publish / reset된 적 없는 (또는 정리된) topic 구독은 바로 종료
+- final 이벤트 이후 retention TTL이 지나면 topic 로그를 제거 (무한 증가 방지)
+
+Backend (PROGRESS_BACKEND 환경변수):
+  - "local" (기본): 프로세스 내 메모리
+  - "redis": Redis Streams (REDIS_URL, `pip install redis`) — 여러 uvicorn worker가 같은 진행 로그를 공유.
+    구독자의 blocking XREAD는 redis.asyncio client로 (구독자마다 thread를 잡지 않음)
+  - "redis-local": LocalRedis stand-in (Redis Streams 부분 구현, 테스트/개발용)
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_RETENTION_TTL = int(os.getenv("PROGRESS_RETENTION_SECONDS", "900"))
+_MAX_IDLE = 6 * 3600          # final 이벤트 없이 방치된 topic 제거 기준
+_HEARTBEAT = 15.0             # 구독자 idle 시 None을 yield하는 간격 (초)
+_XREAD_WORKERS = int(os.getenv("PROGRESS_XREAD_WORKERS", "8"))
+
+
+# ──────────────────────────────────────────────
+# Local backend
+# ──────────────────────────────────────────────
+
+class _Topic:
+    __slots__ = ("gen", "events", "final", "touched", "waiters")
+
+    def __init__(self):
+        self.gen = uuid.uuid4().hex[:8]    # reset / 재생성마다 새 값 — event id에 포함
+        self.events: list[str] = []
+        self.final = False
+        self.touched = time.monotonic()
+        self.waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+
+class LocalBackend:
+    """프로세스 내 메모리 backend. publish는 thread-safe."""
+
+    def __init__(self, ttl: int = _RETENTION_TTL):
+        self._ttl = ttl
+        self._topics: dict[str, _Topic] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, topic: str) -> None:
+        with self._lock:
+            old = self._topics.get(topic)
+            fresh = _Topic()
+            if old is not None:
+                fresh.waiters = old.waiters
+            self._topics[topic] = fresh
+            self._wake(fresh)
+
+    def publish(self, topic: str, data: str, final: bool = False) -> str:
+        with self._lock:
+            t = self._topics.get(topic)
+            if t is None:
+                t = self._topics[topic] = _Topic()
+            t.events.append(data)
+            t.final = t.final or final
+            t.touched = time.monotonic()
+            event_id = f"{t.gen}.{len(t.events)}"
+            self._wake(t)
+        self._sweep()
+        return event_id
+
+    def has_topic(self, topic: str) -> bool:
+        with self._lock:
+            return topic in self._topics
+
+    async def subscribe(self, topic: str, after: str) -> AsyncIterator[Optional[tuple[str, str]]]:
+        gen, cursor = _parse_local_id(after)
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        with self._lock:
+            t = self._topics.get(topic)
+            if t is None:
+                return
+            waiter = (loop, wake)
+            t.waiters.add(waiter)
+        try:
+            while True:
+                wake.clear()
+                with self._lock:
+                    t = self._topics.get(topic) or t
+                    if waiter not in t.waiters:
+                        t.waiters.add(waiter)
+                    if gen != t.gen:
+                        gen, cursor = t.gen, 0     # 다른 run의 cursor (reset됨) — 처음부터
+                    batch = t.events[cursor:]
+                    start = cursor
+                    final = t.final
+                for i, data in enumerate(batch, start=start + 1):
+                    yield f"{gen}.{i}", data
+                cursor = start + len(batch)
+                if final and not batch:
+                    return
+                if final:
+                    continue
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                t = self._topics.get(topic)
+                if t is not None:
+                    t.waiters.discard(waiter)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "events": sum(len(t.events) for t in self._topics.values()),
+                "subscribers": sum(len(t.waiters) for t in self._topics.values()),
+            }
+
+    # ── internals ──
+
+    @staticmethod
+    def _wake(t: _Topic) -> None:
+        for loop, event in list(t.waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                t.waiters.discard((loop, event))   # loop closed
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                name for name, t in self._topics.items()
+                if not t.waiters and (
+                    (t.final and now - t.touched > self._ttl) or now - t.touched > _MAX_IDLE
+                )
+            ]
+            for name in expired:
+                del self._topics[name]
+        if expired:
+            logger.info(f"[progress_bus] evicted {len(expired)} finished topic(s)")
+
+
+def _parse_local_id(after: str) -> tuple[str, int]:
+    """"{generation}.{n}" → (generation, n). 형식이 다르면 ("", 0) — 어떤 generation과도 안 맞아 처음부터."""
+    gen, _, n = (after or "").partition(".")
+    try:
+        return gen, max(int(n), 0)
+    except ValueError:
+        return "", 0
+
+
+# ──────────────────────────────────────────────
+# Redis Streams backend
+# ──────────────────────────────────────────────
+
+class RedisBackend:
+    """
+    Redis Streams backend — topic마다 stream `progress:{topic}`.
+    client는 redis-py 호환 (decode_responses=True): xadd / xrange / xread / expire / delete.
+    async_client (redis.asyncio)가 있으면 구독은 그걸로 await — 없으면 (LocalRedis) sync xread를
+    전용 bounded executor에서 실행 (공용 default executor를 구독자가 점유하지 않도록).
+    """
+
+    def __init__(self, client, ttl: int = _RETENTION_TTL, async_client=None):
+        self._r = client
+        self._ttl = ttl
+        self._ar = async_client
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def _key(topic: str) -> str:
+        return f"progress:{topic}"
+
+    def reset(self, topic: str) -> None:
+        self._r.delete(self._key(topic))
+
+    def publish(self, topic: str, data: str, final: bool = False) -> str:
+        key = self._key(topic)
+        fields = {"data": data}
+        if final:
+            fields["final"] = "1"
+        event_id = self._r.xadd(key, fields)
+        self._r.expire(key, self._ttl if final else _MAX_IDLE)
+        return event_id
+
+    def has_topic(self, topic: str) -> bool:
+        return bool(self._r.exists(self._key(topic)))
+
+    async def subscribe(self, topic: str, after: str) -> AsyncIterator[Optional[tuple[str, str]]]:
+        key = self._key(topic)
+        cursor = after or "0-0"
+        while True:
+            resp = await self._xread({key: cursor})
+            if not resp:
+                yield None
+                continue
+            for _, entries in resp:
+                for event_id, fields in entries:
+                    cursor = event_id
+                    yield event_id, fields["data"]
+                    if fields.get("final") == "1":
+                        return
+
+    async def _xread(self, streams: dict) -> list:
+        block = int(_HEARTBEAT * 1000)
+        if self._ar is not None:
+            return await self._ar.xread(streams, count=100, block=block)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=_XREAD_WORKERS, thread_name_prefix="progress-xread")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, lambda: self._r.xread(streams, count=100, block=block))
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class LocalRedis:
+    """
+    Redis Streams 명령 부분 구현 (xadd / xrange / xread / expire / exists / delete).
+    redis-py 호출 시그니처와 맞춰 RedisBackend를 외부 Redis 없이 돌리기 위한 stand-in.
+    """
+
+    def __init__(self):
+        self._streams: dict[str, list[tuple[str, dict]]] = {}
+        self._expiry: dict[str, float] = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def _expire_due(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, at in self._expiry.items() if at <= now]:
+            self._streams.pop(key, None)
+            self._expiry.pop(key, None)
+
+    def xadd(self, key: str, fields: dict) -> str:
+        with self._cond:
+            self._expire_due()
+            self._seq += 1
+            event_id = f"{int(time.time() * 1000)}-{self._seq}"
+            self._streams.setdefault(key, []).append((event_id, dict(fields)))
+            self._cond.notify_all()
+            return event_id
+
+    def xrange(self, key: str, min: str = "-", max: str = "+") -> list:
+        with self._cond:
+            self._expire_due()
+            return [
+                (i, f) for i, f in self._streams.get(key, [])
+                if (min == "-" or _id_key(i) >= _id_key(min)) and (max == "+" or _id_key(i) <= _id_key(max))
+            ]
+
+    def xread(self, streams: dict, count: Optional[int] = None, block: Optional[int] = None) -> list:
+        deadline = time.monotonic() + (block or 0) / 1000
+
+        def collect():
+            out = []
+            for key, last in streams.items():
+                entries = [(i, f) for i, f in self._streams.get(key, []) if _id_key(i) > _id_key(last)]
+                if entries:
+                    out.append((key, entries[:count] if count else entries))
+            return out
+
+        with self._cond:
+            while True:
+                self._expire_due()
+                result = collect()
+                remaining = deadline - time.monotonic()
+                if result or block is None or remaining <= 0:
+                    return result
+                self._cond.wait(remaining)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._cond:
+            if key not in self._streams:
+                return False
+            self._expiry[key] = time.monotonic() + seconds
+            return True
+
+    def exists(self, key: str) -> int:
+        with self._cond:
+            self._expire_due()
+            return int(key in self._streams)
+
+    def delete(self, key: str) -> int:
+        with self._cond:
+            self._expiry.pop(key, None)
+            return int(self._streams.pop(key, None) is not None)
+
+
+def _id_key(event_id: str) -> tuple[int, int]:
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+# ──────────────────────────────────────────────
+# Bus facade
+# ──────────────────────────────────────────────
+
+class ProgressBus:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def reset(self, topic: str) -> None:
+        """topic 로그 초기화 (같은 paper로 pipeline 재실행 시)."""
+        self._backend.reset(topic)
+
+    def publish(self, topic: str, event: dict, final: bool = False) -> str:
+        """thread-safe. final=True면 구독자가 이 이벤트 후 종료하고 retention TTL 시작."""
+        return self._backend.publish(topic, json.dumps(event), final=final)
+
+    def has_topic(self, topic: str) -> bool:
+        return self._backend.has_topic(topic)
+
+    def subscribe(self, topic: str, after: str = "") -> AsyncIterator[Optional[tuple[str, str]]]:
+        """
+        (event_id, json_str)를 yield. final 이벤트 후 종료.
+        새 이벤트 없이 heartbeat 간격이 지나면 None을 yield (호출자가 keep-alive/상태 확인).
+        """
+        return self._backend.subscribe(topic, after)
+
+    def stats(self) -> dict:
+        return self._backend.stats()
+
+
+def _make_backend():
+    kind = os.getenv("PROGRESS_BACKEND", "local").lower()
+    if kind == "redis":
+        import redis
+        import redis.asyncio
+        url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        logger.info(f"[progress_bus] using Redis backend at {url}")
+        return RedisBackend(
+            redis.Redis.from_url(url, decode_responses=True),
+            async_client=redis.asyncio.Redis.from_url(url, decode_responses=True),
+        )
+    if kind == "redis-local":
+        return RedisBackend(LocalRedis())
+    return LocalBackend()
+
+
+bus = ProgressBus(_make_backend())
+
+
+def _collect() -> list[str]:
+    stats = bus.stats()
+    lines = []
+    for key in ("topics", "events", "subscribers"):
+        if key in stats:
+            name = f"coread_progress_{key}"
+            lines += [f"# TYPE {name} gauge", f"{name} {stats[key]}"]
+    return lines
+
+
+metrics.register_collector(_collect)
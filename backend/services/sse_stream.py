@@ -0,0 +1,165 @@
+"""
+SSE token coalescing — provider delta를 모아서 SSE 이벤트 1개로 보냄.
+
+빠른 모델은 응답 하나에 수천 개의 delta (1~4 byte)를 내보냄 → delta마다 `data: {...}` 이벤트 + json.dumps +
+write + client 재렌더링. coalesce()는 buffer를 두고 다음 중 먼저 오는 조건에서 flush:
+  - hold 시간 경과 (buffer의 첫 token 기준)
+  - buffer가 max_bytes 이상
+  - 문장 경계 (. ! ? 。 줄바꿈 뒤) — 읽는 단위로 끊겨 보이도록
+hold 시간은 provider의 token 간격 (EWMA)에 맞춰 조정:
+  hold = clamp(gap × target_tokens, min_ms, max_ms), gap이 max_ms보다 길면 0 (기다려도 합쳐질 token이 없음)
+첫 token은 first_ms (TTFT floor, 기본 0 = 즉시) 안에 flush → 체감 첫 응답은 늦어지지 않음.
+이벤트 없이 heartbeat_s가 지나면 None을 yield (호출자가 `: keep-alive` comment 전송).
+disconnected (request.is_disconnected)를 넘기면 poll_s마다 확인해서 client가 떠났으면 즉시 종료 →
+source (llm_service stream)를 닫아 provider 응답도 끊음. token을 기다리는 중에도 감지됨.
+"""
+import asyncio
+import os
+import re
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from services import metrics
+
+_SENTENCE_END = re.compile(r"[.!?。！？\n][\"'”’)\]]*\s*$")
+_DONE = object()
+
+_events = metrics.Counter(
+    "coread_sse_token_events_total", "Coalesced SSE token events by flush reason", ("reason",),
+)
+_deltas = metrics.Counter("coread_sse_token_deltas_total", "Provider token deltas received for SSE")
+_disconnects = metrics.Counter("coread_sse_disconnects_total", "SSE streams stopped because the client left")
+_POLL_S = float(os.getenv("SSE_DISCONNECT_POLL_S", "0.5"))
+
+
+class CoalescePolicy:
+    def __init__(
+        self,
+        min_ms: float = float(os.getenv("SSE_COALESCE_MIN_MS", "10")),
+        max_ms: float = float(os.getenv("SSE_COALESCE_MAX_MS", "60")),
+        max_bytes: int = int(os.getenv("SSE_COALESCE_BYTES", "512")),
+        target_tokens: int = 8,
+        first_ms: float = float(os.getenv("SSE_FIRST_TOKEN_MS", "0")),
+        heartbeat_s: float = float(os.getenv("SSE_HEARTBEAT_S", "15")),
+        sentence_flush: bool = True,
+    ):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.max_bytes = max_bytes
+        self.target_tokens = target_tokens
+        self.first_ms = first_ms
+        self.heartbeat_s = heartbeat_s
+        self.sentence_flush = sentence_flush
+
+    def hold(self, gap_ms: Optional[float]) -> float:
+        """token 간격 EWMA (ms) → buffer 유지 시간 (초)."""
+        if gap_ms is None:
+            return self.max_ms / 1000
+        if gap_ms >= self.max_ms:
+            return 0.0
+        return min(self.max_ms, max(self.min_ms, gap_ms * self.target_tokens)) / 1000
+
+
+DISABLED = CoalescePolicy(max_ms=0, max_bytes=0, sentence_flush=False)   # delta마다 이벤트 (기존 동작)
+
+
+async def coalesce(
+    tokens: AsyncIterator[str],
+    policy: Optional[CoalescePolicy] = None,
+    disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    poll_s: float = _POLL_S,
+) -> AsyncIterator[Optional[str]]:
+    """
+    tokens를 묶은 문자열을 yield. heartbeat 시점에는 None.
+    disconnected()가 True가 되거나 소비자가 중간에 멈추면 (cancel / aclose) source iterator도 닫음.
+    """
+    policy = policy or CoalescePolicy()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for token in tokens:
+                await queue.put(token)
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    buf: list[str] = []
+    buf_bytes = 0
+    deadline: Optional[float] = None      # 현재 buffer flush 시각
+    gap_ms: Optional[float] = None        # token 간격 EWMA
+    last_token: Optional[float] = None
+    last_event = loop.time()
+    next_poll = loop.time() + poll_s
+    first = True
+    try:
+        while True:
+            now = loop.time()
+            if disconnected is not None and now >= next_poll:
+                next_poll = now + poll_s
+                if await disconnected():
+                    _disconnects.inc()
+                    return
+            if deadline is not None:
+                wake = deadline
+            else:
+                wake = last_event + policy.heartbeat_s
+            if disconnected is not None:
+                wake = min(wake, next_poll)
+            try:
+                item = await asyncio.wait_for(queue.get(), max(0.0, wake - now))
+            except asyncio.TimeoutError:
+                now = loop.time()
+                if deadline is not None:
+                    if now >= deadline:
+                        yield _flush(buf, "time")
+                        buf, buf_bytes, deadline = [], 0, None
+                        last_event = loop.time()
+                elif now >= last_event + policy.heartbeat_s:
+                    yield None
+                    last_event = loop.time()
+                continue   # disconnect poll 시각이면 loop 처음에서 확인
+
+            if item is _DONE or isinstance(item, Exception):
+                if buf:
+                    yield _flush(buf, "end")
+                if isinstance(item, Exception):
+                    raise item
+                return
+
+            now = loop.time()
+            _deltas.inc()
+            if last_token is not None:
+                gap = (now - last_token) * 1000
+                gap_ms = gap if gap_ms is None else 0.7 * gap_ms + 0.3 * gap
+            last_token = now
+            buf.append(item)
+            buf_bytes += len(item.encode())
+            if deadline is None:
+                deadline = now + (policy.first_ms / 1000 if first else policy.hold(gap_ms))
+                first = False
+
+            reason = None
+            if buf_bytes >= policy.max_bytes:
+                reason = "bytes"
+            elif policy.sentence_flush and _SENTENCE_END.search(item):
+                reason = "sentence"
+            elif deadline <= now:
+                reason = "time"
+            if reason:
+                yield _flush(buf, reason)
+                buf, buf_bytes, deadline = [], 0, None
+                last_event = loop.time()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        aclose = getattr(tokens, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _flush(buf: list[str], reason: str) -> str:
+    _events.inc(1, reason)
+    return "".join(buf)
+
@@ -0,0 +1,278 @@
+"""
+State Store — api 모듈의 paper 상태/캐시 dict를 여러 worker가 공유하도록 하는 key-value 저장소.
+
+Namespace는 dict 비슷한 인터페이스 (get / [] / in / pop)를 제공해서 기존 module-level dict를 대체.
+값은 JSON 직렬화 가능해야 하고 (to_dicts()를 가진 객체는 dict 목록으로 저장), 꺼낸 객체를 제자리 수정해도 저장소에는 반영되지 않음 → 반드시 다시 대입.
+
+Backend (STATE_BACKEND 환경변수):
+  - "memory" (기본): 프로세스 내 BoundedCache. 단일 worker 전용, 직렬화 없음
+  - "sqlite": WAL 모드 SQLite (STATE_DB_PATH). 같은 노드의 여러 uvicorn worker가 공유
+  - "redis": REDIS_URL (`pip install redis`). 여러 노드가 공유
+
+모든 backend에서 프로세스 로컬 데이터는 services.cache.BoundedCache로 크기/TTL 제한.
+sqlite/redis는 이 로컬 캐시를 read-through cache로 사용:
+  캐시된 값의 version만 확인하고(값 전송/역직렬화 없음) 바뀌었을 때만 다시 읽음.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from services.cache import BoundedCache
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "state.sqlite3")
+_MISSING = object()
+_PURGE_INTERVAL = float(os.getenv("STATE_PURGE_INTERVAL_S", "60"))
+
+
+# ──────────────────────────────────────────────
+# Backends
+# ──────────────────────────────────────────────
+
+class SQLiteStateStore:
+    """
+    WAL 모드 SQLite. thread마다 connection 1개.
+    만료된 행은 읽을 때 무시하고, store가 purge_interval마다 한 번씩 일괄 삭제 (chunks 같은 큰 값이 파일에 쌓이지 않도록).
+    """
+
+    def __init__(self, path: str = _DEFAULT_DB_PATH, purge_interval: float = _PURGE_INTERVAL):
+        self._path = path
+        self._local = threading.local()
+        self._purge_interval = purge_interval
+        self._purge_lock = threading.Lock()
+        self._next_purge = time.monotonic() + purge_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " version INTEGER NOT NULL, expires_at REAL,"
+            " PRIMARY KEY (ns, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at) WHERE expires_at IS NOT NULL")
+        logger.info(f"[state_store] sqlite at {path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def version(self, ns: str, key: str) -> Optional[int]:
+        row = self._conn().execute(
+            "SELECT version, expires_at FROM kv WHERE ns=? AND key=?", (ns, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def load(self, ns: str, key: str) -> tuple[Optional[int], Any]:
+        row = self._conn().execute(
+            "SELECT version, value, expires_at FROM kv WHERE ns=? AND key=?", (ns, key)
+        ).fetchone()
+        if row is None or (row[2] is not None and row[2] < time.time()):
+            return None, _MISSING
+        return row[0], json.loads(row[1])
+
+    def store(self, ns: str, key: str, raw: str, ttl: Optional[float]) -> int:
+        version = time.time_ns()
+        expires_at = time.time() + ttl if ttl else None
+        self._conn().execute(
+            "INSERT INTO kv (ns, key, value, version, expires_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(ns, key) DO UPDATE SET"
+            " value=excluded.value, version=excluded.version, expires_at=excluded.expires_at",
+            (ns, key, raw, version, expires_at),
+        )
+        self._maybe_purge()
+        return version
+
+    def _maybe_purge(self) -> None:
+        with self._purge_lock:
+            now = time.monotonic()
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self._purge_interval
+        try:
+            purged = self.purge_expired()
+        except sqlite3.Error as e:
+            logger.warning(f"[state_store] purge failed: {e}")
+            return
+        if purged:
+            logger.info(f"[state_store] purged {purged} expired row(s)")
+
+    def remove(self, ns: str, key: str) -> None:
+        self._conn().execute("DELETE FROM kv WHERE ns=? AND key=?", (ns, key))
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+        )
+        return cur.rowcount
+
+
+class RedisStateStore:
+    """Redis hash `state:{ns}:{key}` = {v: json, ver: int}."""
+
+    def __init__(self, client):
+        self._r = client
+
+    @staticmethod
+    def _key(ns: str, key: str) -> str:
+        return f"state:{ns}:{key}"
+
+    def version(self, ns: str, key: str) -> Optional[int]:
+        ver = self._r.hget(self._key(ns, key), "ver")
+        return int(ver) if ver is not None else None
+
+    def load(self, ns: str, key: str) -> tuple[Optional[int], Any]:
+        data = self._r.hgetall(self._key(ns, key))
+        if not data:
+            return None, _MISSING
+        return int(data["ver"]), json.loads(data["v"])
+
+    def store(self, ns: str, key: str, raw: str, ttl: Optional[float]) -> int:
+        version = time.time_ns()
+        k = self._key(ns, key)
+        pipe = self._r.pipeline()
+        pipe.hset(k, mapping={"v": raw, "ver": version})
+        if ttl:
+            pipe.expire(k, int(ttl))
+        else:
+            pipe.persist(k)
+        pipe.execute()
+        return version
+
+    def remove(self, ns: str, key: str) -> None:
+        self._r.delete(self._key(ns, key))
+
+    def purge_expired(self) -> int:
+        return 0   # Redis가 자체 만료
+
+
+# ──────────────────────────────────────────────
+# Namespace (dict-like facade)
+# ──────────────────────────────────────────────
+
+def _to_json(obj: Any) -> Any:
+    """json.dumps default — to_dicts()를 가진 compact 객체 (ChunkTable 등)는 dict 목록으로."""
+    to_dicts = getattr(obj, "to_dicts", None)
+    if to_dicts is None:
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+    return to_dicts()
+
+
+class Namespace:
+    """
+    저장소의 한 namespace를 dict처럼 사용. 프로세스 로컬 데이터는 BoundedCache (LRU / byte / TTL 제한).
+      - memory backend: BoundedCache가 곧 저장소 (evict되면 사라짐 → 호출부는 Firestore fallback 필요)
+      - shared backend: local cache → version 확인 → 필요 시 재로딩 (read-through + invalidation)
+    """
+
+    def __init__(
+        self,
+        store,
+        name: str,
+        ttl: Optional[float] = None,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+    ):
+        self._store = store
+        self.name = name
+        self._ttl = ttl
+        # memory: key → value / shared: key → (version, value)
+        self._local = BoundedCache(f"state.{name}", max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._read(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._read(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self._read(key) is not _MISSING
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self._store is None:
+            self._local.set(key, value)
+            return
+        raw = json.dumps(value, default=_to_json)
+        version = self._store.store(self.name, key, raw, self._ttl)
+        self._local.set(key, (version, value), size=len(raw))
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self._read(key)
+        self._delete(key)
+        return default if value is _MISSING else value
+
+    def __delitem__(self, key: str) -> None:
+        self._delete(key)
+
+    # ── internals ──
+
+    def _read(self, key: str) -> Any:
+        if self._store is None:
+            return self._local.get(key, _MISSING)
+        cached = self._local.get(key)
+        if cached is not None:
+            current = self._store.version(self.name, key)
+            if current == cached[0]:
+                return cached[1]
+            if current is None:
+                self._local.pop(key)
+                return _MISSING
+        version, value = self._store.load(self.name, key)
+        if value is _MISSING:
+            self._local.pop(key)
+            return _MISSING
+        self._local.set(key, (version, value))
+        return value
+
+    def _delete(self, key: str) -> None:
+        if self._store is not None:
+            self._store.remove(self.name, key)
+        self._local.pop(key)
+
+
+def _make_store():
+    kind = os.getenv("STATE_BACKEND", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteStateStore(os.getenv("STATE_DB_PATH", _DEFAULT_DB_PATH))
+    if kind == "redis":
+        import redis
+        url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        logger.info(f"[state_store] redis at {url}")
+        return RedisStateStore(redis.Redis.from_url(url, decode_responses=True))
+    return None
+
+
+_store = _make_store()
+_namespaces: dict[str, Namespace] = {}
+
+
+def namespace(
+    name: str,
+    ttl: Optional[float] = None,
+    max_entries: int = 1024,
+    max_bytes: Optional[int] = None,
+) -> Namespace:
+    """
+    공유 저장소의 namespace (이름당 1개 — 여러 모듈이 같은 이름을 쓰면 같은 객체).
+    ttl(초): 마지막 쓰기 후 만료. max_entries / max_bytes: 프로세스 로컬 캐시 한도.
+    """
+    ns = _namespaces.get(name)
+    if ns is None:
+        ns = _namespaces[name] = Namespace(_store, name, ttl, max_entries, max_bytes)
+    return ns
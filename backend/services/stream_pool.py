@@ -0,0 +1,87 @@
+"""
+Stream pool — chat의 provider streaming 동시 실행 수 제한 + 여러 agent stream 병합 (panel mode).
+
+- slot(): 프로세스 전체 동시 provider stream을 CHAT_MAX_STREAMS개로 제한. panel 하나가 agent 3개를
+  띄우면 3칸을 씀 → 여러 panel이 몰려도 provider rate limit / 연결 수가 한도 안에서 유지됨.
+  빈 칸을 기다린 시간은 coread_chat_stream_wait_seconds로 집계.
+- merge(): agent별 stream을 동시에 돌려 도착 순서대로 (agent_id, text) yield.
+  panel 전체 시간 ≈ 가장 느린 agent 1개 (합이 아님). agent 하나가 실패해도 나머지는 계속.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from services import metrics
+
+MAX_STREAMS = int(os.getenv("CHAT_MAX_STREAMS", "64"))
+
+END = object()   # merge(): agent stream 종료 표시 (text 자리에 옴)
+
+_sem: Optional[asyncio.Semaphore] = None
+_active = 0
+
+_wait = metrics.Histogram(
+    "coread_chat_stream_wait_seconds", "Time chat streams waited for a provider stream slot",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+@asynccontextmanager
+async def slot():
+    """provider stream 1칸 확보. 한도가 차 있으면 빌 때까지 대기."""
+    global _sem, _active
+    if _sem is None:
+        _sem = asyncio.Semaphore(MAX_STREAMS)
+    started = time.perf_counter()
+    async with _sem:
+        _wait.observe(time.perf_counter() - started)
+        _active += 1
+        try:
+            yield
+        finally:
+            _active -= 1
+
+
+async def merge(streams: dict) -> AsyncIterator[tuple]:
+    """
+    streams: {agent_id: AsyncIterator[Optional[str]]} (sse_stream.coalesce 출력 — None은 heartbeat).
+    yield (agent_id, text) / (agent_id, None) heartbeat / (agent_id, END) 종료 / (agent_id, Exception) 실패.
+    각 stream은 slot()을 잡은 뒤 시작. 소비자가 멈추면 남은 stream을 모두 cancel (provider 응답도 닫힘).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def run(agent_id: str, source) -> None:
+        try:
+            async with slot():
+                async for text in source:
+                    await queue.put((agent_id, text))
+            await queue.put((agent_id, END))
+        except Exception as e:
+            await queue.put((agent_id, e))
+
+    tasks = [asyncio.create_task(run(agent_id, source)) for agent_id, source in streams.items()]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            agent_id, item = await queue.get()
+            if item is END or isinstance(item, Exception):
+                remaining -= 1
+            yield agent_id, item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _collect() -> list[str]:
+    return [
+        "# TYPE coread_chat_streams_active gauge",
+        f"coread_chat_streams_active {_active}",
+        "# TYPE coread_chat_streams_limit gauge",
+        f"coread_chat_streams_limit {MAX_STREAMS}",
+    ]
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,197 @@
+"""
+Streaming multipart upload — request body를 고정 크기 chunk로 읽어 spool 파일에 바로 기록.
+
+FastAPI의 UploadFile + `await file.read()`는 Starlette가 한 번 임시 파일로 spool한 뒤 전체를 메모리로
+다시 읽음 → 100MB PDF 하나에 수백 MB peak RSS. 여기서는:
+  - Content-Length가 한도를 넘으면 body를 읽기 전에 413
+  - python-multipart parser에 request.stream()을 흘려 넣고, 파일 part는 SHA-256 갱신 + spool 파일 write
+    (chunk_size 단위로 모아서 worker thread에서 처리 — event loop는 parsing만)
+  - 파일 byte가 한도를 넘는 순간 중단하고 spool 삭제
+peak 메모리 ≈ chunk_size + ASGI receive chunk 1개 (업로드 크기와 무관).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+_MAX_FIELD_BYTES = 64 * 1024   # 파일이 아닌 form field (userId 등) 최대 크기
+_MULTIPART_OVERHEAD = 64 * 1024   # Content-Length 사전 검사 시 boundary / header / field 여유분
+
+
+class SpooledUpload:
+    """spool된 업로드 파일 1개 + 같은 요청의 form field."""
+
+    def __init__(self, path: str, filename: str, size: int, sha256: str, fields: dict):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.fields = fields
+
+    def discard(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _Receiver:
+    """MultipartParser callback — 첫 번째 파일 part만 spool, 나머지 파일 part는 거부."""
+
+    def __init__(self, spool_path: str, file_field: str, max_bytes: int, suffix: Optional[str]):
+        self.spool_path = spool_path
+        self.file_field = file_field
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.fields: dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.pending: list[bytes] = []      # 아직 디스크에 안 쓴 파일 데이터
+        self.pending_bytes = 0
+        self._file = None
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._part_name = ""
+        self._part_is_file = False
+        self._field_buf = bytearray()
+
+    # ── parser callbacks ──
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._part_name = ""
+        self._part_is_file = False
+        self._field_buf = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._part_name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            if self._part_name != self.file_field or self.filename is not None:
+                raise HTTPException(status_code=400, detail=f"'{self.file_field}' 파일 1개만 업로드 가능합니다")
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            if self.suffix and not self.filename.lower().endswith(self.suffix):
+                raise HTTPException(status_code=400, detail=f"{self.suffix} 파일만 업로드 가능합니다")
+            self._part_is_file = True
+            self._file = open(self.spool_path, "wb")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._part_is_file:
+            if len(self._field_buf) + end - start > _MAX_FIELD_BYTES:
+                raise HTTPException(status_code=413, detail="form field too large")
+            self._field_buf += data[start:end]
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=413, detail=f"파일이 너무 큽니다 (최대 {self.max_bytes // (1024 * 1024)}MB)"
+            )
+        self.pending.append(data[start:end])
+        self.pending_bytes += end - start
+
+    def on_part_end(self) -> None:
+        if not self._part_is_file:
+            self.fields[self._part_name] = self._field_buf.decode("utf-8", "replace")
+
+    # ── spool (worker thread) ──
+
+    def drain(self) -> None:
+        """pending 데이터를 hash에 반영하고 spool 파일에 기록."""
+        chunks, self.pending, self.pending_bytes = self.pending, [], 0
+        for chunk in chunks:
+            self.hasher.update(chunk)
+            self._file.write(chunk)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+async def receive_upload(
+    request: Request,
+    spool_dir: str,
+    max_bytes: int,
+    file_field: str = "file",
+    suffix: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    multipart/form-data 요청에서 file_field 파일을 spool_dir에 스트리밍 저장.
+    한도 초과 → 413, 형식 오류 / 파일 없음 / 확장자 불일치 (suffix) → 400 (spool 파일은 삭제됨).
+    """
+    content_type = request.headers.get("content-type", "")
+    ctype, params = parse_options_header(content_type)
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="multipart/form-data 요청이어야 합니다")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + _MULTIPART_OVERHEAD:
+        raise HTTPException(
+            status_code=413, detail=f"파일이 너무 큽니다 (최대 {max_bytes // (1024 * 1024)}MB)"
+        )
+
+    os.makedirs(spool_dir, exist_ok=True)
+    spool_path = os.path.join(spool_dir, f"upload-{uuid.uuid4().hex}.part")
+    receiver = _Receiver(spool_path, file_field, max_bytes, suffix)
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": receiver.on_part_begin,
+        "on_part_data": receiver.on_part_data,
+        "on_part_end": receiver.on_part_end,
+        "on_header_field": receiver.on_header_field,
+        "on_header_value": receiver.on_header_value,
+        "on_header_end": receiver.on_header_end,
+        "on_headers_finished": receiver.on_headers_finished,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if receiver.pending_bytes >= chunk_size:
+                await asyncio.to_thread(receiver.drain)
+        parser.finalize()
+        if receiver.pending:
+            await asyncio.to_thread(receiver.drain)
+    except HTTPException:
+        receiver.close()
+        _remove(spool_path)
+        raise
+    except Exception as e:
+        receiver.close()
+        _remove(spool_path)
+        logger.warning(f"[upload] malformed multipart body: {e}")
+        raise HTTPException(status_code=400, detail="잘못된 multipart 요청입니다")
+    except BaseException:   # client disconnect 등으로 cancel
+        receiver.close()
+        _remove(spool_path)
+        raise
+    receiver.close()
+
+    if receiver.filename is None:
+        raise HTTPException(status_code=400, detail=f"'{file_field}' 파일이 없습니다")
+    return SpooledUpload(spool_path, receiver.filename, receiver.size, receiver.hasher.hexdigest(), receiver.fields)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
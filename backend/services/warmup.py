@@ -0,0 +1,283 @@
+"""
+Warm-up — 자주 열리는 paper를 재시작 직후 미리 로컬 캐시에 올림.
+
+1) AccessTracker: paper별 접근 빈도 (지수 감쇠 점수, 반감기 WARMUP_HALF_LIFE_HOURS).
+   요청 경로는 메모리 카운터만 올리고, background thread가 주기적으로 SQLite (WARMUP_DB_PATH)에 합산
+   → 재시작 후에도 "인기 paper" 목록이 남음
+2) Warmup: 점수 상위 K개 (WARMUP_TOP_K) paper에 대해 순서대로
+     - Firestore meta / agents / chunks (+ chunk별 rect 캐시)  → db.firestore.prefetch_paper
+       agents는 chat이 보는 state_store "agents" namespace에도 넣음
+     - Chroma collection + 임베딩 모델 로드                    → db.vector_store.warm
+     - PDF 파일                                               → db.pdf_cache
+   paper 사이 간격은 WARMUP_RATE (paper/s)로 제한, cancel() 시 현재 단계가 끝나는 대로 중단.
+   Firestore / Storage breaker가 open이면 해당 단계는 건너뜀.
+3) 시작 시 1회 (WARMUP_ON_START=1) + WARMUP_INTERVAL_MIN마다 반복 (0이면 반복 안 함).
+   진행 상황은 /health의 "warmup", readiness는 /health/ready (시작 warm-up이 끝나기 전 503).
+"""
+import atexit
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "access.sqlite3")
+_HALF_LIFE = float(os.getenv("WARMUP_HALF_LIFE_HOURS", "72")) * 3600
+_FLUSH_INTERVAL = 30.0
+TOP_K = int(os.getenv("WARMUP_TOP_K", "20"))
+_RATE = float(os.getenv("WARMUP_RATE", "2"))          # paper / 초
+_ON_START = os.getenv("WARMUP_ON_START", "1") != "0"
+_INTERVAL = float(os.getenv("WARMUP_INTERVAL_MIN", "0")) * 60
+
+_warmed = metrics.Counter(
+    "coread_warmup_steps_total", "Warm-up steps by kind and outcome", ("step", "result"),
+)
+
+
+# ──────────────────────────────────────────────
+# Access frequency
+# ──────────────────────────────────────────────
+
+class AccessTracker:
+    """score(t) = Σ weight · 0.5^((t - t_access) / half_life). 저장은 (score, updated_at) — 읽을 때 감쇠."""
+
+    def __init__(self, path: str = _DEFAULT_DB_PATH, half_life: float = _HALF_LIFE):
+        self._path = path
+        self._half_life = half_life
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS access ("
+                " paper_id TEXT PRIMARY KEY, score REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=5.0)
+
+    def _decay(self, score: float, since: float, now: float) -> float:
+        return score * math.pow(0.5, max(0.0, now - since) / self._half_life)
+
+    def record(self, paper_id: str, weight: float = 1.0) -> None:
+        """요청 경로용 — 메모리 카운터만 증가."""
+        if not paper_id:
+            return
+        with self._lock:
+            self._pending[paper_id] += weight
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="access-flush", daemon=True)
+                self._flusher.start()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+        now = time.time()
+        with self._connect() as conn:
+            rows = dict(
+                (pid, (score, ts)) for pid, score, ts in conn.execute(
+                    f"SELECT paper_id, score, updated_at FROM access WHERE paper_id IN ({','.join('?' * len(pending))})",
+                    list(pending),
+                )
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO access (paper_id, score, updated_at) VALUES (?, ?, ?)",
+                [
+                    (pid, self._decay(*rows.get(pid, (0.0, now)), now) + weight, now)
+                    for pid, weight in pending.items()
+                ],
+            )
+        return len(pending)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"[warmup] access flush failed: {e}")
+
+    def top(self, k: int) -> list:
+        """감쇠 점수 상위 k개 [(paper_id, score)]."""
+        self.flush()
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT paper_id, score, updated_at FROM access").fetchall()
+        scored = [(pid, self._decay(score, ts, now)) for pid, score, ts in rows]
+        scored.sort(key=lambda r: r[1], reverse=True)
+        return [(pid, round(score, 3)) for pid, score in scored[:k]]
+
+
+_tracker: Optional[AccessTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def tracker() -> AccessTracker:
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = AccessTracker(os.getenv("WARMUP_DB_PATH") or _DEFAULT_DB_PATH)
+                atexit.register(_tracker.flush)
+    return _tracker
+
+
+def record_access(paper_id: Optional[str]) -> None:
+    if paper_id:
+        tracker().record(paper_id)
+
+
+# ──────────────────────────────────────────────
+# Warm-up job
+# ──────────────────────────────────────────────
+
+class Warmup:
+    """top-K paper warm-up. start()는 thread를 띄우고 바로 반환, 동시에 1개만 실행."""
+
+    def __init__(self, rate: float = _RATE):
+        self._rate = rate
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # pending: 시작 예정 (WARMUP_ON_START) / idle: 비활성 / running / done / cancelled / failed
+        self.state = "pending" if _ON_START else "idle"
+        # 시작 warm-up이 한 번 끝나면 latch — 이후 주기 / 수동 warm-up 중에는 readiness를 내리지 않음
+        self._ready = not _ON_START
+        self.total = 0
+        self.done = 0
+        self.errors = 0
+        self.current: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def start(self, top_k: int = TOP_K) -> bool:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._cancel.clear()
+            self.state = "running"
+            self.total = self.done = self.errors = 0
+            self.current = None
+            self.started_at, self.finished_at = time.time(), None
+            self._thread = threading.Thread(target=self._run, args=(top_k,), name="warmup", daemon=True)
+            self._thread.start()
+            return True
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def snapshot(self) -> dict:
+        out = {
+            "state": self.state,
+            "done": self.done,
+            "total": self.total,
+            "errors": self.errors,
+        }
+        if self.current:
+            out["current"] = self.current
+        if self.started_at:
+            end = self.finished_at or time.time()
+            out["elapsedSeconds"] = round(end - self.started_at, 1)
+        return out
+
+    def _run(self, top_k: int) -> None:
+        try:
+            papers = [pid for pid, _ in tracker().top(top_k)]
+            self.total = len(papers)
+            logger.info(f"[warmup] warming {len(papers)} paper(s)")
+            interval = 1.0 / self._rate if self._rate > 0 else 0.0
+            for pid in papers:
+                if self._cancel.is_set():
+                    break
+                self.current = pid
+                started = time.monotonic()
+                self._warm_paper(pid)
+                self.done += 1
+                # rate limit — cancel이면 즉시 깨어남
+                if self._cancel.wait(max(0.0, interval - (time.monotonic() - started))):
+                    break
+            self.state = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            logger.error(f"[warmup] failed: {e}", exc_info=True)
+            self.state = "failed"
+        finally:
+            self.current = None
+            self.finished_at = time.time()
+            self._ready = True
+            logger.info(
+                f"[warmup] {self.state}: {self.done}/{self.total} paper(s), {self.errors} error(s) "
+                f"in {self.finished_at - self.started_at:.1f}s"
+            )
+
+    def _warm_paper(self, paper_id: str) -> None:
+        from db import firestore, pdf_cache, storage, vector_store
+
+        steps = (
+            ("firestore", lambda: firestore.retry_after() == 0, lambda: _warm_firestore(firestore, paper_id)),
+            ("chroma", lambda: True, lambda: vector_store.warm(paper_id)),
+            ("pdf", storage.is_available, lambda: _warm_pdf(pdf_cache.get_cache(), storage, paper_id)),
+        )
+        for name, available, run in steps:
+            if self._cancel.is_set():
+                return
+            if not available():
+                _warmed.inc(1, name, "skipped")
+                continue
+            try:
+                run()
+                _warmed.inc(1, name, "ok")
+            except Exception as e:
+                self.errors += 1
+                _warmed.inc(1, name, "error")
+                logger.warning(f"[warmup] {name} failed for {paper_id}: {e}")
+
+
+def _warm_firestore(firestore, paper_id: str) -> None:
+    firestore.prefetch_paper(paper_id)
+    agents = firestore.get_agents_by_paper(paper_id)   # 방금 채운 read-through cache hit
+    if agents:
+        from services import state_store
+        state_store.namespace("agents")[paper_id] = agents   # api.chat / api.papers 공용 namespace
+
+
+def _warm_pdf(cache, storage, paper_id: str) -> None:
+    if cache.lookup(paper_id) is None:
+        cache.fill(paper_id, lambda: storage.iter_pdf(paper_id))
+
+
+warmup = Warmup()
+
+
+def start_scheduler() -> None:
+    """시작 시 warm-up (WARMUP_ON_START) + WARMUP_INTERVAL_MIN 주기 반복."""
+    if _ON_START:
+        warmup.start()
+    if _INTERVAL <= 0:
+        return
+
+    def loop():
+        while not warmup._cancel.wait(_INTERVAL):
+            warmup.start()
+
+    threading.Thread(target=loop, name="warmup-scheduler", daemon=True).start()
+
+
+def shutdown() -> None:
+    warmup.cancel()
+    if _tracker is not None:
+        _tracker.flush()